@@ -1,7 +1,8 @@
-from math import floor
+import heapq
+from typing import List
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.graph_objs import Figure
 
@@ -11,63 +12,205 @@ from spark_sight.data_references import (
     COL_SUBSTAGE_DATE_START,
     COL_SUBSTAGE_DATE_END,
     COL_ID_EXECUTOR,
+    COL_CONCURRENCY_DATE,
+    COL_CONCURRENCY_TASKS,
 )
 
 
-GANTT_XAXIS_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 GANTT_BARS_DISTANCE = 0.5
 GANTT_BARS_HEIGHT = 0.4
 
 
-def create_hovertext_date_range(
-    _start,
-    _end,
-    _duration,
-    _len,
-):
-    _duration_text = _duration.apply(format_duration_sec)
+# Hover content is in the customdata of the traces, as numbers,
+# rendered by templates shared by all the points of a trace.
+# Templates format dates from date strings only,
+# times of day and durations are in customdata
+# as hours, minutes and seconds
+HOVERTEMPLATE_DATE_RANGE = (
+    "%{customdata[0]:02d}:%{customdata[1]:02d}:%{customdata[2]:02d}"
+    " to %{customdata[3]:02d}:%{customdata[4]:02d}:%{customdata[5]:02d}"
+    " (%{customdata[6]:d}h %{customdata[7]:02d}m %{customdata[8]:04.1f}s)"
+)
+# Stages of a substage are as many as they run in it,
+# in the hovertext of the traces along with their label
+HOVERTEMPLATE_STAGES = "%{hovertext}"
+
+
+def create_customdata_date_range(
+    _start: pd.Series,
+    _end: pd.Series,
+    _duration: pd.Series,
+) -> List[np.ndarray]:
+    """Create the customdata columns of the date range.
+    
+    Rendered by `HOVERTEMPLATE_DATE_RANGE`,
+    the duration in seconds is split into hours, minutes and seconds.
+    
+    """
+    _duration_decisec = np.rint(
+        _duration.values.astype(float) * 10
+    ).astype(np.int64)
+    
+    return [
+        _start.dt.hour.values,
+        _start.dt.minute.values,
+        _start.dt.second.values,
+        _end.dt.hour.values,
+        _end.dt.minute.values,
+        _end.dt.second.values,
+        _duration_decisec // 36_000,
+        _duration_decisec // 600 % 60,
+        _duration_decisec % 600 / 10,
+    ]
+
+
+def create_hovertext_stages(
+    _stages: pd.Series,
+) -> np.ndarray:
+    """Create the hovertext of the stages.
     
-    return (
-        _start.dt.strftime("%H:%M:%S")
-        + pd.Series([" to "] * _len)
-        + _end.dt.strftime("%H:%M:%S")
-        + pd.Series([" ("] * _len)
-        + _duration_text
-        + pd.Series([")"] * _len)
+    Rendered by `HOVERTEMPLATE_STAGES`.
+    
+    """
+    return np.array(
+        [
+            "Stage" + ("s" if len(_) > 1 else "") + ": <b>"
+            + ", ".join([str(__) for __ in _])
+            + "</b>"
+            for _ in _stages.values
+        ],
+        dtype=object,
     )
 
 
-def create_chart_efficiency(
+def _create_traces_efficiency(
     df: pd.DataFrame,
-    fig: Figure,
-    cpus_available: int,
-):
-    id_vars = [
-        COL_SUBSTAGE_DATE_START,
-        COL_SUBSTAGE_DATE_END,
-        COL_SUBSTAGE_DURATION,
-        COL_ID_STAGE,
-    ]
-    
-    value_vars = list(df.columns[df.columns.str.startswith("efficiency__")])
+    value_vars: List[str],
+    customdata: np.ndarray,
+    hovertext: np.ndarray,
+    metrics_map_text: dict,
+    metrics_map_color: dict,
+) -> List[go.Bar]:
+    _traces = []
     
-    df_fig = df[
-        id_vars + value_vars
-    ]
+    _width = df[COL_SUBSTAGE_DURATION].astype(float) * 1e3
     
-    df_fig = (
-        df_fig.melt(
-            id_vars=id_vars,
-            value_vars=value_vars,
-        )
-        .rename(
-            columns={
-                "variable": "metric",
-            }
+    for _metric in value_vars:
+        _hovertemplate = "<br>".join(
+            [
+                HOVERTEMPLATE_DATE_RANGE,
+                f"<b>%{{y:.1%}}</b> ({metrics_map_text[_metric]})",
+                HOVERTEMPLATE_STAGES,
+            ]
+        ) + "<extra></extra>"
+        
+        _traces.append(
+            go.Bar(
+                x=df[COL_SUBSTAGE_DATE_START],
+                y=df[_metric],
+                width=_width,
+                name=_metric,
+                offset=0,
+                customdata=customdata,
+                hovertext=hovertext,
+                hovertemplate=_hovertemplate,
+                marker_color=metrics_map_color[_metric],
+            ),
         )
+    
+    return _traces
+
+
+def _create_traces_efficiency_webgl(
+    df: pd.DataFrame,
+    value_vars: List[str],
+    customdata: np.ndarray,
+    hovertext: np.ndarray,
+    metrics_map_text: dict,
+    metrics_map_color: dict,
+) -> List[go.Scattergl]:
+    """Create the efficiency chart as stacked WebGL areas.
+    
+    Each substage is a step from its start to its end,
+    dropping to zero where no substage follows.
+    All the traces share the same points, filled to the next trace.
+    
+    """
+    _start = df[COL_SUBSTAGE_DATE_START].values
+    _end = df[COL_SUBSTAGE_DATE_END].values
+    
+    _gap_after = np.append(_start[1:] > _end[:-1], True)
+    _gap_before = np.append(True, _gap_after[:-1])
+    
+    # Points of each substage: start at zero if after a gap,
+    # start, end, and end at zero if before a gap
+    _points = np.stack(
+        [
+            _gap_before,
+            np.ones(len(df), dtype=bool),
+            np.ones(len(df), dtype=bool),
+            _gap_after,
+        ],
+        axis=-1,
     )
     
+    (
+        _index,
+        _kind,
+    ) = np.nonzero(_points)
+    
+    _x = np.where(_kind < 2, _start[_index], _end[_index])
+    _is_zero = (_kind == 0) | (_kind == 3)
+    
     _traces = []
+    _cumulative = np.zeros(len(df))
+    
+    for _metric in value_vars:
+        _values = df[_metric].values
+        _cumulative = _cumulative + _values
+        
+        _traces.append(
+            go.Scattergl(
+                x=_x,
+                y=np.where(_is_zero, 0.0, _cumulative[_index]),
+                name=_metric,
+                mode="lines",
+                line_width=0,
+                fill="tozeroy" if len(_traces) == 0 else "tonexty",
+                fillcolor=metrics_map_color[_metric],
+                customdata=np.column_stack(
+                    [
+                        customdata[_index],
+                        _values[_index],
+                    ]
+                ),
+                hovertext=hovertext[_index],
+                hovertemplate="<br>".join(
+                    [
+                        HOVERTEMPLATE_DATE_RANGE,
+                        "<b>%{customdata[9]:.1%}</b>"
+                        f" ({metrics_map_text[_metric]})",
+                        HOVERTEMPLATE_STAGES,
+                    ]
+                ) + "<extra></extra>",
+            )
+        )
+    
+    return _traces
+
+
+def create_chart_efficiency(
+    df: pd.DataFrame,
+    fig: Figure,
+    cpus_available: int,
+    webgl: bool = False,
+):
+    value_vars = list(df.columns[df.columns.str.startswith("efficiency__")])
+    
+    df = df.sort_values(
+        COL_SUBSTAGE_DATE_START,
+        kind="stable",
+    ).reset_index(drop=True)
     
     metrics_map_text = {
         "efficiency__duration_cpu_usage": "Actual task work",
@@ -81,53 +224,37 @@ def create_chart_efficiency(
         "efficiency__duration_cpu_overhead_shuffle": "red",
     }
     
-    for _metric in df_fig["metric"].unique():
-        _df = df_fig[df_fig["metric"] == _metric].copy().reset_index(drop=True)
-        _y = _df["value"]
-        _len = len(_y)
-        _start = _df[COL_SUBSTAGE_DATE_START]
-        _end = _df[COL_SUBSTAGE_DATE_END]
-        _duration = _df[COL_SUBSTAGE_DURATION]
-        
-        _hovertext_date_range = create_hovertext_date_range(
-            _start,
-            _end,
-            _duration,
-            _len,
-        )
-        
-        _hovertext = (
-            _hovertext_date_range
-            + pd.Series(["<br>"] * _len)
-            + pd.Series(["<b>"] * _len)
-            + pd.Series(_y.apply(lambda _: _ * 100).map("{:.1f}".format))
-            + pd.Series(["%</b> ("] * _len)
-            + _df["metric"].map(metrics_map_text).astype(str)
-            + pd.Series([")"] * _len)
-            + pd.Series(["<br>"] * _len)
-            + _df[COL_ID_STAGE].map(len).map(lambda _: "Stage" + ("s" if _ > 1 else "") + ": <b>")
-            + pd.Series([", ".join([str(__) for __ in _]) for _ in _df[COL_ID_STAGE].values])
-            + pd.Series(["</b>"] * _len)
-        )
-
-        _hovertemplate = "<br>".join(
-            [
-                "%{hovertext}",
-                "<extra></extra>",
-            ]
+    # Same substages for all the metrics
+    _customdata = np.stack(
+        create_customdata_date_range(
+            df[COL_SUBSTAGE_DATE_START],
+            df[COL_SUBSTAGE_DATE_END],
+            df[COL_SUBSTAGE_DURATION],
+        ),
+        axis=-1,
+    )
+    _hovertext = create_hovertext_stages(
+        df[COL_ID_STAGE],
+    )
+    
+    if webgl:
+        _traces = _create_traces_efficiency_webgl(
+            df,
+            value_vars,
+            _customdata,
+            _hovertext,
+            metrics_map_text=metrics_map_text,
+            metrics_map_color=metrics_map_color,
         )
-        
-        _traces.append(
-            go.Bar(
-                x=_df[COL_SUBSTAGE_DATE_START],
-                y=_y,
-                width=_df[COL_SUBSTAGE_DURATION].apply(lambda _: float(_)) * 1e3,
-                name=_metric,
-                offset=0,
-                hovertext=_hovertext,
-                hovertemplate=_hovertemplate,
-                marker_color=metrics_map_color[_metric],
-            ),
+    
+    else:
+        _traces = _create_traces_efficiency(
+            df,
+            value_vars,
+            _customdata,
+            _hovertext,
+            metrics_map_text=metrics_map_text,
+            metrics_map_color=metrics_map_color,
         )
         
     fig.add_traces(
@@ -148,157 +275,112 @@ def create_chart_efficiency(
     )
 
 
-def assign_y_to_stages(
-    _df_stages: pd.DataFrame,
+def create_chart_concurrency(
+    df: pd.DataFrame,
+    fig: Figure,
+    row: int,
+    cpus_available: int,
+    webgl: bool = False,
 ):
-    _df_stages = _df_stages.sort_values(COL_SUBSTAGE_DATE_START)
-    y = dict()
+    _scatter = go.Scattergl if webgl else go.Scatter
     
-    id_stage_to_see = sorted(list(set(_df_stages[COL_ID_STAGE])))
-    id_stage_seen = set()
+    fig.add_trace(
+        _scatter(
+            x=df[COL_CONCURRENCY_DATE],
+            y=df[COL_CONCURRENCY_TASKS],
+            name="concurrency",
+            mode="lines",
+            line_shape="hv",
+            line_color="green",
+            fill="tozeroy",
+            hovertemplate=(
+                "%{x|%H:%M:%S.%L}"
+                "<br><b>%{y}</b> tasks running"
+                "<extra></extra>"
+            ),
+        ),
+        row=row,
+        col=1,
+    )
     
-    while len(id_stage_to_see) > 0:
-        id_stage = id_stage_to_see[0]
-
-        id_stage_to_see = set(id_stage_to_see)
-        id_stage_to_see.remove(id_stage)
-        id_stage_seen.add(id_stage)
-        
-        stage_row = _df_stages[_df_stages[COL_ID_STAGE] == id_stage]
-        
-        if len(stage_row) != 1:
-            raise ValueError(
-                f"Stage row not found or found multiple: {stage_row}"
-            )
-        
-        _start, _end = (
-            stage_row[COL_SUBSTAGE_DATE_START].values[0],
-            stage_row[COL_SUBSTAGE_DATE_END].values[0],
-        )
-        
-        started_during_me = (
-            _df_stages[
-                (~_df_stages[COL_ID_STAGE].isin(id_stage_seen))
-                & (
-                    _start <= _df_stages[COL_SUBSTAGE_DATE_START]
-                )
-                & (
-                    _df_stages[COL_SUBSTAGE_DATE_START] <= _end
-                )
-            ]
-        )
-        
-        _concurrent_stages = [id_stage]
-        
-        while not started_during_me.empty:
-            _concurrent_stages.extend(
-                list(
-                    started_during_me[COL_ID_STAGE].unique()
-                )
-            )
-
-            _id_stage_seen = list(started_during_me[COL_ID_STAGE].values)
-            
-            for _seen in _id_stage_seen:
-                id_stage_to_see.remove(_seen)
-                id_stage_seen.add(_seen)
-
-            _start, _end = (
-                started_during_me[COL_SUBSTAGE_DATE_START].max(),
-                started_during_me[COL_SUBSTAGE_DATE_END].max(),
-            )
-
-            started_during_me = (
-                _df_stages[
-                    (~_df_stages[COL_ID_STAGE].isin(id_stage_seen))
-                    & (
-                        _start <= _df_stages[COL_SUBSTAGE_DATE_START]
-                    )
-                    & (
-                        _df_stages[COL_SUBSTAGE_DATE_START] <= _end
-                    )
-                ]
-            )
-
-        _concurrent_stages = sorted(_concurrent_stages)
-        
-        y = dict(
-            **y,
-            **{
-                str(_stage): GANTT_BARS_DISTANCE * _stage_index
-                for _stage_index, _stage in enumerate(_concurrent_stages)
-            },
-        )
-        
-        id_stage_to_see = sorted(list(id_stage_to_see))
-
-    return y
+    fig.add_hline(
+        y=cpus_available,
+        line_dash="dot",
+        line_color="grey",
+        row=row,
+        col=1,
+    )
+    
+    fig.update_yaxes(
+        title_text="Tasks running",
+        row=row,
+        col=1,
+    )
 
 
-def format_duration_sec(
-    size: float,
-) -> str:
-    size = float(size)
-    size_ms = size * 1000
-    
-    format_float_decimals = 1
-    
-    conversions = [
-        1000,
-        60,
-        60,
-        24,
-    ]
+def assign_y_to_stages(
+    _df_stages: pd.DataFrame,
+    lanes_max: int = None,
+):
+    """Assign the stages to lanes of the timeline.
+    
+    Greedy interval partitioning: in order of start,
+    each stage takes the lowest lane free at its start,
+    a lane being free after the end of its last stage.
+    The number of lanes is the maximum number of concurrent stages.
+    
+    Parameters
+    ----------
+    _df_stages : pd.DataFrame
+        Stages with start and end dates.
+    lanes_max : int, optional
+        Maximum number of lanes.
+        When all lanes are busy, the stage takes the lane ending first.
+
+    Returns
+    -------
+    dict
+        Y of the lane by stage id as str.
+    
+    """
+    _df_stages = _df_stages.sort_values(
+        [COL_SUBSTAGE_DATE_START, COL_ID_STAGE],
+        kind="stable",
+    )
     
-    n = 0
+    # Lanes by end of their last stage, and free lanes
+    lanes_busy = []
+    lanes_free = []
+    lanes = 0
     
-    power_labels = {
-        _index: _str
-        for _index, _str in enumerate(
-            [
-                "ms",
-                "sec",
-                "min",
-                "hours",
-                "days",
-            ]
-        )
-    }
+    y = dict()
     
-    while n <= len(conversions) - 1:
-        conversion = conversions[n]
+    for _stage, _start, _end in zip(
+        _df_stages[COL_ID_STAGE].values,
+        _df_stages[COL_SUBSTAGE_DATE_START].values,
+        _df_stages[COL_SUBSTAGE_DATE_END].values,
+    ):
+        while len(lanes_busy) > 0 and lanes_busy[0][0] < _start:
+            heapq.heappush(lanes_free, heapq.heappop(lanes_busy)[1])
         
-        if size_ms < conversion:
-            break
-            
-        else:
-            size_ms /= conversion
-            n += 1
-            
-            if n > len(conversions) - 1:
-                break
-    
-    size_rounded = round(size_ms, format_float_decimals)
-    size_decimals = size_rounded - floor(size_rounded)
-    
-    if n <= 1 or size_decimals == 0:
-        size_str = str(
-            int(round(size_rounded))
-        )
+        if len(lanes_free) > 0:
+            _lane = heapq.heappop(lanes_free)
         
-    else:
-        size_str = (
+        elif lanes_max is None or lanes < lanes_max:
+            _lane = lanes
+            lanes += 1
+        
+        else:
             (
-                r"{:." + str(format_float_decimals) + r"f}"
-            )
-            .format(size_rounded)
-        )
+                _,
+                _lane,
+            ) = heapq.heappop(lanes_busy)
+        
+        heapq.heappush(lanes_busy, (_end, _lane))
+        
+        y[str(_stage)] = GANTT_BARS_DISTANCE * _lane
     
-    return (
-        size_str
-        + " "
-        + power_labels[n]
-    )
+    return y
 
 
 def format_bytes(
@@ -340,28 +422,78 @@ def format_bytes(
     )
 
 
+def create_trace_timeline(
+    df: pd.DataFrame,
+    col_y: str,
+    col_text: str,
+    col_color: str = None,
+) -> go.Bar:
+    """Create a horizontal bar trace of a timeline.
+    
+    Bars start at the start date, as base,
+    and are as wide as the duration in ms, as x.
+    Both are rounded to ms from the int64 ns of the dates,
+    without string formatting.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe with start and end dates of the bars.
+    col_y : str
+        Column of the y of the bars.
+    col_text : str
+        Column of the text inside the bars.
+    col_color : str, optional
+        Column of the color of the bars, on the color axis.
+
+    Returns
+    -------
+    go.Bar
+        Timeline trace.
+    
+    """
+    _start_ns = df[COL_SUBSTAGE_DATE_START].values.view(np.int64)
+    _end_ns = df[COL_SUBSTAGE_DATE_END].values.view(np.int64)
+    
+    _start_ms = (_start_ns + 500_000) // 1_000_000
+    _duration_ms = (_end_ns - _start_ns + 500_000) // 1_000_000
+    
+    marker = dict(
+        line=dict(
+            width=1,
+            color="white",
+        ),
+    )
+    
+    if col_color is not None:
+        marker.update(
+            color=df[col_color].values,
+            coloraxis="coloraxis",
+        )
+    
+    return go.Bar(
+        base=_start_ms.astype("datetime64[ms]"),
+        x=_duration_ms.astype(float),
+        y=df[col_y].values,
+        text=df[col_text].values,
+        orientation="h",
+        marker=marker,
+        showlegend=False,
+        textposition="inside",
+        textangle=0,
+        insidetextanchor="middle",
+    )
+
+
 def _create_trace_spill(
     df: pd.DataFrame,
     col_y: str,
-    px_timeline_color_kwargs: dict = None,
+    col_color: str = None,
     opacity: float = 1,
     is_trace_hidden: bool = False,
 ):
     df = df.reset_index(drop=True)
     
-    # Plotly can"t handle ns
-    # plotly.express._core == 5.7.0, line 1681
-    # args["data_frame"][args["x_end"]] = (x_end - x_start).astype("timedelta64[ms]")
-    df.loc[:, COL_SUBSTAGE_DATE_START] = (
-        df[COL_SUBSTAGE_DATE_START].dt.strftime(
-            GANTT_XAXIS_DATETIME_FORMAT
-        )
-    )
-    
-    df.loc[:, COL_SUBSTAGE_DATE_END] = (
-        df[COL_SUBSTAGE_DATE_END].dt.strftime(GANTT_XAXIS_DATETIME_FORMAT)
-    )
-    
     if not is_trace_hidden:
         text_col = "memory_spill_disk_format"
         
@@ -372,107 +504,130 @@ def _create_trace_spill(
     else:
         text_col = "y_labels"
     
-    _fig = px.timeline(
-        data_frame=df,
-        x_start=COL_SUBSTAGE_DATE_START,
-        x_end=COL_SUBSTAGE_DATE_END,
-        y=col_y,
-        text=text_col,
-        **px_timeline_color_kwargs,
-    )
-    
-    _len = len(df)
-    _start = pd.to_datetime(
-        df[COL_SUBSTAGE_DATE_START],
-        format=GANTT_XAXIS_DATETIME_FORMAT
-    )
-    _end = pd.to_datetime(
-        df[COL_SUBSTAGE_DATE_END],
-        format=GANTT_XAXIS_DATETIME_FORMAT
+    _trace = create_trace_timeline(
+        df,
+        col_y=col_y,
+        col_text=text_col,
+        col_color=col_color,
     )
-    _duration = (_end - _start).astype("timedelta64[s]")
     
-    _fig.update_traces(
+    _trace.update(
         opacity=opacity,
-        marker_line=dict(
-            width=1,
-            color="white",
-        ),
-        textposition="inside",
-        textangle=0,
-        insidetextanchor="middle",
     )
     
     if not is_trace_hidden:
-        
-        _hovertext_date_range = create_hovertext_date_range(
-            _start,
-            _end,
-            _duration,
-            _len,
-        )
-        
-        _hovertext_stage_all = (
-            df[COL_ID_STAGE].map(len).map(
-                lambda _: "Stage" + ("s" if _ > 1 else "") + ": <b>"
+        _customdata = np.stack(
+            create_customdata_date_range(
+                df[COL_SUBSTAGE_DATE_START],
+                df[COL_SUBSTAGE_DATE_END],
+                pd.Series(_trace.x / 1e3),
             )
-            + pd.Series(
-            [", ".join([str(__) for __ in _]) for _ in
-                df[COL_ID_STAGE].values]
-        )
-            + pd.Series(["</b>"] * _len)
+            + [
+                df[COL_ID_EXECUTOR].values.astype(float),
+            ],
+            axis=-1,
         )
         
-        _hovertext = (
-            _hovertext_date_range
-            + pd.Series(["<br>"] * _len)
-            + pd.Series(["Executor ID: <b>"] * _len)
-            + df[COL_ID_EXECUTOR].astype(int).astype(str)
-            + pd.Series(["</b>"] * _len)
-            + pd.Series(["<br>"] * _len)
-            + pd.Series(["Total spilled: <b>"] * _len)
-            + df["memory_spill_disk_format"]
-            + pd.Series(["</b>"] * _len)
-            + pd.Series(["<br>"] * _len)
-            + _hovertext_stage_all
-        )
-    
-        _fig.update_traces(
-            hovertext=_hovertext,
-            hovertemplate=(
-                "%{hovertext}"
-                "<extra></extra>"
+        _trace.update(
+            customdata=_customdata,
+            hovertext=create_hovertext_stages(
+                df[COL_ID_STAGE],
             ),
+            hovertemplate="<br>".join(
+                [
+                    HOVERTEMPLATE_DATE_RANGE,
+                    "Executor ID: <b>%{customdata[9]:d}</b>",
+                    # Formatted spill, as the text inside the bar
+                    "Total spilled: <b>%{text}</b>",
+                    HOVERTEMPLATE_STAGES,
+                ]
+            ) + "<extra></extra>",
         )
+    
+    return _trace
+    
 
-    _trace = list(
-        _fig.select_traces()
+def _create_trace_spill_heatmap(
+    df: pd.DataFrame,
+    col_y: str,
+    col_color: str,
+    executors: List[int],
+) -> go.Heatmap:
+    """Create the spill chart as a heatmap over executor and time.
+    
+    Columns are the substages, between the unique substage dates,
+    rows are all the executors in their ID range,
+    cells without spill are empty.
+    
+    Executors without spill have their own empty row,
+    otherwise the rows around them would span over them.
+    
+    """
+    _start = df[COL_SUBSTAGE_DATE_START].values
+    _end = df[COL_SUBSTAGE_DATE_END].values
+    
+    _edges = np.unique(np.concatenate([_start, _end]))
+    
+    _executors = np.concatenate(
+        [
+            np.asarray(executors, dtype=float),
+            df[col_y].values.astype(float),
+        ]
     )
+    _y = np.arange(_executors.min(), _executors.max() + 1)
     
-    assert len(_trace) == 1
-    return _trace[0]
+    _cell = (
+        np.searchsorted(_y, df[col_y].values),
+        np.searchsorted(_edges, _start),
+    )
+    
+    z = np.full((len(_y), len(_edges) - 1), np.nan)
+    z[_cell] = df[col_color].values
     
+    return go.Heatmap(
+        x=_edges,
+        y=_y,
+        z=z,
+        coloraxis="coloraxis",
+        hoverongaps=False,
+        hovertemplate="<br>".join(
+            [
+                "%{x|%H:%M:%S}",
+                "Executor ID: <b>%{y}</b>",
+                "Total spilled: <b>%{z:.4~s}B</b>",
+            ]
+        ) + "<extra></extra>",
+    )
+
 
 def create_chart_spill(
     df: pd.DataFrame,
     fig,
     col_y: str,
     row: int,
-    px_timeline_color_kwargs: dict = None,
+    col_color: str = None,
     app_info: dict = None,
+    webgl: bool = False,
 ):
-    px_timeline_color_kwargs = px_timeline_color_kwargs or {}
-    
     df = df[
         df["memory_spill_disk"] > 0
     ].copy().reset_index(drop=True)
     
     if not df.empty:
-        trace_not_empty = _create_trace_spill(
-            df,
-            col_y,
-            px_timeline_color_kwargs,
-        )
+        if webgl:
+            trace_not_empty = _create_trace_spill_heatmap(
+                df,
+                col_y,
+                col_color=col_color,
+                executors=list(app_info[COL_ID_EXECUTOR]),
+            )
+        
+        else:
+            trace_not_empty = _create_trace_spill(
+                df,
+                col_y,
+                col_color=col_color,
+            )
 
         fig.add_trace(
             trace_not_empty,
@@ -512,7 +667,6 @@ def create_chart_spill(
     trace_empty = _create_trace_spill(
         df_empty,
         col_y,
-        px_timeline_color_kwargs={},
         opacity=0,
         is_trace_hidden=True,
     )
@@ -531,78 +685,35 @@ def create_chart_stages(
     fig,
     col_y: str,
     row: int,
-    px_timeline_color_kwargs: dict = None,
 ):
-    px_timeline_color_kwargs = px_timeline_color_kwargs or {}
-    
     if df.empty:
     
         raise NotImplementedError
     
     else:
-        
-        # Plotly can"t handle ns
-        # plotly.express._core == 5.7.0, line 1681
-        # args["data_frame"][args["x_end"]] = (x_end - x_start).astype("timedelta64[ms]")
-        df.loc[:, COL_SUBSTAGE_DATE_START] = (
-            df[COL_SUBSTAGE_DATE_START].dt.strftime(GANTT_XAXIS_DATETIME_FORMAT)
-        )
-    
-        df.loc[:, COL_SUBSTAGE_DATE_END] = (
-            df[COL_SUBSTAGE_DATE_END].dt.strftime(GANTT_XAXIS_DATETIME_FORMAT)
-        )
-    
-        timeline_stages_fig = px.timeline(
-            data_frame=df,
-            x_start=COL_SUBSTAGE_DATE_START,
-            x_end=COL_SUBSTAGE_DATE_END,
-            y=col_y,
-            text="y_labels",
-            **px_timeline_color_kwargs,
-        )
-        
-        _len = len(df)
-        _start = pd.to_datetime(df[COL_SUBSTAGE_DATE_START], format=GANTT_XAXIS_DATETIME_FORMAT)
-        _end = pd.to_datetime(df[COL_SUBSTAGE_DATE_END], format=GANTT_XAXIS_DATETIME_FORMAT)
-        _duration = (_end - _start).astype("timedelta64[s]")
-        
-        _hovertext_date_range = create_hovertext_date_range(
-            _start,
-            _end,
-            _duration,
-            _len,
+        timeline_stages_trace = create_trace_timeline(
+            df,
+            col_y=col_y,
+            col_text="y_labels",
         )
         
-        _hovertext = (
-            pd.Series(["Stage: <b>"] * _len)
-            + df["y_labels"]
-            + pd.Series(["</b>"] * _len)
-            + pd.Series(["<br>"] * _len)
-            + _hovertext_date_range
-        )
-    
-        timeline_stages_fig.update_traces(
-            hovertext=_hovertext,
-            hovertemplate=(
-                "%{hovertext}"
-                "<extra></extra>"
-            ),
-            marker_line=dict(
-                width=1,
-                color="white",
+        timeline_stages_trace.update(
+            customdata=np.stack(
+                create_customdata_date_range(
+                    df[COL_SUBSTAGE_DATE_START],
+                    df[COL_SUBSTAGE_DATE_END],
+                    pd.Series(timeline_stages_trace.x / 1e3),
+                ),
+                axis=-1,
             ),
+            hovertemplate="<br>".join(
+                [
+                    "Stage: <b>%{text}</b>",
+                    HOVERTEMPLATE_DATE_RANGE,
+                ]
+            ) + "<extra></extra>",
             marker_color="black",
-            textposition="inside",
-            textangle=0,
-            insidetextanchor="middle",
         )
-    
-        timeline_stages_trace = list(
-            timeline_stages_fig.select_traces()
-        )
-    
-        assert len(timeline_stages_trace) == 1
-        timeline_stages_trace = timeline_stages_trace[0]
         
         fig.add_trace(
             timeline_stages_trace,
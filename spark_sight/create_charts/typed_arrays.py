@@ -0,0 +1,263 @@
+import base64
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.graph_objs import Figure
+
+
+# Trace attributes written as typed arrays
+TYPED_ARRAYS_ATTRIBUTES = (
+    "x",
+    "y",
+    "base",
+    "width",
+    "customdata",
+)
+
+# Trace attributes holding times, e.g. bar widths in ms,
+# written as float64 since float32 is exact up to 2^24 only
+TYPED_ARRAYS_ATTRIBUTES_TIME = (
+    "x",
+    "base",
+    "width",
+)
+
+TYPED_ARRAYS_INT32_MAX = np.iinfo(np.int32).max
+
+# Decodes the typed arrays back to arrays plotly.js can plot,
+# int64 epoch ms as float64 numbers, dates on date axes,
+# and two-dimensional arrays as arrays of rows
+TYPED_ARRAYS_DECODER_JS = """
+function decodeTypedArrays(obj) {
+    var TYPED_ARRAYS = {
+        "i1": Int8Array, "u1": Uint8Array,
+        "i2": Int16Array, "u2": Uint16Array,
+        "i4": Int32Array, "u4": Uint32Array,
+        "i8": BigInt64Array,
+        "f4": Float32Array, "f8": Float64Array
+    };
+    if (Array.isArray(obj)) {
+        for (var i = 0; i < obj.length; i++) {
+            obj[i] = decodeTypedArrays(obj[i]);
+        }
+    } else if (obj !== null && typeof obj === "object") {
+        if (typeof obj.dtype === "string" && typeof obj.bdata === "string") {
+            var binary = atob(obj.bdata);
+            var bytes = new Uint8Array(binary.length);
+            for (var j = 0; j < binary.length; j++) {
+                bytes[j] = binary.charCodeAt(j);
+            }
+            var array = new TYPED_ARRAYS[obj.dtype](bytes.buffer);
+            if (obj.dtype === "i8") {
+                array = Float64Array.from(array, Number);
+            }
+            if (typeof obj.shape === "string" && obj.shape.indexOf(",") >= 0) {
+                var columns = Number(obj.shape.split(",")[1]);
+                var rows = [];
+                for (var k = 0; k < array.length; k += columns) {
+                    rows.push(Array.from(array.subarray(k, k + columns)));
+                }
+                return rows;
+            }
+            return array;
+        }
+        for (var key in obj) {
+            obj[key] = decodeTypedArrays(obj[key]);
+        }
+    }
+    return obj;
+}
+"""
+
+
+def encode_typed_array(
+    values,
+    dtype_float: str = "f4",
+) -> Optional[dict]:
+    """Encode an array as a base64 typed array.
+
+    * dates as int64 epoch ms
+    * floats as `dtype_float`
+    * integers as int32, or float64 if out of range
+
+    Two-dimensional numeric arrays, e.g. customdata,
+    are encoded by row with their `shape`, as "rows, columns".
+
+    Parameters
+    ----------
+    values
+        One or two-dimensional array of the trace attribute.
+    dtype_float : str
+        Typed array of floats, float32 (f4) or float64 (f8).
+
+    Returns
+    -------
+    dict or None
+        Typed array as `dtype` and base64 `bdata`, and `shape` if 2-D,
+        None if the array is not numeric nor of dates.
+
+    """
+    if isinstance(values, (str, dict)):
+        return None
+
+    values = np.asarray(values)
+
+    if values.ndim not in (1, 2) or values.size == 0:
+        return None
+
+    if values.dtype.kind == "O":
+        if values.ndim != 1 or pd.api.types.infer_dtype(
+            values,
+            skipna=False,
+        ) not in (
+            "datetime",
+            "datetime64",
+        ):
+            return None
+
+        values = pd.to_datetime(values).values
+
+    if values.dtype.kind == "M":
+        dtype, values = "i8", values.astype("datetime64[ms]").view(np.int64)
+
+    elif values.dtype.kind == "f":
+        dtype = dtype_float
+
+    elif values.dtype.kind in "iu":
+        dtype = (
+            "i4"
+            if np.abs(values).max() <= TYPED_ARRAYS_INT32_MAX
+            else "f8"
+        )
+
+    else:
+        return None
+
+    encoded = {
+        "dtype": dtype,
+        "bdata": base64.b64encode(
+            values.astype(f"<{dtype}").tobytes()
+        ).decode("ascii"),
+    }
+
+    if values.ndim == 2:
+        encoded["shape"] = ", ".join(str(_) for _ in values.shape)
+
+    return encoded
+
+
+def encode_typed_arrays(
+    fig: Figure,
+) -> dict:
+    """Encode the data arrays of the figure as typed arrays.
+
+    See `TYPED_ARRAYS_ATTRIBUTES`, and the marker colors.
+    Floats are float64 in `TYPED_ARRAYS_ATTRIBUTES_TIME`, float32 otherwise.
+
+    Parameters
+    ----------
+    fig : Figure
+        Figure to encode.
+
+    Returns
+    -------
+    dict
+        Figure spec with the encoded arrays.
+
+    """
+    fig_dict = fig.to_dict()
+
+    for _trace in fig_dict["data"]:
+        for _parent, _attribute in (
+            *(
+                (_trace, _)
+                for _ in TYPED_ARRAYS_ATTRIBUTES
+            ),
+            (_trace.get("marker", {}), "color"),
+        ):
+            if _attribute not in _parent:
+                continue
+
+            _encoded = encode_typed_array(
+                _parent[_attribute],
+                dtype_float=(
+                    "f8"
+                    if (
+                        _parent is _trace
+                        and _attribute in TYPED_ARRAYS_ATTRIBUTES_TIME
+                    )
+                    else "f4"
+                ),
+            )
+
+            if _encoded is not None:
+                _parent[_attribute] = _encoded
+
+    return fig_dict
+
+
+def to_json_typed_arrays(
+    fig: Figure,
+) -> str:
+    return pio.json.to_json_plotly(
+        encode_typed_arrays(fig),
+        pretty=False,
+    )
+
+
+def write_json_typed_arrays(
+    fig: Figure,
+    path_output: Union[str, Path],
+) -> None:
+    """Write the compact figure spec with typed arrays.
+
+    Typed arrays are in the same format as newer versions of plotly,
+    int64 dates aside, see `TYPED_ARRAYS_DECODER_JS`.
+
+    """
+    with open(path_output, "w") as f:
+        f.write(to_json_typed_arrays(fig))
+
+
+def write_html_typed_arrays(
+    fig: Figure,
+    path_output: Union[str, Path],
+    include_plotlyjs: Union[bool, str] = True,
+) -> None:
+    """Write the figure as HTML with typed arrays.
+
+    The figure is embedded with typed arrays,
+    decoded and plotted in the browser once plotly.js is loaded.
+
+    Parameters
+    ----------
+    fig : Figure
+        Figure to write.
+    path_output : str or Path
+        Path of the output HTML file.
+    include_plotlyjs : bool or str
+        How plotly.js is included, see `plotly.io.write_html`.
+
+    """
+    # Escaping closing tags in the script
+    _figure_json = to_json_typed_arrays(fig).replace("</", "<\\/")
+
+    # Empty placeholder, without the default template,
+    # replaced by the figure once decoded
+    pio.write_html(
+        {"data": [], "layout": {}},
+        path_output,
+        validate=False,
+        include_plotlyjs=include_plotlyjs,
+        full_html=True,
+        post_script=(
+            TYPED_ARRAYS_DECODER_JS
+            + "Plotly.react("
+            + "document.getElementById('{plot_id}'), "
+            + f"decodeTypedArrays({_figure_json})"
+            + ");"
+        ),
+    )
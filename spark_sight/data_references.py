@@ -6,9 +6,15 @@ COL_STAGE_ASOFTASKS_DATE_END = "date_end__stage_asoftasks"
 COL_SUBSTAGE_DATE_START = "date_start__substage"
 COL_SUBSTAGE_DATE_END = "date_end__substage"
 COL_SUBSTAGE_DATE_INTERVAL = "date__substage_interval"
+COL_SUBSTAGE_INDEX = "index__substage"
 COL_SUBSTAGE_DURATION = "duration__substage"
 COL_STAGE_DATE_START = "date_start__stage"
 COL_STAGE_DATE_END = "date_end__stage"
 COL_STAGE_DURATION = "duration__stage"
 COL_SPLIT_BORDERS_LIST = "id_task__border"
+COL_TASK_SPLIT = "split__task"
 COL_ID_EXECUTOR = "id_executor"
+COL_CONCURRENCY_DATE = "date__concurrency"
+COL_CONCURRENCY_TASKS = "tasks__concurrency"
+EVENT_TASK_END = "SparkListenerTaskEnd"
+EVENT_STAGE_COMPLETED = "SparkListenerStageCompleted"
@@ -1,25 +1,34 @@
 from plotly.graph_objs import Figure
 
 import argparse
-import json
 import logging
 import os.path
 import sys
+import time
 import warnings
-from json import JSONDecodeError
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Tuple
 
+import numpy as np
+import pandas as pd
 from plotly.graph_objs import Figure
 from plotly.subplots import make_subplots
 
 from spark_sight.create_charts.parsing_spark_history_server import (
     create_chart_efficiency,
+    create_chart_concurrency,
     create_chart_stages,
     assign_y_to_stages,
     create_chart_spill,
 )
+from spark_sight.create_charts.typed_arrays import (
+    write_html_typed_arrays,
+    write_json_typed_arrays,
+)
 from spark_sight.data_references import (
     COL_ID_EXECUTOR,
+    COL_CONCURRENCY_DATE,
 )
 from spark_sight.data_references import (
     COL_ID_STAGE,
@@ -28,17 +37,54 @@ from spark_sight.data_references import (
     COL_SUBSTAGE_DURATION,
     COL_STAGE_DATE_START,
     COL_STAGE_DATE_END,
-    COL_SUBSTAGE_DATE_INTERVAL,
 )
 from spark_sight.log_parse.main import (
-    extract_task_info,
+    extract_event_log_info,
+    index_event_stages,
+    log_lines_fallback,
+    TASK_METRICS,
+    TASK_EXTRACTION_FULL,
+    TASK_EXTRACTION_TARGETED,
+)
+from spark_sight.log_parse.decoder import (
+    check_json_decoder,
+    get_json_decoder,
+    JSON_DECODER_AUTO,
+    JSON_DECODERS,
+)
+from spark_sight.log_parse.compression import (
+    CodecNotSupportedError,
+    detect_codec,
+)
+from spark_sight.log_parse.read import (
+    iter_event_log_lines,
+    list_event_log_files,
+    split_event_log_ranges,
+    log_progress,
+    EVENT_TYPES_EXTRACTED,
+    PROGRESS_LOG_PERCENTAGES,
 )
 from spark_sight.log_transform.main import \
     (
     determine_borders_of_stages_asoftasks,
     split_on_borders,
-    aggregate_tasks_in_substages,
+    split_on_borders_vectorized,
+    check_split_engine,
+    convert_time_columns,
+    discard_split_tasks,
+    from_time_ns,
+    aggregate_tasks_in_substages_indexed,
+    aggregate_tasks_in_buckets,
+    determine_borders_of_buckets,
+    parse_resolution,
+    parse_duration,
+    coarsen_borders,
     create_duration_stage,
+    create_task_concurrency,
+    RESOLUTION_STAGES,
+    SUBSTAGES_MAX,
+    SPLIT_ENGINE_ITERATIVE,
+    SPLIT_ENGINE_VECTORIZED,
 )
 
 
@@ -79,6 +125,118 @@ DEPLOY_MODE_MAP_OUTPUT = {
 }
 
 
+# Figure output formats, by file extension
+OUTPUT_FORMAT_HTML = ".html"
+OUTPUT_FORMAT_JSON = ".json"
+
+# How the HTML output includes plotly.js:
+# inline, from the CDN, or from a plotly.min.js file
+# in the output directory, shared by the HTML outputs in it
+PLOTLYJS_INLINE = "inline"
+PLOTLYJS_CDN = "cdn"
+PLOTLYJS_DIRECTORY = "directory"
+PLOTLYJS_MAP_INCLUDE = {
+    PLOTLYJS_INLINE: True,
+    PLOTLYJS_CDN: "cdn",
+    PLOTLYJS_DIRECTORY: "directory",
+}
+
+
+# Rendering of the efficiency and spill charts:
+# SVG bars, or WebGL areas and heatmap,
+# automatically WebGL above a number of bars
+RENDER_AUTO = "auto"
+RENDER_SVG = "svg"
+RENDER_WEBGL = "webgl"
+RENDER_WEBGL_BARS_MIN = 20_000
+
+
+def check_render(
+    render: str,
+) -> None:
+    if render not in (
+        RENDER_AUTO,
+        RENDER_SVG,
+        RENDER_WEBGL,
+    ):
+        raise ValueError(
+            f"Invalid render: {render}"
+        )
+
+
+def check_output(
+    path_output: str,
+) -> None:
+    if Path(path_output).suffix.lower() not in (
+        OUTPUT_FORMAT_HTML,
+        OUTPUT_FORMAT_JSON,
+    ):
+        raise ValueError(
+            f"Invalid output format: {path_output}"
+            f", expected {OUTPUT_FORMAT_HTML} or {OUTPUT_FORMAT_JSON}"
+        )
+
+
+def export_figure(
+    fig: Figure,
+    path_output: str,
+    plotlyjs: str = PLOTLYJS_DIRECTORY,
+    binary_arrays: bool = False,
+) -> None:
+    """Write the figure to a file, without opening it.
+    
+    Parameters
+    ----------
+    fig : Figure
+        Figure to write.
+    path_output : str
+        Path of the output file, either HTML or JSON by extension.
+        JSON is the compact figure spec, without plotly.js.
+    plotlyjs : str
+        How the HTML output includes plotly.js, see `PLOTLYJS_MAP_INCLUDE`.
+    binary_arrays : bool
+        Whether to write the data arrays as base64-encoded typed arrays,
+        see `encode_typed_arrays`.
+
+    """
+    check_output(path_output)
+    
+    if plotlyjs not in PLOTLYJS_MAP_INCLUDE:
+        raise ValueError(
+            f"Invalid plotly.js inclusion: {plotlyjs}"
+        )
+    
+    path_output = Path(path_output)
+    path_output.parent.mkdir(parents=True, exist_ok=True)
+    
+    if path_output.suffix.lower() == OUTPUT_FORMAT_JSON:
+        if binary_arrays:
+            write_json_typed_arrays(
+                fig,
+                path_output,
+            )
+        
+        else:
+            fig.write_json(
+                path_output,
+                pretty=False,
+            )
+    
+    elif binary_arrays:
+        write_html_typed_arrays(
+            fig,
+            path_output,
+            include_plotlyjs=PLOTLYJS_MAP_INCLUDE[plotlyjs],
+        )
+    
+    else:
+        fig.write_html(
+            path_output,
+            include_plotlyjs=PLOTLYJS_MAP_INCLUDE[plotlyjs],
+            full_html=True,
+        )
+
+
 def determine_cpus_available(
     cpus: int,
     deploy_mode: str,
@@ -117,8 +275,8 @@ def update_layout(
 ):
     _id_executor_max = id_executor_max + 1
     LAYOUT_EFFICIENCY_ROW = 1
-    LAYOUT_TIMELINE_SPILL_ROW = 2
-    LAYOUT_TIMELINE_STAGES_ROW = 3
+    LAYOUT_TIMELINE_SPILL_ROW = 3
+    LAYOUT_TIMELINE_STAGES_ROW = 4
     
     _margin = 50
     
@@ -212,37 +370,63 @@ def create_figure(
     df_fig_spill,
     cpus_available: int,
     app_info: dict,
+    df_fig_concurrency: pd.DataFrame = None,
+    stage_lanes_max: int = None,
+    render: str = RENDER_AUTO,
 ):
+    check_render(render)
+    
     _charts_share_timeline = 0.2
     _charts_share_spill = 0.2
-    _charts_share_efficiency = 0.6
+    _charts_share_concurrency = 0.1
+    _charts_share_efficiency = 0.5
     assert 1 == sum(
         [
             _charts_share_timeline,
             _charts_share_spill,
+            _charts_share_concurrency,
             _charts_share_efficiency,
         ]
     )
     
     fig = make_subplots(
-        rows=3,
+        rows=4,
         shared_xaxes=True,
         vertical_spacing=0.02,
         row_width=[
             _charts_share_timeline,
             _charts_share_spill,
+            _charts_share_concurrency,
             _charts_share_efficiency,
         ],
     )
     
+    _bars = (
+        len(df_fig_efficiency)
+        * df_fig_efficiency.columns.str.startswith("efficiency__").sum()
+        + (df_fig_spill["memory_spill_disk"] > 0).sum()
+    )
+    
+    webgl = (
+        render == RENDER_WEBGL
+        or (render == RENDER_AUTO and _bars > RENDER_WEBGL_BARS_MIN)
+    )
+    
+    if webgl:
+        logging.debug(f"Rendering {_bars} bars with WebGL")
+    
     create_chart_efficiency(
         df_fig_efficiency,
         fig,
         cpus_available=cpus_available,
+        webgl=webgl,
     )
     
-    stages_y = assign_y_to_stages(df_fig_timeline_stage)
-    df_fig_timeline_stage.loc[:, "y"] = df_fig_timeline_stage[COL_ID_STAGE].astype(str).replace(
+    stages_y = assign_y_to_stages(
+        df_fig_timeline_stage,
+        lanes_max=stage_lanes_max,
+    )
+    df_fig_timeline_stage.loc[:, "y"] = df_fig_timeline_stage[COL_ID_STAGE].astype(str).map(
         stages_y
     )
     
@@ -279,21 +463,37 @@ def create_figure(
         df_fig_spill,
         fig,
         col_y=COL_ID_EXECUTOR,
-        row=2,
-        # Color is discarded because trace is extracted from plotly.express
-        px_timeline_color_kwargs=dict(
-            color="memory_spill_disk",
-        ),
+        row=3,
+        col_color="memory_spill_disk",
         app_info=app_info,
+        webgl=webgl,
     )
 
     create_chart_stages(
         df_fig_timeline_stage,
         fig,
         col_y="y",
-        row=3,
+        row=4,
     )
     
+    if df_fig_concurrency is not None:
+        # Exact step function, up to two points per task
+        webgl_concurrency = (
+            render == RENDER_WEBGL
+            or (
+                render == RENDER_AUTO
+                and len(df_fig_concurrency) > RENDER_WEBGL_BARS_MIN
+            )
+        )
+        
+        create_chart_concurrency(
+            df_fig_concurrency,
+            fig,
+            row=2,
+            cpus_available=cpus_available,
+            webgl=webgl_concurrency,
+        )
+    
     update_layout(
         fig,
         id_executor_max=id_executor_max,
@@ -305,81 +505,379 @@ def create_figure(
     return fig
 
 
-def parse_event_log(
+# Below this size per worker, parsing in parallel is not worth the overhead
+EVENT_LOG_RANGE_SIZE_MIN = 32 * 2**20
+
+
+def determine_workers_available() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _extract_event_log_range(
     path_spark_event_log: str,
-):
-    lines_tasks = []
-    lines_stages = []
+    start: int,
+    end: int,
+    json_decoder: str,
+    task_extraction: str,
+    use_mmap: bool,
+) -> Tuple[pd.DataFrame, List[dict], Dict[str, int]]:
+    # Run in the worker processes, progress is logged by the parent process
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    stats = {}
+    
+    (
+        task_info,
+        lines_stages,
+    ) = extract_event_log_info(
+        iter_event_log_lines(
+            path_spark_event_log,
+            event_types=EVENT_TYPES_EXTRACTED,
+            start=start,
+            end=end,
+            use_mmap=use_mmap,
+        ),
+        task_extraction=task_extraction,
+        json_decoder=json_decoder,
+        stats=stats,
+    )
+    
+    return (
+        task_info,
+        lines_stages,
+        stats,
+    )
+
+
+def extract_event_log(
+    path_spark_event_log: str,
+    json_decoder: str = None,
+    task_extraction: str = TASK_EXTRACTION_TARGETED,
+    workers: int = None,
+    range_size_min: int = EVENT_LOG_RANGE_SIZE_MIN,
+    use_mmap: bool = True,
+) -> Tuple[pd.DataFrame, List[dict]]:
+    """Extract task information and stage events from the Spark event log.
+    
+    The Spark event log is streamed from file to task table,
+    without retaining the decoded lines.
+    
+    With more than one worker, the Spark event log is split
+    into byte ranges aligned to lines, which are extracted
+    in a process pool and then concatenated.
+    Compressed Spark event logs are extracted as a single range.
+    
+    A rolling Spark event log directory is extracted
+    as the concatenation of its files, see `list_event_log_files`.
+    
+    Parameters
+    ----------
+    path_spark_event_log : str
+        Path to the Spark event log,
+        or to the rolling Spark event log directory.
+    json_decoder : str, optional
+        JSON decoder backend.
+    task_extraction : str
+        Whether to extract task fields from the decoded lines (full),
+        or straight from the raw lines (targeted).
+    workers : int, optional
+        Number of worker processes.
+        Defaults to the number of available CPU cores.
+    range_size_min : int
+        Minimum size in bytes of the range extracted by each worker.
+    use_mmap : bool
+        Whether to read over a memory map of the file,
+        shared by the workers through the page cache.
+
+    Returns
+    -------
+    pd.DataFrame
+        Task information.
+    list of dict
+        Stage events, reduced.
 
+    """
     _log_root = "Parsing Spark event log"
     
-    try:
-        _file = open(
-            path_spark_event_log,
-            "r",
+    if workers is None:
+        workers = determine_workers_available()
+    
+    if os.path.isdir(path_spark_event_log):
+        paths = list_event_log_files(path_spark_event_log)
+        
+        logging.info(
+            f"{_log_root}: {len(paths)} files"
+            f" in rolling Spark event log"
         )
-        _file_lines = sum(1.0 for _ in _file)
-    finally:
-        _file.close()
+    else:
+        paths = [path_spark_event_log]
+    
+    _file_size = 0
+    ranges = []
+    
+    for _path in paths:
+        _path_size = os.path.getsize(_path)
+        _file_size += _path_size
+        
+        # Compressed streams cannot be split into byte ranges
+        if detect_codec(_path) is not None:
+            ranges.append((_path, 0, _path_size))
+            continue
+        
+        ranges.extend(
+            (_path, _start, _end)
+            for _start, _end in split_event_log_ranges(
+                _path,
+                ranges=max(
+                    1,
+                    min(
+                        workers,
+                        _path_size // range_size_min,
+                    ),
+                ),
+            )
+        )
+    
+    if len(ranges) == 1:
+        return extract_event_log_info(
+            iter_event_log_lines(
+                ranges[0][0],
+                event_types=EVENT_TYPES_EXTRACTED,
+                log_root=_log_root,
+                use_mmap=use_mmap,
+            ),
+            task_extraction=task_extraction,
+            json_decoder=json_decoder,
+        )
+    
+    (
+        json_decoder,
+        _,
+    ) = get_json_decoder(json_decoder)
+    
+    logging.info(
+        f"{_log_root}: {len(ranges)} ranges"
+        f" on {workers} workers"
+    )
+    
+    results = [None] * len(ranges)
+    stats = {}
     
-    _perc_log_dict = [0.25, 0.5, 0.75]
     _perc_log_index = 0
+    _bytes_read = 0
+    _time_start = time.perf_counter()
     
-    with open(
-        path_spark_event_log,
-        "r",
-    ) as _file:
+    with ProcessPoolExecutor(
+        max_workers=min(
+            workers,
+            len(ranges),
+        ),
+    ) as executor:
+        futures = {
+            executor.submit(
+                _extract_event_log_range,
+                _path,
+                _start,
+                _end,
+                json_decoder,
+                task_extraction,
+                use_mmap,
+            ): _range_index
+            for _range_index, (_path, _start, _end) in enumerate(ranges)
+        }
         
-        for _line_index, _line in enumerate(_file):
-            try:
-                _line = json.loads(_line)
-                
-                if _line["Event"] == "SparkListenerStageCompleted":
-                    lines_stages.append(_line)
-                elif _line["Event"] == "SparkListenerTaskEnd":
-                    lines_tasks.append(_line)
-            except JSONDecodeError as e:
-                logging.debug(f"Invalid line : {_line}")
+        for future in as_completed(futures):
+            _range_index = futures[future]
+            results[_range_index] = future.result()
+            
+            for _stat, _value in results[_range_index][2].items():
+                stats[_stat] = stats.get(_stat, 0) + _value
+            
+            _, _start, _end = ranges[_range_index]
+            _bytes_read += _end - _start
             
-            _perc = float(_line_index) / _file_lines
-            if (
-                _perc_log_index in range(len(_perc_log_dict))
-                and _perc > _perc_log_dict[_perc_log_index]
+            while (
+                _perc_log_index < len(PROGRESS_LOG_PERCENTAGES)
+                and _bytes_read > (
+                    _file_size * PROGRESS_LOG_PERCENTAGES[_perc_log_index]
+                )
             ):
-                logging.info(
-                    f"{_log_root}: "
-                    f"{_perc_log_dict[_perc_log_index] * 100:.0f}%"
+                log_progress(
+                    _log_root,
+                    perc=PROGRESS_LOG_PERCENTAGES[_perc_log_index],
+                    lines_read=stats["lines"],
+                    bytes_read=_bytes_read,
+                    time_start=_time_start,
                 )
                 _perc_log_index += 1
     
+    if task_extraction == TASK_EXTRACTION_TARGETED:
+        log_lines_fallback(
+            _log_root,
+            lines_fallback=stats["lines_fallback"],
+            lines_targeted=stats["lines_targeted"],
+        )
+    
+    task_info = pd.concat(
+        [
+            _task_info
+            for _task_info, _, _ in results
+        ],
+        ignore_index=True,
+    )
+    
+    lines_stages = [
+        _stage
+        for _, _lines_stages, _ in results
+        for _stage in _lines_stages
+    ]
+    
     return (
-        lines_tasks,
+        task_info,
         lines_stages,
     )
 
 
-def create_df_fig_efficiency(
-    task_info,
-    cpus_available,
-    borders_of_stages_asoftasks,
-):
-    metrics = [
-        "duration_cpu_usage",
-        "duration_cpu_overhead_serde",
-        "duration_cpu_overhead_shuffle",
-    ]
+# Metrics of the task information aggregated by each chart
+METRICS_EFFICIENCY = [
+    "duration_cpu_usage",
+    "duration_cpu_overhead_serde",
+    "duration_cpu_overhead_shuffle",
+]
+METRICS_SPILL = [
+    "memory_spill_disk",
+]
+
 
-    task_info_split = split_on_borders(
+def split_tasks_on_borders(
+    task_info: pd.DataFrame,
+    borders_of_stages_asoftasks: np.ndarray,
+    metrics: List[str] = None,
+    split_engine: str = SPLIT_ENGINE_VECTORIZED,
+) -> pd.DataFrame:
+    """Split tasks on the borders of stages, once for all charts.
+    
+    All the task metrics are split together,
+    so that each chart is derived from the same split task information,
+    see `discard_split_tasks`.
+    
+    Parameters
+    ----------
+    task_info : pd.DataFrame
+        Task information.
+    borders_of_stages_asoftasks : np.ndarray
+        Borders of stages as of tasks, as int64 ns.
+    metrics : list of str, optional
+        Metrics to split.
+        Defaults to all the task metrics.
+    split_engine : str
+        Whether to split on all the borders at once (vectorized),
+        or one border at a time (iterative).
+
+    Returns
+    -------
+    pd.DataFrame
+        Task information split on the borders of stages.
+
+    """
+    check_split_engine(split_engine)
+    
+    if metrics is None:
+        metrics = TASK_METRICS
+    
+    if split_engine == SPLIT_ENGINE_ITERATIVE:
+        # Splits on datetimes
+        return convert_time_columns(
+            split_on_borders(
+                convert_time_columns(task_info, to_datetime=True),
+                borders_all=list(from_time_ns(borders_of_stages_asoftasks)),
+                metrics=metrics,
+            ),
+            to_datetime=False,
+        )
+    
+    return split_on_borders_vectorized(
         task_info,
         borders_all=borders_of_stages_asoftasks,
         metrics=metrics,
     )
+
+
+def convert_substage_dates_to_datetime(
+    df: pd.DataFrame,
+) -> None:
+    # Times are int64 ns up to the charts
+    for _col in (
+        COL_SUBSTAGE_DATE_START,
+        COL_SUBSTAGE_DATE_END,
+    ):
+        df[_col] = from_time_ns(df[_col])
+
+
+def aggregate_tasks(
+    task_info: pd.DataFrame,
+    borders_all: np.ndarray,
+    metrics: List[str],
+    cols_groupby: List[str] = (),
+    bucketed: bool = False,
+) -> pd.DataFrame:
+    """Aggregate task metrics within the substages.
+    
+    Parameters
+    ----------
+    task_info : pd.DataFrame
+        Task information, split on the borders unless bucketed.
+    borders_all : np.ndarray
+        Borders of the substages, as int64 ns.
+    metrics : list of str
+        Metrics to aggregate.
+    cols_groupby : list of str
+        Columns to group by, besides the substage.
+    bucketed : bool
+        Whether the substages are time buckets of fixed width,
+        see `aggregate_tasks_in_buckets`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Aggregate information regarding tasks in substages.
+
+    """
+    if bucketed:
+        return aggregate_tasks_in_buckets(
+            task_info,
+            borders_all=borders_all,
+            metrics=metrics,
+            cols_groupby=cols_groupby,
+        )
+    
+    return aggregate_tasks_in_substages_indexed(
+        discard_split_tasks(
+            task_info,
+            metrics=metrics,
+        ),
+        borders_all=borders_all,
+        metrics=metrics,
+        cols_groupby=cols_groupby,
+    )
+
+
+def create_df_fig_efficiency(
+    task_info_split,
+    cpus_available,
+    borders_of_stages_asoftasks,
+    bucketed: bool = False,
+):
+    metrics = METRICS_EFFICIENCY
     
-    task_grouped = aggregate_tasks_in_substages(
+    task_grouped = aggregate_tasks(
         task_info_split,
         borders_all=borders_of_stages_asoftasks,
         metrics=metrics,
-        cols_groupby=[COL_SUBSTAGE_DATE_INTERVAL],
+        bucketed=bucketed,
     )
     
     task_grouped.loc[:, "duration_agg_cpu_available"] = (
@@ -398,6 +896,8 @@ def create_df_fig_efficiency(
         / float(1e9)
     )
     
+    convert_substage_dates_to_datetime(task_grouped)
+    
     df_fig_efficiency = task_grouped[
         [
             COL_SUBSTAGE_DATE_START,
@@ -416,27 +916,18 @@ def create_df_fig_efficiency(
 
 
 def create_df_fig_spill(
-    task_info,
+    task_info_split,
     borders_of_stages_asoftasks,
+    bucketed: bool = False,
 ):
-    metrics = [
-        "memory_spill_disk",
-    ]
-    
-    task_info_split = split_on_borders(
-        task_info,
-        borders_all=borders_of_stages_asoftasks,
-        metrics=metrics,
-    )
+    metrics = METRICS_SPILL
     
-    task_grouped = aggregate_tasks_in_substages(
+    task_grouped = aggregate_tasks(
         task_info_split,
         borders_all=borders_of_stages_asoftasks,
         metrics=metrics,
-        cols_groupby=[
-            COL_ID_EXECUTOR,
-            COL_SUBSTAGE_DATE_INTERVAL,
-        ]
+        cols_groupby=[COL_ID_EXECUTOR],
+        bucketed=bucketed,
     )
     
     task_grouped.loc[:, COL_SUBSTAGE_DURATION] = (
@@ -444,27 +935,73 @@ def create_df_fig_spill(
         / float(1e9)
     )
     
+    convert_substage_dates_to_datetime(task_grouped)
+    
     return task_grouped
 
 
+def create_df_fig_concurrency(
+    task_info,
+):
+    df_fig_concurrency = create_task_concurrency(task_info)
+    
+    df_fig_concurrency[COL_CONCURRENCY_DATE] = from_time_ns(
+        df_fig_concurrency[COL_CONCURRENCY_DATE]
+    )
+    
+    return df_fig_concurrency
+
+
 def _main(
     path_spark_event_log,
     cpus: int,
     deploy_mode: str = DEPLOY_MODE_CLUSTER,
+    json_decoder: str = None,
+    task_extraction: str = TASK_EXTRACTION_TARGETED,
+    workers: int = None,
+    use_mmap: bool = True,
+    split_engine: str = SPLIT_ENGINE_VECTORIZED,
+    resolution: str = RESOLUTION_STAGES,
+    substages_max: int = None,
+    substage_width_min: str = None,
+    stage_lanes_max: int = None,
+    render: str = RENDER_AUTO,
 ):
+    check_json_decoder(json_decoder)
+    
     _log_root = "Parsing Spark event log"
     logging.info(f"{_log_root}...")
     
-    (
-        lines_tasks,
-        lines_stages,
-    ) = parse_event_log(
-        path_spark_event_log,
-    )
+    try:
+        (
+            task_info,
+            lines_stages,
+        ) = extract_event_log(
+            path_spark_event_log,
+            json_decoder=json_decoder,
+            task_extraction=task_extraction,
+            workers=workers,
+            use_mmap=use_mmap,
+        )
+        
+    # Missing packages and unsupported codecs are not invalid content
+    except (ImportError, CodecNotSupportedError) as e:
+        logging.critical(f"{e}\n")
+        
+        return
+    
+    # Decoding errors are subclasses of ValueError, see `get_json_decoder`,
+    # truncated compressed streams raise EOFError
+    except (ValueError, KeyError, EOFError):
+        logging.critical(
+            compose_str_exception_file_invalid_content(path_spark_event_log)
+        )
+        
+        return
 
     logging.info(f"{_log_root}: done\n")
     
-    if len(lines_tasks) == 0 or len(lines_stages) == 0:
+    if len(task_info) == 0 or len(lines_stages) == 0:
         logging.critical(
             compose_str_exception_file_invalid_content(
                 path_spark_event_log
@@ -473,28 +1010,7 @@ def _main(
     
         return
     
-    try:
-        stage_ids_completed = set(
-            _["Stage Info"]["Stage ID"]
-            for _ in lines_stages
-            if _["Event"] == "SparkListenerStageCompleted"
-        )
-        
-        _log_root = "Extracting task information from Spark event log"
-        logging.info(f"{_log_root}...")
-        
-        task_info = extract_task_info(
-            lines_tasks=lines_tasks,
-        )
-        
-        logging.info(f"{_log_root}: done\n")
-        
-    except Exception:
-        logging.critical(
-            compose_str_exception_file_invalid_content(path_spark_event_log)
-        )
-        
-        return
+    stage_index = index_event_stages(lines_stages)
 
     _log_root = "Computing CPU cores available for tasks"
     logging.info(f"{_log_root}...")
@@ -506,22 +1022,76 @@ def _main(
     
     logging.info(f"{_log_root}: done\n")
     
-    _log_root = "Determining borders of stages"
-    logging.info(f"{_log_root}...")
+    resolution_width = parse_resolution(resolution)
+    bucketed = resolution_width is not None
     
-    borders_of_stages_asoftasks = determine_borders_of_stages_asoftasks(
-        task_info,
+    substage_width_min_ns = (
+        None
+        if substage_width_min is None
+        else parse_duration(substage_width_min)
     )
     
-    logging.info(f"{_log_root}: done\n")
+    if not bucketed:
+        _log_root = "Determining borders of stages"
+        logging.info(f"{_log_root}...")
+        
+        borders_all = determine_borders_of_stages_asoftasks(
+            task_info,
+        )
+        
+        borders_all = coarsen_borders(
+            borders_all,
+            substages_max=(
+                SUBSTAGES_MAX
+                if substages_max is None
+                else substages_max
+            ),
+            width_min=substage_width_min_ns,
+        )
+        
+        logging.info(f"{_log_root}: {len(borders_all) - 1} substages\n")
+        
+        _log_root = "Splitting tasks on borders of stages"
+        logging.info(f"{_log_root}...")
+        
+        task_info_split = split_tasks_on_borders(
+            task_info,
+            borders_of_stages_asoftasks=borders_all,
+            split_engine=split_engine,
+        )
+        
+        logging.info(f"{_log_root}: done\n")
+    
+    else:
+        _log_root = "Determining borders of time buckets"
+        logging.info(f"{_log_root}...")
+        
+        # A width given explicitly is only widened
+        # within the maximum number of substages given explicitly
+        if substages_max is None and resolution_width == 0:
+            substages_max = SUBSTAGES_MAX
+        
+        # Buckets are widened instead of coarsened, to stay even
+        borders_all = determine_borders_of_buckets(
+            task_info,
+            width=resolution_width,
+            buckets_max=substages_max,
+            width_min=substage_width_min_ns,
+        )
+        
+        # Tasks are prorated in the buckets without splitting
+        task_info_split = task_info
+        
+        logging.info(f"{_log_root}: {len(borders_all) - 1} buckets\n")
     
     _log_root = "Creating chart of task efficiency"
     logging.info(f"{_log_root}...")
     
     df_fig_efficiency = create_df_fig_efficiency(
-        task_info,
+        task_info_split,
         cpus_available,
-        borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+        borders_of_stages_asoftasks=borders_all,
+        bucketed=bucketed,
     )
     
     logging.info(f"{_log_root}: done\n")
@@ -530,8 +1100,9 @@ def _main(
     logging.info(f"{_log_root}...")
     
     df_fig_spill = create_df_fig_spill(
-        task_info,
-        borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+        task_info_split,
+        borders_of_stages_asoftasks=borders_all,
+        bucketed=bucketed,
     )
     
     df_fig_spill.loc[:, COL_ID_EXECUTOR] = (
@@ -540,13 +1111,21 @@ def _main(
 
     logging.info(f"{_log_root}: done\n")
     
+    _log_root = "Creating chart of concurrent tasks"
+    logging.info(f"{_log_root}...")
+    
+    df_fig_concurrency = create_df_fig_concurrency(
+        task_info,
+    )
+    
+    logging.info(f"{_log_root}: done\n")
+    
     _log_root = "Creating chart of stage timeline"
     logging.info(f"{_log_root}...")
     
     df_fig_timeline_stage = (
         create_duration_stage(
-            lines_stages,
-            stage_ids_completed,
+            stage_index,
         )
         .rename(
             columns={
@@ -588,6 +1167,9 @@ def _main(
         df_fig_spill,
         cpus_available=cpus_available,
         app_info=app_info,
+        df_fig_concurrency=df_fig_concurrency,
+        stage_lanes_max=stage_lanes_max,
+        render=render,
     )
 
 
@@ -595,10 +1177,41 @@ def main(
     path_spark_event_log: str,
     cpus: int,
     deploy_mode: str = None,
+    json_decoder: str = None,
+    task_extraction: str = None,
+    workers: int = None,
+    use_mmap: bool = True,
+    split_engine: str = None,
+    resolution: str = None,
+    substages_max: int = None,
+    substage_width_min: str = None,
+    stage_lanes_max: int = None,
+    output: str = None,
+    plotlyjs: str = None,
+    binary_arrays: bool = False,
+    render: str = None,
 ):
     if deploy_mode is None:
         deploy_mode = DEPLOY_MODE_CLUSTER
     
+    if task_extraction is None:
+        task_extraction = TASK_EXTRACTION_TARGETED
+    
+    if split_engine is None:
+        split_engine = SPLIT_ENGINE_VECTORIZED
+    
+    if resolution is None:
+        resolution = RESOLUTION_STAGES
+    
+    if plotlyjs is None:
+        plotlyjs = PLOTLYJS_DIRECTORY
+    
+    if render is None:
+        render = RENDER_AUTO
+    
+    if output is not None:
+        check_output(output)
+    
     _path_spark_event_log = Path(path_spark_event_log)
     
     if not os.path.exists(_path_spark_event_log):
@@ -611,6 +1224,19 @@ def main(
         
         return
     
+    if (
+        os.path.isdir(_path_spark_event_log)
+        and len(list_event_log_files(_path_spark_event_log)) == 0
+    ):
+        logging.critical(
+            f"The provided path \n{path_spark_event_log}\n"
+            "is a directory without Spark event log files."
+            "\nPlease provide a valid rolling Spark event log directory"
+            " eventlog_v2_<appId>.\n"
+        )
+        
+        return
+    
     if os.path.getsize(_path_spark_event_log) == 0:
         logging.critical(
             f"The provided path \n{path_spark_event_log}\n"
@@ -624,9 +1250,35 @@ def main(
         path_spark_event_log=Path(path_spark_event_log),
         cpus=cpus,
         deploy_mode=deploy_mode,
+        json_decoder=json_decoder,
+        task_extraction=task_extraction,
+        workers=workers,
+        use_mmap=use_mmap,
+        split_engine=split_engine,
+        resolution=resolution,
+        substages_max=substages_max,
+        substage_width_min=substage_width_min,
+        stage_lanes_max=stage_lanes_max,
+        render=render,
     )
     
-    if fig is not None:
+    if fig is None:
+        return
+    
+    if output is not None:
+        _log_root = f"Writing figure to {output}"
+        logging.info(f"{_log_root}...")
+        
+        export_figure(
+            fig,
+            output,
+            plotlyjs=plotlyjs,
+            binary_arrays=binary_arrays,
+        )
+        
+        logging.info(f"{_log_root}: done\n")
+    
+    else:
         logging.info("Showing figure...")
         fig.show()
         logging.info("Showing figure: done\n")
@@ -641,6 +1293,30 @@ def cli_check_positive(value):
     return value_int
 
 
+def cli_check_resolution(value):
+    try:
+        parse_resolution(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def cli_check_duration(value):
+    try:
+        parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def cli_check_output(value):
+    try:
+        check_output(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
 def main_cli():
     logging.info("")
     
@@ -667,7 +1343,11 @@ def main_cli():
     parser.add_argument(
         "--path",
         metavar="path",
-        help="Local path to the Spark event log",
+        help=(
+            "Local path to the Spark event log"
+            ", possibly compressed with gzip, bz2, lz4, zstd, snappy"
+            ", or to the rolling Spark event log directory eventlog_v2_<appId>"
+        ),
         dest="path_spark_event_log",
     )
     parser.add_argument(
@@ -692,6 +1372,164 @@ def main_cli():
             DEPLOY_MODE_CLIENT,
         ],
     )
+    parser.add_argument(
+        "--json_decoder",
+        metavar="json_decoder",
+        help=(
+            "JSON decoder to parse the Spark event log with"
+            ". Defaults to the fastest one installed"
+            " among orjson, simdjson, ujson, falling back to json"
+        ),
+        default=JSON_DECODER_AUTO,
+        choices=[
+            JSON_DECODER_AUTO,
+            *JSON_DECODERS,
+        ],
+    )
+    parser.add_argument(
+        "--task_extraction",
+        metavar="task_extraction",
+        help=(
+            "Whether to extract task fields straight from the raw lines"
+            " (targeted), or from the fully decoded lines (full)"
+            ". Defaults to targeted"
+        ),
+        default=TASK_EXTRACTION_TARGETED,
+        choices=[
+            TASK_EXTRACTION_TARGETED,
+            TASK_EXTRACTION_FULL,
+        ],
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="workers",
+        help=(
+            "Number of processes to parse the Spark event log with"
+            ". Defaults to the number of available CPU cores"
+        ),
+        type=cli_check_positive,
+    )
+    parser.add_argument(
+        "--no_mmap",
+        help=(
+            "Read the Spark event log line by line"
+            " instead of memory-mapping it"
+        ),
+        action="store_false",
+        dest="use_mmap",
+    )
+    parser.add_argument(
+        "--split_engine",
+        metavar="split_engine",
+        help=(
+            "Whether to split tasks on stage borders"
+            " all at once (vectorized), or one border at a time (iterative)"
+            ". Defaults to vectorized"
+        ),
+        default=SPLIT_ENGINE_VECTORIZED,
+        choices=[
+            SPLIT_ENGINE_VECTORIZED,
+            SPLIT_ENGINE_ITERATIVE,
+        ],
+    )
+    parser.add_argument(
+        "--resolution",
+        metavar="resolution",
+        help=(
+            "Whether to aggregate tasks between borders of stages (stages)"
+            ", or in time buckets of fixed width, e.g. 1s, 10s"
+            ", or of width bounding the number of buckets (auto)"
+            ". Defaults to stages"
+        ),
+        default=RESOLUTION_STAGES,
+        type=cli_check_resolution,
+    )
+    parser.add_argument(
+        "--substages_max",
+        metavar="substages_max",
+        help=(
+            "Maximum number of substages"
+            ", merging adjacent ones if exceeded"
+            ", or widening the time buckets"
+            f". Defaults to {SUBSTAGES_MAX}"
+            ", except for time buckets of fixed width"
+        ),
+        default=None,
+        type=cli_check_positive,
+    )
+    parser.add_argument(
+        "--substage_width_min",
+        metavar="substage_width_min",
+        help=(
+            "Minimum width of the substages, e.g. 100ms, 1s"
+            ", merging adjacent ones if narrower"
+            ", or widening the time buckets"
+        ),
+        type=cli_check_duration,
+    )
+    parser.add_argument(
+        "--stage_lanes_max",
+        metavar="stage_lanes_max",
+        help=(
+            "Maximum number of lanes of the stage timeline"
+            ", overlapping concurrent stages if exceeded"
+            ". Defaults to as many as the concurrent stages"
+        ),
+        type=cli_check_positive,
+    )
+    parser.add_argument(
+        "--output",
+        metavar="output",
+        help=(
+            "Path to write the figure to instead of showing it"
+            ", as HTML (.html) or as compact JSON figure spec (.json)"
+        ),
+        type=cli_check_output,
+    )
+    parser.add_argument(
+        "--plotlyjs",
+        metavar="plotlyjs",
+        help=(
+            "Whether the HTML output includes plotly.js inline (inline)"
+            ", from the CDN (cdn), or from a plotly.min.js file"
+            " shared in the output directory (directory)"
+            ". Defaults to directory"
+        ),
+        default=PLOTLYJS_DIRECTORY,
+        choices=[
+            PLOTLYJS_DIRECTORY,
+            PLOTLYJS_INLINE,
+            PLOTLYJS_CDN,
+        ],
+    )
+    parser.add_argument(
+        "--binary_arrays",
+        help=(
+            "Write the data arrays of the output"
+            " as base64-encoded typed arrays"
+            ", dates as int64 epoch ms, times as float64"
+            " and other floats as float32"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--render",
+        metavar="render",
+        help=(
+            "Whether to draw the efficiency and spill charts"
+            " as bars (svg), or as WebGL areas and heatmap (webgl)"
+            ", and the concurrency chart as SVG or WebGL line"
+            f", automatically WebGL above {RENDER_WEBGL_BARS_MIN}"
+            " bars or points (auto)"
+            ". Defaults to auto"
+        ),
+        default=RENDER_AUTO,
+        choices=[
+            RENDER_AUTO,
+            RENDER_SVG,
+            RENDER_WEBGL,
+        ],
+    )
     
     main(
         **vars(parser.parse_args()),
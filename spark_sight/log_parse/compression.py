@@ -0,0 +1,333 @@
+import bz2
+import gzip
+import struct
+from importlib import import_module
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+
+CODEC_GZIP = "gzip"
+CODEC_BZ2 = "bz2"
+# Spark codec, block format of `net.jpountz.lz4.LZ4BlockOutputStream`
+CODEC_LZ4 = "lz4"
+# Frame format of the lz4 command line tool
+CODEC_LZ4_FRAME = "lz4_frame"
+CODEC_ZSTD = "zstd"
+# Spark codec, stream format of `org.xerial.snappy.SnappyOutputStream`
+CODEC_SNAPPY = "snappy"
+
+CODEC_EXTENSIONS = {
+    ".gz": CODEC_GZIP,
+    ".gzip": CODEC_GZIP,
+    ".bz2": CODEC_BZ2,
+    ".lz4": CODEC_LZ4,
+    ".zstd": CODEC_ZSTD,
+    ".zst": CODEC_ZSTD,
+    ".snappy": CODEC_SNAPPY,
+}
+
+CODEC_MAGIC = {
+    b"\x1f\x8b": CODEC_GZIP,
+    b"BZh": CODEC_BZ2,
+    b"LZ4Block": CODEC_LZ4,
+    b"\x04\x22\x4d\x18": CODEC_LZ4_FRAME,
+    b"\x28\xb5\x2f\xfd": CODEC_ZSTD,
+    b"\x82SNAPPY\x00": CODEC_SNAPPY,
+}
+
+CODEC_PACKAGE = {
+    CODEC_LZ4: ("lz4.block", "lz4"),
+    CODEC_LZ4_FRAME: ("lz4.frame", "lz4"),
+    CODEC_ZSTD: ("zstandard", "zstandard"),
+    CODEC_SNAPPY: ("snappy", "python-snappy"),
+}
+
+# Suffixes Spark appends to the event log file name after the codec
+EVENT_LOG_SUFFIXES = (
+    ".inprogress",
+    ".compact",
+)
+
+STREAM_CHUNK_SIZE = 2**20
+
+
+class CodecNotSupportedError(ValueError):
+    """Compression codec of the Spark event log is not supported."""
+
+
+def detect_codec(
+    path_spark_event_log,
+) -> Optional[str]:
+    """Detect the compression codec of the Spark event log.
+
+    The codec is detected from the magic bytes at the beginning
+    of the file, falling back to the extension of the file name.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log.
+
+    Returns
+    -------
+    str or None
+        Compression codec, or None if the Spark event log
+        is not compressed.
+
+    """
+    with open(
+        path_spark_event_log,
+        "rb",
+    ) as _file:
+        _head = _file.read(max(len(_magic) for _magic in CODEC_MAGIC))
+
+    for _magic, _codec in CODEC_MAGIC.items():
+        if _head.startswith(_magic):
+            return _codec
+
+    _name = Path(path_spark_event_log).name
+
+    for _suffix in EVENT_LOG_SUFFIXES:
+        if _name.endswith(_suffix):
+            _name = _name[:-len(_suffix)]
+
+    if Path(_name).suffix == ".lzf":
+        raise CodecNotSupportedError(
+            f"Compression codec lzf is not supported: {path_spark_event_log}"
+        )
+
+    return CODEC_EXTENSIONS.get(Path(_name).suffix)
+
+
+def import_codec(
+    codec: str,
+):
+    _module, _package = CODEC_PACKAGE[codec]
+
+    try:
+        return import_module(_module)
+    except ImportError:
+        raise ImportError(
+            f"Compression codec {codec} requires package {_package}"
+            f". Please run: pip install {_package}"
+        )
+
+
+class Lz4BlockReader:
+    """Reader of the lz4 block stream written by Spark.
+
+    Each block has a header of 21 bytes:
+
+    * magic `LZ4Block`
+    * token, the compression method in the high bits
+    * compressed length, int32 little endian
+    * decompressed length, int32 little endian
+    * checksum, int32 little endian
+
+    A block with decompressed length 0 ends the stream,
+    which can be followed by another stream.
+
+    """
+
+    HEADER = struct.Struct("<8sBiii")
+    METHOD_RAW = 0x10
+
+    def __init__(
+        self,
+        file: BinaryIO,
+    ):
+        self._file = file
+        self._lz4_block = import_codec(CODEC_LZ4)
+
+    def read_block(self) -> Optional[bytes]:
+        """Read the next block, decompressed.
+
+        Returns
+        -------
+        bytes or None
+            Decompressed block, or None at the end of the file.
+
+        """
+        _header = self._file.read(self.HEADER.size)
+
+        if len(_header) < self.HEADER.size:
+            return None
+
+        (
+            _magic,
+            _token,
+            _length_compressed,
+            _length,
+            _,
+        ) = self.HEADER.unpack(_header)
+
+        if _magic != b"LZ4Block":
+            raise ValueError(f"Invalid lz4 block magic: {_magic}")
+
+        _data = self._file.read(_length_compressed)
+
+        if _token & 0xF0 == self.METHOD_RAW:
+            return _data
+
+        return self._lz4_block.decompress(
+            _data,
+            uncompressed_size=_length,
+        )
+
+
+class SnappyXerialReader:
+    """Reader of the snappy stream written by Spark.
+
+    The stream has a header of 16 bytes,
+    magic `\\x82SNAPPY\\x00` followed by two version int32,
+    and then chunks of compressed length, int32 big endian,
+    followed by the raw snappy block.
+    The stream can be followed by another stream.
+
+    """
+
+    MAGIC = b"\x82SNAPPY\x00"
+    HEADER_SIZE = 16
+    LENGTH = struct.Struct(">i")
+
+    def __init__(
+        self,
+        file: BinaryIO,
+    ):
+        self._file = file
+        self._snappy = import_codec(CODEC_SNAPPY)
+
+    def read_block(self) -> Optional[bytes]:
+        """Read the next block, decompressed.
+
+        Returns
+        -------
+        bytes or None
+            Decompressed block, or None at the end of the file.
+
+        """
+        _length = self._file.read(self.LENGTH.size)
+
+        if len(_length) < self.LENGTH.size:
+            return None
+
+        if _length == self.MAGIC[:self.LENGTH.size]:
+            _header = _length + self._file.read(
+                self.HEADER_SIZE - self.LENGTH.size
+            )
+
+            if not _header.startswith(self.MAGIC):
+                raise ValueError(f"Invalid snappy header: {_header}")
+
+            return b""
+
+        return self._snappy.uncompress(
+            self._file.read(self.LENGTH.unpack(_length)[0])
+        )
+
+
+def iter_blocks(
+    file: BinaryIO,
+    codec: str,
+) -> Iterator[bytes]:
+    """Decompress the file block by block.
+
+    Parameters
+    ----------
+    file : binary file
+        File compressed with the codec, open for reading.
+    codec : str
+        Compression codec.
+
+    Yields
+    ------
+    bytes
+        Decompressed block.
+
+    """
+    if codec in (
+        CODEC_LZ4,
+        CODEC_SNAPPY,
+    ):
+        _reader = (
+            Lz4BlockReader(file)
+            if codec == CODEC_LZ4
+            else SnappyXerialReader(file)
+        )
+
+        _block = _reader.read_block()
+
+        while _block is not None:
+            yield _block
+            _block = _reader.read_block()
+
+        return
+
+    if codec == CODEC_GZIP:
+        _stream = gzip.GzipFile(fileobj=file)
+    elif codec == CODEC_BZ2:
+        _stream = bz2.BZ2File(file)
+    elif codec == CODEC_LZ4_FRAME:
+        _stream = import_codec(codec).LZ4FrameFile(file)
+    elif codec == CODEC_ZSTD:
+        _stream = (
+            import_codec(codec)
+            .ZstdDecompressor()
+            .stream_reader(
+                file,
+                read_across_frames=True,
+            )
+        )
+    else:
+        raise ValueError(f"Invalid compression codec: {codec}")
+
+    with _stream:
+        _block = _stream.read(STREAM_CHUNK_SIZE)
+
+        while _block:
+            yield _block
+            _block = _stream.read(STREAM_CHUNK_SIZE)
+
+
+def iter_lines_decompressed(
+    file: BinaryIO,
+    codec: str,
+) -> Iterator[bytes]:
+    """Decompress the file line by line.
+
+    Parameters
+    ----------
+    file : binary file
+        File compressed with the codec, open for reading.
+    codec : str
+        Compression codec.
+
+    Yields
+    ------
+    bytes
+        Decompressed line, including the trailing newline.
+
+    """
+    # Pieces of a line spanning multiple blocks
+    _pieces = []
+
+    for _block in iter_blocks(
+        file,
+        codec,
+    ):
+        _lines = _block.split(b"\n")
+
+        if len(_lines) == 1:
+            _pieces.append(_block)
+            continue
+
+        _pieces.append(_lines[0])
+        yield b"".join(_pieces) + b"\n"
+
+        for _line in _lines[1:-1]:
+            yield _line + b"\n"
+
+        _pieces = [_lines[-1]]
+
+    if any(_pieces):
+        yield b"".join(_pieces)
@@ -0,0 +1,119 @@
+import json
+import logging
+from importlib import import_module
+from typing import Callable, Optional, Tuple
+
+
+JSON_DECODER_AUTO = "auto"
+JSON_DECODER_ORJSON = "orjson"
+JSON_DECODER_SIMDJSON = "simdjson"
+JSON_DECODER_UJSON = "ujson"
+JSON_DECODER_STDLIB = "json"
+
+# In order of preference when choosing automatically
+JSON_DECODERS = [
+    JSON_DECODER_ORJSON,
+    JSON_DECODER_SIMDJSON,
+    JSON_DECODER_UJSON,
+    JSON_DECODER_STDLIB,
+]
+
+JSON_DECODER_PACKAGE = {
+    JSON_DECODER_ORJSON: "orjson",
+    JSON_DECODER_SIMDJSON: "pysimdjson",
+    JSON_DECODER_UJSON: "ujson",
+}
+
+
+def check_json_decoder(
+    json_decoder: str,
+) -> None:
+    if json_decoder not in (
+        None,
+        JSON_DECODER_AUTO,
+        *JSON_DECODERS,
+    ):
+        raise ValueError(
+            f"Invalid JSON decoder: {json_decoder}"
+        )
+
+
+def import_json_decoder(
+    json_decoder: str,
+) -> Optional[Callable]:
+    """Import the `loads` function of the JSON decoder backend.
+
+    Parameters
+    ----------
+    json_decoder : str
+        JSON decoder backend.
+
+    Returns
+    -------
+    callable or None
+        Function decoding a JSON document from str or bytes,
+        or None if the backend is not installed.
+
+    """
+    if json_decoder == JSON_DECODER_STDLIB:
+        return json.loads
+
+    if json_decoder not in JSON_DECODER_PACKAGE:
+        raise ValueError(
+            f"Invalid JSON decoder: {json_decoder}"
+        )
+
+    try:
+        return import_module(json_decoder).loads
+    except ImportError:
+        return None
+
+
+def get_json_decoder(
+    json_decoder: str = None,
+) -> Tuple[str, Callable]:
+    """Get the JSON decoder backend to parse the Spark event log with.
+
+    All backends raise a subclass of `ValueError` on invalid documents.
+
+    Parameters
+    ----------
+    json_decoder : str, optional
+        JSON decoder backend.
+        Defaults to the fastest backend installed,
+        falling back to the standard library.
+
+    Returns
+    -------
+    str
+        JSON decoder backend.
+    callable
+        Function decoding a JSON document from str or bytes.
+
+    """
+    if json_decoder is None:
+        json_decoder = JSON_DECODER_AUTO
+
+    if json_decoder == JSON_DECODER_AUTO:
+        for _json_decoder in JSON_DECODERS:
+            _loads = import_json_decoder(_json_decoder)
+
+            if _loads is not None:
+                json_decoder = _json_decoder
+                break
+
+    else:
+        _loads = import_json_decoder(json_decoder)
+
+        if _loads is None:
+            raise ImportError(
+                f"JSON decoder {json_decoder} is not installed"
+                f". Please run: pip install {JSON_DECODER_PACKAGE[json_decoder]}"
+            )
+
+    logging.info(f"Using JSON decoder: {json_decoder}")
+
+    return (
+        json_decoder,
+        _loads,
+    )
@@ -1,23 +1,109 @@
 import logging
-from typing import List, Set, Union
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from spark_sight.data_references import (
     COL_TASK_DATE_START,
     COL_TASK_DATE_END,
+    COL_ID_STAGE,
+    COL_ID_EXECUTOR,
+    EVENT_TASK_END,
+    EVENT_STAGE_COMPLETED,
 )
+from spark_sight.log_parse.decoder import get_json_decoder
+from spark_sight.log_parse.read import (
+    extract_event_type,
+    EVENT_TYPES_EXTRACTED,
+)
+
+
+TASK_EXTRACTION_FULL = "full"
+TASK_EXTRACTION_TARGETED = "targeted"
+
+# Fields of event `SparkListenerTaskEnd` needed for task metrics,
+# in objects `Task Info` and `Task Metrics`
+TASK_FIELDS_INFO = [
+    "Task ID",
+    "Executor ID",
+    "Launch Time",
+    "Finish Time",
+]
+TASK_FIELDS_METRICS = [
+    "Executor CPU Time",
+    "Executor Deserialize CPU Time",
+    "Result Serialization Time",
+    "Fetch Wait Time",
+    "Shuffle Write Time",
+    "Disk Bytes Spilled",
+]
+
+EVENT_TASK_END_RAW = EVENT_TASK_END.encode()
+
+# Event types decoded when extracting from raw lines,
+# None meaning the event type could not be determined from the raw line
+EVENT_TYPES_EXTRACTED_RAW = (
+    None,
+    *(
+        _event_type.encode()
+        for _event_type in EVENT_TYPES_EXTRACTED
+    ),
+)
+
+TASK_METRICS = [
+    "duration_cpu_usage",
+    "duration_cpu_overhead_serde",
+    "duration_cpu_overhead_shuffle",
+    "memory_spill_disk",
+]
+
+
+def check_task_extraction(
+    task_extraction: str,
+) -> None:
+    if task_extraction not in (
+        TASK_EXTRACTION_FULL,
+        TASK_EXTRACTION_TARGETED,
+    ):
+        raise ValueError(
+            f"Invalid task extraction: {task_extraction}"
+        )
+
+
+def log_lines_fallback(
+    log_root: str,
+    lines_fallback: int,
+    lines_targeted: int,
+) -> None:
+    logging.info(
+        f"{log_root}: "
+        f"{lines_fallback} of {lines_targeted} lines"
+        " fell back to full decoding"
+    )
 
 
 def extract_task_info(
-    lines_tasks: List[dict],
+    lines_tasks: List[Union[dict, bytes]],
+    task_extraction: str = TASK_EXTRACTION_FULL,
+    json_decoder: str = None,
 ) -> pd.DataFrame:
     """Extract task information from Spark log lines.
     
     Parameters
     ----------
-    lines_tasks : list of dict
+    lines_tasks : list of dict or list of bytes
         Lines of the Spark log.
+        Decoded if task extraction is full, raw if targeted.
+    task_extraction : str
+        Whether to extract task fields from the decoded lines (full),
+        or straight from the raw lines (targeted).
+        Targeted extraction falls back to decoding the full line
+        when the raw line does not have the expected shape.
+    json_decoder : str, optional
+        JSON decoder backend for the fallback of targeted extraction.
 
     Returns
     -------
@@ -27,24 +113,45 @@ def extract_task_info(
         
         * id_task: int
         * id_stage: int
-        * date_start__task: start date of the task
-        * date_end__task: end date of the task
+        * date_start__task: start date of the task. Measured in ns since epoch
+        * date_end__task: end date of the task. Measured in ns since epoch
         * duration_cpu_usage: duration of actual work. Measured in ns
         * duration_cpu_overhead_serde: duration of overhead (de)serialization. Measured in ns
         * duration_cpu_overhead_shuffle: duration of overhead shuffle (reading and writing). Measured in ns
 
     """
+    check_task_extraction(task_extraction)
+    
     _log_root = "Extracting task information from Spark event log"
     _file_lines = len(lines_tasks)
     _perc_log_dict = [0.25, 0.5, 0.75]
     _perc_log_index = 0
 
-    _task_info_df_data = []
+    task_info_builder = TaskInfoBuilder()
+    
+    json_loads = None
+    _lines_fallback = 0
     
     for _line_index, task in enumerate(lines_tasks):
-        _task_info_dict = convert_line_to_metrics(task)
+        if task_extraction == TASK_EXTRACTION_FULL:
+            _task_fields = extract_task_fields(task)
+        
+        else:
+            _task_fields = extract_task_fields_raw(task)
+            
+            if _task_fields is None:
+                logging.debug(f"Falling back to full decoding: {task}")
+                _lines_fallback += 1
+                
+                if json_loads is None:
+                    (
+                        _,
+                        json_loads,
+                    ) = get_json_decoder(json_decoder)
+                
+                _task_fields = extract_task_fields(json_loads(task))
         
-        _task_info_df_data.append(_task_info_dict)
+        task_info_builder.append(_task_fields)
         
         _perc = float(_line_index) / _file_lines
         if (
@@ -56,17 +163,181 @@ def extract_task_info(
                 f"{_perc_log_dict[_perc_log_index] * 100:.0f}%"
             )
             _perc_log_index += 1
+    
+    if task_extraction == TASK_EXTRACTION_TARGETED:
+        log_lines_fallback(
+            _log_root,
+            lines_fallback=_lines_fallback,
+            lines_targeted=_file_lines,
+        )
+
+    return task_info_builder.to_frame()
 
-    df = pd.DataFrame(_task_info_df_data)
+
+def extract_event_log_info(
+    lines: Iterable[bytes],
+    task_extraction: str = TASK_EXTRACTION_TARGETED,
+    json_decoder: str = None,
+    stats: Dict[str, int] = None,
+) -> Tuple[pd.DataFrame, List[dict]]:
+    """Extract task information and stage events from raw Spark log lines.
     
-    df = df.rename(
-        columns={
-            "date_start": COL_TASK_DATE_START,
-            "date_end": COL_TASK_DATE_END,
-        }
+    Lines are consumed one at a time, so that no decoded line is retained:
+    
+    * each event `SparkListenerTaskEnd` becomes a row of the task table
+    * each event `SparkListenerStageCompleted` is reduced
+      to the fields needed for the stage duration
+    
+    Parameters
+    ----------
+    lines : iterable of bytes
+        Raw lines of the Spark log.
+    task_extraction : str
+        Whether to extract task fields from the decoded lines (full),
+        or straight from the raw lines (targeted).
+    json_decoder : str, optional
+        JSON decoder backend.
+    stats : dict, optional
+        Where to add the number of lines read (`lines`),
+        of lines extracted with targeted extraction (`lines_targeted`),
+        and of those that fell back to full decoding (`lines_fallback`).
+
+    Returns
+    -------
+    pd.DataFrame
+        Task information, see `extract_task_info`.
+    list of dict
+        Stage events, reduced, see `reduce_event_stage`.
+
+    """
+    check_task_extraction(task_extraction)
+    
+    _log_root = "Extracting task information from Spark event log"
+    
+    (
+        _,
+        json_loads,
+    ) = get_json_decoder(json_decoder)
+    
+    task_info_builder = TaskInfoBuilder()
+    lines_stages = []
+    
+    _lines = 0
+    _lines_targeted = 0
+    _lines_fallback = 0
+    
+    for _line in lines:
+        _lines += 1
+        _event_type = extract_event_type(_line)
+        _task_fields = None
+        
+        if (
+            _event_type == EVENT_TASK_END_RAW
+            and task_extraction == TASK_EXTRACTION_TARGETED
+        ):
+            _lines_targeted += 1
+            _task_fields = extract_task_fields_raw(_line)
+            
+            if _task_fields is None:
+                logging.debug(f"Falling back to full decoding: {_line}")
+                _lines_fallback += 1
+        
+        if _task_fields is None:
+            if _event_type not in EVENT_TYPES_EXTRACTED_RAW:
+                continue
+            
+            try:
+                _event = json_loads(_line)
+            except ValueError:
+                logging.debug(f"Invalid line : {_line}")
+                continue
+            
+            if _event.get("Event") == EVENT_STAGE_COMPLETED:
+                lines_stages.append(reduce_event_stage(_event))
+                continue
+            
+            if _event.get("Event") != EVENT_TASK_END:
+                continue
+            
+            _task_fields = extract_task_fields(_event)
+        
+        task_info_builder.append(_task_fields)
+    
+    if task_extraction == TASK_EXTRACTION_TARGETED:
+        log_lines_fallback(
+            _log_root,
+            lines_fallback=_lines_fallback,
+            lines_targeted=_lines_targeted,
+        )
+    
+    if stats is not None:
+        for _stat, _value in (
+            ("lines", _lines),
+            ("lines_targeted", _lines_targeted),
+            ("lines_fallback", _lines_fallback),
+        ):
+            stats[_stat] = stats.get(_stat, 0) + _value
+    
+    return (
+        task_info_builder.to_frame(),
+        lines_stages,
     )
+
+
+def reduce_event_stage(
+    stage: dict,
+) -> dict:
+    """Reduce the stage event to the fields needed for the stage duration.
+    
+    Parameters
+    ----------
+    stage : dict
+        Line of the Spark log, event `SparkListenerStageCompleted`.
+
+    Returns
+    -------
+    dict
+        Stage event with only stage id, stage attempt id,
+        submission and completion time.
+
+    """
+    _stage_info = stage["Stage Info"]
+    
+    return {
+        "Event": stage["Event"],
+        "Stage Info": {
+            "Stage ID": _stage_info["Stage ID"],
+            "Stage Attempt ID": _stage_info.get("Stage Attempt ID", 0),
+            "Submission Time": _stage_info["Submission Time"],
+            "Completion Time": _stage_info["Completion Time"],
+        },
+    }
+
+
+def index_event_stages(
+    lines: Iterable[dict],
+) -> Dict[Tuple[int, int], dict]:
+    """Index stage events by stage id and stage attempt id.
     
-    return df
+    Parameters
+    ----------
+    lines : iterable of dict
+        Stage events, event `SparkListenerStageCompleted`,
+        possibly reduced, see `reduce_event_stage`.
+
+    Returns
+    -------
+    dict
+        Stage events, by stage id and stage attempt id.
+
+    """
+    return {
+        (
+            _["Stage Info"]["Stage ID"],
+            _["Stage Info"].get("Stage Attempt ID", 0),
+        ): _
+        for _ in lines
+    }
 
 
 def extract_event_stage(
@@ -104,62 +375,185 @@ def extract_event_stage(
     return stage[0]
 
 
-def convert_line_to_metrics(
-    task,
-) -> dict:
-    """Convert Spark log line to nested dict of metrics.
+def extract_task_fields(
+    task: dict,
+) -> Dict[str, Union[int, str]]:
+    """Extract the fields needed for task metrics from the decoded line.
     
     Parameters
     ----------
     task : dict
-        Line of the Spark log.
+        Line of the Spark log, decoded.
 
     Returns
     -------
     dict
-        Nested dict of task metrics.
+        Task fields, by name of the field in the Spark log.
+
+    """
+    _task_info = task["Task Info"]
+    _task_metrics = task["Task Metrics"]
+    
+    return {
+        "Task ID": _task_info["Task ID"],
+        "Stage ID": task["Stage ID"],
+        "Executor ID": _task_info["Executor ID"],
+        "Launch Time": _task_info["Launch Time"],
+        "Finish Time": _task_info["Finish Time"],
+        "Executor CPU Time": _task_metrics["Executor CPU Time"],
+        "Executor Deserialize CPU Time": (
+            _task_metrics["Executor Deserialize CPU Time"]
+        ),
+        "Result Serialization Time": (
+            _task_metrics["Result Serialization Time"]
+        ),
+        "Fetch Wait Time": (
+            _task_metrics["Shuffle Read Metrics"]["Fetch Wait Time"]
+        ),
+        "Shuffle Write Time": (
+            _task_metrics["Shuffle Write Metrics"]["Shuffle Write Time"]
+        ),
+        "Disk Bytes Spilled": _task_metrics["Disk Bytes Spilled"],
+    }
+
+
+# Values of task fields are integers, possibly quoted
+REGEX_TASK_FIELD_VALUE = re.compile(rb'(-?[0-9]+)[,}]|"(-?[0-9]+)"[,}]')
+
+
+def _match_task_field_value(
+    line: bytes,
+    field: str,
+    start: int,
+    end: int,
+) -> Optional[Union[int, str]]:
+    # Quotes inside string values are escaped,
+    # hence a match is always a key of the JSON document
+    _key = b'"' + field.encode() + b'":'
+    _position = line.find(_key, start, end)
+    
+    if _position == -1:
+        return None
+    
+    _match = REGEX_TASK_FIELD_VALUE.match(line, _position + len(_key))
+    
+    if _match is None:
+        return None
+    
+    if _match.group(1) is not None:
+        return int(_match.group(1))
+    
+    return _match.group(2).decode()
+
+
+def extract_task_fields_raw(
+    line: bytes,
+) -> Optional[Dict[str, Union[int, str]]]:
+    """Extract the fields needed for task metrics from the raw line.
+    
+    Avoids decoding the whole line, including the accumulables,
+    by searching the fields only where Spark writes them:
+    
+    * stage id as the first key after the event type
+    * task info fields before the accumulables
+    * task metrics fields in the last object `Task Metrics`
+    
+    Parameters
+    ----------
+    line : bytes
+        Raw line of the Spark log, event `SparkListenerTaskEnd`.
+
+    Returns
+    -------
+    dict or None
+        Task fields, by name of the field in the Spark log.
+        None if the line does not have the expected shape.
+
+    """
+    _end = len(line)
+    
+    _position_info = line.find(b'"Task Info":{')
+    _position_accumulables = line.find(b'"Accumulables":', _position_info)
+    _position_metrics = line.rfind(b'"Task Metrics":{')
+    
+    if -1 in (
+        _position_info,
+        _position_accumulables,
+        _position_metrics,
+    ):
+        return None
+    
+    fields = {
+        "Stage ID": _match_task_field_value(
+            line,
+            "Stage ID",
+            start=0,
+            end=_position_info,
+        ),
+        **{
+            _field: _match_task_field_value(
+                line,
+                _field,
+                start=_position_info,
+                end=_position_accumulables,
+            )
+            for _field in TASK_FIELDS_INFO
+        },
+        **{
+            _field: _match_task_field_value(
+                line,
+                _field,
+                start=_position_metrics,
+                end=_end,
+            )
+            for _field in TASK_FIELDS_METRICS
+        },
+    }
+    
+    if any(
+        _value is None
+        for _value in fields.values()
+    ):
+        return None
+    
+    return fields
+
+
+def compute_task_metrics(
+    fields: Dict[str, Union[int, str]],
+) -> Dict[str, float]:
+    """Compute task metrics from task fields.
+    
+    Parameters
+    ----------
+    fields : dict
+        Task fields, by name of the field in the Spark log.
+
+    Returns
+    -------
+    dict
+        Task metrics, by metric name.
 
     """
     
     # https://spark.apache.org/docs/latest/monitoring.html#executor-task-metrics
     # "Task Metrics" > "Executor CPU Time" does not include time of deserialization,
     # see notes_1.png
-
-    _date_start = (
-        pd.to_datetime(
-            1e6 *
-            task["Task Info"]["Launch Time"]
-        )
-    )
-
-    _date_end = (
-        pd.to_datetime(
-            1e6 *
-            task["Task Info"]["Finish Time"]
-        )
-    )
     
-    _dict_base = {
-        "id_task": task["Task Info"]["Task ID"],
-        "id_stage": task["Stage ID"],
-        "id_executor": int(task["Task Info"]["Executor ID"]),
-        "date_start": _date_start,
-        "date_end": _date_end,
+    return {
         # Notice this duration is different from the green bar
         # in the Spark UI. The green bar indicates the duration
         # of the task being scheduled onto the executor,
         # not the actual execution on the CPU
-        "duration_cpu_usage": float(task["Task Metrics"]["Executor CPU Time"]),
+        "duration_cpu_usage": float(fields["Executor CPU Time"]),
         "duration_cpu_overhead_serde": (
             float(
-                task["Task Metrics"][
-                    "Executor Deserialize CPU Time"]
+                fields["Executor Deserialize CPU Time"]
                 # / 1e9
             )
             + (
                 float(
-                    task["Task Metrics"][
-                        "Result Serialization Time"]
+                    fields["Result Serialization Time"]
                 )
                 * float(1e6)
             )
@@ -167,20 +561,166 @@ def convert_line_to_metrics(
         "duration_cpu_overhead_shuffle": (
             # Read
             float(
-                task["Task Metrics"]["Shuffle Read Metrics"][
-                    "Fetch Wait Time"]
+                fields["Fetch Wait Time"]
                 # / 1e3
             )
             # Write
             + float(
-                task["Task Metrics"]["Shuffle Write Metrics"][
-                    "Shuffle Write Time"]
+                fields["Shuffle Write Time"]
                 # / 1e3
             )
         ),
         "memory_spill_disk": float(
-            task["Task Metrics"]["Disk Bytes Spilled"]
+            fields["Disk Bytes Spilled"]
         ),
     }
+
+
+def convert_task_fields_to_metrics(
+    fields: Dict[str, Union[int, str]],
+) -> dict:
+    """Convert task fields to nested dict of metrics.
+    
+    Parameters
+    ----------
+    fields : dict
+        Task fields, by name of the field in the Spark log.
+
+    Returns
+    -------
+    dict
+        Nested dict of task metrics.
+
+    """
+    _date_start = (
+        pd.to_datetime(
+            1_000_000 *
+            fields["Launch Time"]
+        )
+    )
+
+    _date_end = (
+        pd.to_datetime(
+            1_000_000 *
+            fields["Finish Time"]
+        )
+    )
+    
+    _dict_base = {
+        "id_task": fields["Task ID"],
+        "id_stage": fields["Stage ID"],
+        "id_executor": int(fields["Executor ID"]),
+        "date_start": _date_start,
+        "date_end": _date_end,
+        **compute_task_metrics(fields),
+    }
     
     return _dict_base
+
+
+class TaskInfoBuilder:
+    """Columnar builder of the task information DataFrame.
+    
+    Tasks are appended into typed arrays:
+    
+    * ids as int64
+    * launch and finish times as int64 epoch ms
+    * metrics as float64
+    
+    and times are converted to int64 epoch ns in one vectorized call
+    when building the DataFrame.
+    
+    """
+    
+    def __init__(self):
+        self._ids = {
+            "id_task": array("q"),
+            COL_ID_STAGE: array("q"),
+            COL_ID_EXECUTOR: array("q"),
+        }
+        
+        self._times = {
+            COL_TASK_DATE_START: array("q"),
+            COL_TASK_DATE_END: array("q"),
+        }
+        
+        self._metrics = {
+            _metric: array("d")
+            for _metric in TASK_METRICS
+        }
+    
+    def __len__(self) -> int:
+        return len(self._ids["id_task"])
+    
+    def append(
+        self,
+        fields: Dict[str, Union[int, str]],
+    ) -> None:
+        """Append a task.
+        
+        Parameters
+        ----------
+        fields : dict
+            Task fields, by name of the field in the Spark log.
+
+        """
+        self._ids["id_task"].append(fields["Task ID"])
+        self._ids[COL_ID_STAGE].append(fields["Stage ID"])
+        self._ids[COL_ID_EXECUTOR].append(int(fields["Executor ID"]))
+        
+        self._times[COL_TASK_DATE_START].append(fields["Launch Time"])
+        self._times[COL_TASK_DATE_END].append(fields["Finish Time"])
+        
+        for _metric, _value in compute_task_metrics(fields).items():
+            self._metrics[_metric].append(_value)
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Build the task information DataFrame.
+
+        Returns
+        -------
+        pd.DataFrame
+            Task information, see `extract_task_info`.
+
+        """
+        return pd.DataFrame(
+            {
+                **{
+                    _col: np.frombuffer(_values, dtype=np.int64)
+                    for _col, _values in self._ids.items()
+                },
+                **{
+                    # ms to ns as integers, exact
+                    _col: (
+                        np.frombuffer(_values, dtype=np.int64)
+                        * 1_000_000
+                    )
+                    for _col, _values in self._times.items()
+                },
+                **{
+                    _col: np.frombuffer(_values, dtype=np.float64)
+                    for _col, _values in self._metrics.items()
+                },
+            }
+        )
+
+
+def convert_line_to_metrics(
+    task,
+) -> dict:
+    """Convert Spark log line to nested dict of metrics.
+    
+    Parameters
+    ----------
+    task : dict
+        Line of the Spark log.
+
+    Returns
+    -------
+    dict
+        Nested dict of task metrics.
+
+    """
+    return convert_task_fields_to_metrics(
+        extract_task_fields(task)
+    )
@@ -0,0 +1,607 @@
+import logging
+import mmap
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from spark_sight.data_references import (
+    EVENT_TASK_END,
+    EVENT_STAGE_COMPLETED,
+)
+from spark_sight.log_parse.compression import (
+    detect_codec,
+    iter_lines_decompressed,
+)
+
+
+PROGRESS_LOG_PERCENTAGES = [0.25, 0.5, 0.75]
+
+
+def log_progress(
+    log_root: str,
+    perc: float,
+    lines_read: int,
+    bytes_read: int,
+    time_start: float,
+) -> None:
+    """Log progress of reading, along with the throughput so far.
+
+    Parameters
+    ----------
+    log_root : str
+        Prefix of the log message.
+    perc : float
+        Share of the input already read, in [0, 1].
+    lines_read : int
+        Number of lines read so far.
+    bytes_read : int
+        Number of bytes read so far.
+    time_start : float
+        Value of `time.perf_counter()` when reading started.
+
+    """
+    _elapsed = max(time.perf_counter() - time_start, 1e-9)
+
+    logging.info(
+        f"{log_root}: "
+        f"{perc * 100:.0f}%"
+        f" ({lines_read / _elapsed:,.0f} lines/sec"
+        f", {bytes_read / 1e6 / _elapsed:,.1f} MB/s)"
+    )
+
+
+def read_event_log_lines(
+    path_spark_event_log,
+    log_root: str = "Parsing Spark event log",
+) -> Iterator[bytes]:
+    """Read the Spark event log line by line in a single pass.
+
+    Progress is determined by the bytes consumed out of the file size,
+    so that the file does not need to be read upfront to count lines.
+    
+    Compressed Spark event logs are decompressed while reading,
+    see `detect_codec`.
+    Progress is then determined by the compressed bytes consumed.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log.
+    log_root : str
+        Prefix of the progress log messages.
+
+    Yields
+    ------
+    bytes
+        Raw line of the Spark event log, including the trailing newline.
+
+    """
+    _file_size = os.path.getsize(path_spark_event_log)
+    _codec = detect_codec(path_spark_event_log)
+
+    _perc_log_index = 0
+    _bytes_read = 0
+    _lines_read = 0
+    _time_start = time.perf_counter()
+
+    with open(
+        path_spark_event_log,
+        "rb",
+    ) as _file:
+        
+        if _codec is None:
+            _lines = _file
+        else:
+            logging.info(f"{log_root}: decompressing {_codec}")
+            
+            _lines = iter_lines_decompressed(
+                _file,
+                _codec,
+            )
+
+        for _line in _lines:
+            if _codec is None:
+                _bytes_read += len(_line)
+            else:
+                _bytes_read = _file.tell()
+            
+            _lines_read += 1
+
+            yield _line
+
+            while (
+                _perc_log_index < len(PROGRESS_LOG_PERCENTAGES)
+                and _bytes_read > (
+                    _file_size * PROGRESS_LOG_PERCENTAGES[_perc_log_index]
+                )
+            ):
+                log_progress(
+                    log_root,
+                    perc=PROGRESS_LOG_PERCENTAGES[_perc_log_index],
+                    lines_read=_lines_read,
+                    bytes_read=_bytes_read,
+                    time_start=_time_start,
+                )
+                _perc_log_index += 1
+
+
+# Spark writes the event type as the first key of each line
+EVENT_TYPE_PREFIX = b'{"Event":"'
+
+# Event types extracted from the Spark event log,
+# lines of other event types are skipped before JSON decoding
+EVENT_TYPES_EXTRACTED = (
+    EVENT_TASK_END,
+    EVENT_STAGE_COMPLETED,
+)
+
+
+def extract_event_type(
+    line: bytes,
+) -> Optional[bytes]:
+    """Extract the event type from the raw line, without JSON decoding.
+
+    Parameters
+    ----------
+    line : bytes
+        Raw line of the Spark event log.
+
+    Returns
+    -------
+    bytes or None
+        Event type, or None if the line does not start
+        with the expected `{"Event":"...` prefix.
+
+    """
+    if not line.startswith(EVENT_TYPE_PREFIX):
+        return None
+    
+    _end = line.find(b'"', len(EVENT_TYPE_PREFIX))
+    
+    if _end == -1:
+        return None
+    
+    return line[len(EVENT_TYPE_PREFIX):_end]
+
+
+def filter_event_log_lines(
+    lines: Iterable[bytes],
+    event_types: Iterable[str] = None,
+) -> Iterator[bytes]:
+    """Skip raw lines of event types that are not in the allow-list.
+
+    Lines whose event type cannot be determined from the raw bytes
+    are kept, so that the decoder can decide about them.
+
+    Parameters
+    ----------
+    lines : iterable of bytes
+        Raw lines of the Spark event log.
+    event_types : iterable of str, optional
+        Event types to keep.
+        Defaults to the event types extracted.
+
+    Yields
+    ------
+    bytes
+        Raw line of an allowed event type.
+
+    """
+    if event_types is None:
+        event_types = EVENT_TYPES_EXTRACTED
+    
+    _event_types = set(
+        _event_type.encode()
+        for _event_type in event_types
+    )
+    
+    for _line in lines:
+        _event_type = extract_event_type(_line)
+        
+        if _event_type is None or _event_type in _event_types:
+            yield _line
+
+
+def split_event_log_ranges(
+    path_spark_event_log,
+    ranges: int,
+) -> List[Tuple[int, int]]:
+    """Split the Spark event log into byte ranges aligned to lines.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log.
+    ranges : int
+        Number of ranges to split into, at most.
+        Fewer ranges are returned if lines are too long
+        for the ranges to be distinct.
+
+    Returns
+    -------
+    list of tuple
+        Ranges as (start, end) byte offsets, end excluded.
+        Each range starts at the beginning of a line,
+        and the ranges cover the whole file.
+
+    """
+    _file_size = os.path.getsize(path_spark_event_log)
+
+    borders = [0]
+
+    with open(
+        path_spark_event_log,
+        "rb",
+    ) as _file:
+
+        for _range_index in range(1, ranges):
+            _offset = _file_size * _range_index // ranges
+
+            if _offset <= borders[-1]:
+                continue
+
+            # Move to the beginning of the next line
+            _file.seek(_offset - 1)
+            _file.readline()
+            _border = _file.tell()
+
+            if borders[-1] < _border < _file_size:
+                borders.append(_border)
+
+    borders.append(_file_size)
+
+    return list(
+        zip(
+            borders[:-1],
+            borders[1:],
+        )
+    )
+
+
+def read_event_log_range(
+    path_spark_event_log,
+    start: int,
+    end: int,
+) -> Iterator[bytes]:
+    """Read the lines of the Spark event log in the byte range.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log.
+    start : int
+        Byte offset where the range starts, at the beginning of a line.
+    end : int
+        Byte offset where the range ends, excluded.
+
+    Yields
+    ------
+    bytes
+        Raw line of the Spark event log, including the trailing newline.
+
+    """
+    with open(
+        path_spark_event_log,
+        "rb",
+    ) as _file:
+        _file.seek(start)
+        _position = start
+
+        while _position < end:
+            _line = _file.readline()
+
+            if not _line:
+                break
+
+            _position += len(_line)
+
+            yield _line
+
+
+# Size of the chunks of the memory map scanned at once
+MMAP_CHUNK_SIZE = 4 * 2 ** 20
+
+
+def read_event_log_lines_mmap(
+    path_spark_event_log,
+    event_types: Iterable[str] = None,
+    start: int = 0,
+    end: int = None,
+    log_root: str = None,
+) -> Iterator[bytes]:
+    """Read the lines of allowed event types over a memory map of the file.
+
+    The mapped buffer is split in chunks aligned to lines,
+    and the lines of each chunk are prefiltered on their raw prefix,
+    so that only the lines of allowed event types are copied again.
+    Processes mapping the same file share the page cache.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log, uncompressed.
+    event_types : iterable of str, optional
+        Event types to keep, see `filter_event_log_lines`.
+        Defaults to the event types extracted.
+    start : int
+        Byte offset where to start reading, at the beginning of a line.
+    end : int, optional
+        Byte offset where to stop reading, excluded.
+        Defaults to the file size.
+    log_root : str, optional
+        Prefix of the progress log messages.
+        Defaults to not logging progress.
+
+    Yields
+    ------
+    bytes
+        Raw line of an allowed event type, including the trailing newline.
+
+    """
+    if event_types is None:
+        event_types = EVENT_TYPES_EXTRACTED
+
+    _prefixes = tuple(
+        EVENT_TYPE_PREFIX + _event_type.encode() + b'"'
+        for _event_type in event_types
+    )
+
+    with open(
+        path_spark_event_log,
+        "rb",
+    ) as _file:
+        _file_size = os.fstat(_file.fileno()).st_size
+
+        if end is None:
+            end = _file_size
+
+        if start >= end:
+            return
+
+        with mmap.mmap(
+            _file.fileno(),
+            0,
+            access=mmap.ACCESS_READ,
+        ) as _buffer:
+
+            if hasattr(_buffer, "madvise"):
+                _buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+            _perc_log_index = 0 if log_root is not None else len(
+                PROGRESS_LOG_PERCENTAGES
+            )
+            _lines_read = 0
+            _time_start = time.perf_counter()
+
+            _position = start
+
+            while _position < end:
+                # Extend the chunk to the end of its last line
+                _chunk_end = _buffer.find(
+                    b"\n",
+                    min(_position + MMAP_CHUNK_SIZE, end) - 1,
+                )
+                _chunk_end = (
+                    _file_size
+                    if _chunk_end == -1
+                    else _chunk_end + 1
+                )
+
+                _lines = _buffer[_position:_chunk_end].split(b"\n")
+
+                # The chunk ends with a newline, except at the end
+                # of a file not ending with a newline
+                _line_last = _lines.pop()
+
+                # Lines not matching the expected prefix
+                # are left to the decoder
+                for _line in _lines:
+                    if (
+                        _line.startswith(_prefixes)
+                        or not _line.startswith(EVENT_TYPE_PREFIX)
+                    ):
+                        yield _line + b"\n"
+
+                if _line_last and (
+                    _line_last.startswith(_prefixes)
+                    or not _line_last.startswith(EVENT_TYPE_PREFIX)
+                ):
+                    yield _line_last
+
+                _lines_read += len(_lines) + bool(_line_last)
+                _position = _chunk_end
+
+                while (
+                    _perc_log_index < len(PROGRESS_LOG_PERCENTAGES)
+                    and _position - start > (
+                        (end - start)
+                        * PROGRESS_LOG_PERCENTAGES[_perc_log_index]
+                    )
+                ):
+                    log_progress(
+                        log_root,
+                        perc=PROGRESS_LOG_PERCENTAGES[_perc_log_index],
+                        lines_read=_lines_read,
+                        bytes_read=_position - start,
+                        time_start=_time_start,
+                    )
+                    _perc_log_index += 1
+
+
+def iter_event_log_lines(
+    path_spark_event_log,
+    event_types: Iterable[str] = None,
+    start: int = 0,
+    end: int = None,
+    log_root: str = None,
+    use_mmap: bool = True,
+) -> Iterator[bytes]:
+    """Read the lines of allowed event types of the Spark event log.
+
+    Parameters
+    ----------
+    path_spark_event_log : str or Path
+        Path to the Spark event log.
+    event_types : iterable of str, optional
+        Event types to keep, see `filter_event_log_lines`.
+        Defaults to the event types extracted.
+    start : int
+        Byte offset where to start reading, at the beginning of a line.
+    end : int, optional
+        Byte offset where to stop reading, excluded.
+        Defaults to the file size.
+    log_root : str, optional
+        Prefix of the progress log messages.
+        Defaults to not logging progress.
+    use_mmap : bool
+        Whether to read over a memory map of the file,
+        instead of iterating over the lines of the file.
+        Compressed Spark event logs are never memory-mapped,
+        and can only be read as a whole.
+
+    Yields
+    ------
+    bytes
+        Raw line of an allowed event type, including the trailing newline.
+
+    """
+    _codec = detect_codec(path_spark_event_log)
+
+    if _codec is not None:
+        if (start, end) not in (
+            (0, None),
+            (0, os.path.getsize(path_spark_event_log)),
+        ):
+            raise ValueError(
+                "Byte ranges of compressed Spark event logs"
+                " cannot be read"
+            )
+
+        if log_root is not None:
+            yield from filter_event_log_lines(
+                read_event_log_lines(
+                    path_spark_event_log,
+                    log_root=log_root,
+                ),
+                event_types=event_types,
+            )
+
+            return
+
+        with open(
+            path_spark_event_log,
+            "rb",
+        ) as _file:
+            yield from filter_event_log_lines(
+                iter_lines_decompressed(
+                    _file,
+                    _codec,
+                ),
+                event_types=event_types,
+            )
+
+        return
+    
+    if use_mmap:
+        yield from read_event_log_lines_mmap(
+            path_spark_event_log,
+            event_types=event_types,
+            start=start,
+            end=end,
+            log_root=log_root,
+        )
+
+        return
+
+    _file_size = os.path.getsize(path_spark_event_log)
+
+    if end is None:
+        end = _file_size
+
+    if (start, end) == (0, _file_size) and log_root is not None:
+        _lines = read_event_log_lines(
+            path_spark_event_log,
+            log_root=log_root,
+        )
+    else:
+        _lines = read_event_log_range(
+            path_spark_event_log,
+            start=start,
+            end=end,
+        )
+
+    yield from filter_event_log_lines(
+        _lines,
+        event_types=event_types,
+    )
+
+
+# Files of a rolling Spark event log directory `eventlog_v2_<appId>`,
+# i.e. `events_<index>_<appId>[.<codec>][.compact]`,
+# along with the `appstatus_<appId>[.inprogress]` marker that is skipped
+REGEX_EVENT_LOG_FILE = re.compile(r"^events_(\d+)_")
+EVENT_LOG_SUFFIX_COMPACT = ".compact"
+
+
+def list_event_log_files(
+    path_spark_event_log_dir,
+) -> List[Path]:
+    """List the files of the rolling Spark event log directory to parse.
+
+    Files are ordered by their index, and the latest compacted file
+    replaces all the files up to its index, as Spark does.
+
+    Parameters
+    ----------
+    path_spark_event_log_dir : str or Path
+        Path to the rolling Spark event log directory,
+        i.e. `eventlog_v2_<appId>`.
+
+    Returns
+    -------
+    list of Path
+        Paths to the Spark event log files, in order.
+
+    """
+    files = []
+
+    for _path in Path(path_spark_event_log_dir).iterdir():
+        _match = REGEX_EVENT_LOG_FILE.match(_path.name)
+
+        if _match is None or not _path.is_file():
+            continue
+
+        files.append(
+            (
+                int(_match.group(1)),
+                _path.name.endswith(EVENT_LOG_SUFFIX_COMPACT),
+                _path,
+            )
+        )
+
+    files.sort()
+
+    _index_compact = max(
+        (
+            _index
+            for _index, _compact, _ in files
+            if _compact
+        ),
+        default=None,
+    )
+
+    if _index_compact is not None:
+        files = [
+            (_index, _compact, _path)
+            for _index, _compact, _path in files
+            if _index > _index_compact
+            or (_index == _index_compact and _compact)
+        ]
+
+    return [
+        _path
+        for _, _, _path in files
+    ]
+
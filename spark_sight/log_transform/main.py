@@ -1,6 +1,7 @@
 import logging
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from numpy import datetime64
 
@@ -13,13 +14,198 @@ from spark_sight.data_references import (
     COL_SUBSTAGE_DATE_START,
     COL_SUBSTAGE_DATE_END,
     COL_SUBSTAGE_DATE_INTERVAL,
+    COL_SUBSTAGE_INDEX,
     COL_SUBSTAGE_DURATION,
     COL_SPLIT_BORDERS_LIST,
+    COL_TASK_SPLIT,
     COL_STAGE_DATE_START,
     COL_STAGE_DATE_END,
     COL_STAGE_DURATION,
+    COL_CONCURRENCY_DATE,
+    COL_CONCURRENCY_TASKS,
 )
-from spark_sight.log_parse.main import extract_event_stage
+
+
+SPLIT_ENGINE_ITERATIVE = "iterative"
+SPLIT_ENGINE_VECTORIZED = "vectorized"
+
+# Split tasks resulting in all metrics below this threshold are discarded
+THRESHOLD_METRICS_DISCARD = 1e-2
+
+# Substages as the intervals between borders of stages,
+# or as time buckets of fixed width
+RESOLUTION_STAGES = "stages"
+RESOLUTION_AUTO = "auto"
+
+# Automatic resolution bounds the number of time buckets,
+# with width of whole seconds
+RESOLUTION_AUTO_BUCKETS_MAX = 1000
+RESOLUTION_AUTO_WIDTH_UNIT = 10**9
+
+# Adjacent substages are merged to bound the number of substages
+SUBSTAGES_MAX = 1000
+
+
+# Time columns of the task information,
+# as int64 nanoseconds since epoch
+COLS_TASK_TIME = [
+    COL_TASK_DATE_START,
+    COL_TASK_DATE_END,
+    COL_STAGE_ASOFTASKS_DATE_START,
+    COL_STAGE_ASOFTASKS_DATE_END,
+]
+
+
+def to_time_ns(
+    values: Iterable,
+) -> np.ndarray:
+    """Convert times to int64 nanoseconds since epoch.
+    
+    Parameters
+    ----------
+    values : iterable
+        Datetimes, or int64 nanoseconds since epoch.
+
+    Returns
+    -------
+    np.ndarray
+        Times as int64 nanoseconds since epoch.
+    
+    """
+    values = np.asarray(values)
+    
+    if values.dtype == object:
+        values = pd.to_datetime(values).values
+    
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").view(np.int64)
+    
+    return values.astype(np.int64, copy=False)
+
+
+def from_time_ns(
+    values: Iterable,
+) -> np.ndarray:
+    """Convert int64 nanoseconds since epoch to datetimes.
+    
+    Parameters
+    ----------
+    values : iterable
+        Times as int64 nanoseconds since epoch.
+
+    Returns
+    -------
+    np.ndarray
+        Times as datetime64[ns].
+    
+    """
+    return to_time_ns(values).view("datetime64[ns]")
+
+
+def convert_time_columns(
+    df: pd.DataFrame,
+    to_datetime: bool,
+) -> pd.DataFrame:
+    """Convert the time columns of the task information.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing task information.
+    to_datetime : bool
+        Whether to convert to datetimes,
+        or to int64 nanoseconds since epoch.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the time columns converted.
+    
+    """
+    df = df.copy()
+    
+    for _col in COLS_TASK_TIME:
+        if _col in df.columns:
+            df[_col] = (
+                from_time_ns(df[_col])
+                if to_datetime
+                else to_time_ns(df[_col])
+            )
+    
+    return df
+
+
+def check_split_engine(
+    split_engine: str,
+) -> None:
+    if split_engine not in (
+        SPLIT_ENGINE_ITERATIVE,
+        SPLIT_ENGINE_VECTORIZED,
+    ):
+        raise ValueError(
+            f"Invalid split engine: {split_engine}"
+        )
+
+
+def parse_resolution(
+    resolution: str,
+) -> Optional[int]:
+    """Parse the resolution of the substages.
+    
+    Parameters
+    ----------
+    resolution : str
+        Either `stages`, `auto`,
+        or the width of the time buckets, e.g. `1s`, `10s`, `500ms`.
+
+    Returns
+    -------
+    int or None
+        Width of the time buckets in ns,
+        0 if automatic, None if substages are between borders of stages.
+    
+    """
+    if resolution == RESOLUTION_STAGES:
+        return None
+    
+    if resolution == RESOLUTION_AUTO:
+        return 0
+    
+    try:
+        return parse_duration(resolution)
+    except ValueError:
+        raise ValueError(
+            f"Invalid resolution: {resolution}"
+        )
+
+
+def parse_duration(
+    duration: str,
+) -> int:
+    """Parse a positive duration, e.g. `1s`, `500ms`.
+    
+    Parameters
+    ----------
+    duration : str
+        Duration as understood by `pd.Timedelta`.
+
+    Returns
+    -------
+    int
+        Duration in ns.
+    
+    """
+    try:
+        duration_ns = pd.Timedelta(duration).value
+    except ValueError:
+        duration_ns = 0
+    
+    if duration_ns <= 0:
+        raise ValueError(
+            f"Invalid duration: {duration}"
+        )
+    
+    return duration_ns
 
 
 def check_tasks_are_split_correctly(
@@ -155,6 +341,172 @@ def aggregate_tasks_in_substages(
     return grouped
 
 
+def assign_substage_index(
+    df: pd.DataFrame,
+    borders_all: np.ndarray,
+) -> np.ndarray:
+    """Assign tasks to the substage they end in.
+    
+    Same assignment as `pd.cut` of the task end on the borders,
+    as the integer index of the substage:
+    substage i is the interval (borders[i], borders[i + 1]].
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing task information already split
+        across the borders.
+    borders_all : np.ndarray
+        Borders as int64 ns, including external borders
+        of first stage start and last stage end.
+
+    Returns
+    -------
+    np.ndarray
+        Index of the substage of each task,
+        -1 for tasks ending out of the borders.
+    
+    """
+    borders = to_time_ns(borders_all)
+    
+    substage_index = (
+        np.searchsorted(
+            borders,
+            to_time_ns(df[COL_TASK_DATE_END]),
+            side="left",
+        )
+        - 1
+    )
+    
+    substage_index[substage_index >= len(borders) - 1] = -1
+    
+    return substage_index
+
+
+def check_tasks_are_split_correctly_indexed(
+    df: pd.DataFrame,
+    borders_all: np.ndarray,
+) -> None:
+    """Check tasks lie within their substage, see `assign_substage_index`.
+    
+    Same check as `check_tasks_are_split_correctly`,
+    on the integer index of the substage instead of the interval.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing task information already split
+        across the borders, with the substage index column.
+    borders_all : np.ndarray
+        Borders as int64 ns, including external borders
+        of first stage start and last stage end.
+    
+    """
+    borders = to_time_ns(borders_all)
+    substage_index = df[COL_SUBSTAGE_INDEX].values
+    
+    _index_valid = substage_index >= 0
+    _substage_index = substage_index[_index_valid]
+    
+    _not_split_correctly = np.zeros(len(df), dtype=bool)
+    _not_split_correctly[_index_valid] = (
+        (
+            to_time_ns(df[COL_TASK_DATE_START])[_index_valid]
+            <= borders[_substage_index]
+        )
+        | (
+            to_time_ns(df[COL_TASK_DATE_END])[_index_valid]
+            > borders[_substage_index + 1]
+        )
+    )
+    
+    not_split_correcly = df[_not_split_correctly]
+    
+    if not not_split_correcly.empty:
+        raise ValueError(
+            f"Found tasks not split correctly: \n{not_split_correcly}"
+        )
+
+
+def aggregate_tasks_in_substages_indexed(
+    df: pd.DataFrame,
+    borders_all: np.ndarray,
+    metrics: List[str],
+    cols_groupby: List[str] = (),
+) -> pd.DataFrame:
+    """Aggregate task metrics within the substage intervals, indexed.
+    
+    Same aggregation as `aggregate_tasks_in_substages`,
+    grouping on the integer index of the substage,
+    see `assign_substage_index`, instead of the interval.
+    
+    Substage start, end and duration are taken
+    from the borders by the index of the substage, as int64 ns.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing task information already split
+        across the borders.
+        The id task column may not be primary key.
+    borders_all : np.ndarray
+        Borders as int64 ns, including external borders
+        of first stage start and last stage end.
+    metrics : list of str
+        List of metric strings to aggregate (sum).
+    cols_groupby : list of str
+        Columns to group by to aggregate the metrics,
+        besides the substage.
+
+    Returns
+    -------
+    pd.DataFrame
+        Aggregate information regarding tasks in substages.
+        Contains:
+        * substage index
+        * unique stage ids of the tasks that have been aggregated
+        * aggregate metric
+    
+    """
+    borders = to_time_ns(borders_all)
+    
+    df.loc[:, COL_SUBSTAGE_INDEX] = assign_substage_index(
+        df,
+        borders_all,
+    )
+    
+    check_tasks_are_split_correctly_indexed(df, borders_all)
+    
+    grouped = (
+        df[df[COL_SUBSTAGE_INDEX] >= 0]
+        .groupby(
+            list(cols_groupby) + [COL_SUBSTAGE_INDEX],
+        )
+        .agg(
+            {
+                COL_ID_STAGE: "unique",
+                **{
+                    _metric: "sum"
+                    for _metric in metrics
+                },
+            }
+        )
+        .reset_index()
+    )
+    
+    substage_index = grouped[COL_SUBSTAGE_INDEX].values
+    
+    grouped.loc[:, COL_SUBSTAGE_DATE_START] = borders[substage_index]
+    grouped.loc[:, COL_SUBSTAGE_DATE_END] = borders[substage_index + 1]
+    
+    grouped.loc[:, COL_SUBSTAGE_DURATION] = (
+        borders[substage_index + 1]
+        - borders[substage_index]
+    )
+    
+    return grouped
+
+
 def split_on_borders(
     task_info: pd.DataFrame,
     borders_all: List[datetime64],
@@ -182,11 +534,12 @@ def split_on_borders(
     pd.DataFrame
         Dataframe where task rows of tasks on inner borders have been split.
         A new column containing the information of which borders
-        have been used to apply the split is added.
+        have been used to apply the split is added,
+        and a new boolean column of whether the task row has been split.
         The id task column may not be primary key.
     
     """
-    threshold_metrics_discard = 1e-2
+    threshold_metrics_discard = THRESHOLD_METRICS_DISCARD
     borders_inner = borders_all[1:-1]
     df_split = task_info.copy()
     
@@ -196,6 +549,8 @@ def split_on_borders(
         ]
     )
     
+    df_split.loc[:, COL_TASK_SPLIT] = False
+    
     for index_border, border in enumerate(borders_inner):
         logging.debug(f"Border {border}")
         
@@ -225,6 +580,9 @@ def split_on_borders(
                 metrics=metrics
                 )
             
+            to_split_row_left[COL_TASK_SPLIT] = True
+            to_split_row_right[COL_TASK_SPLIT] = True
+            
             line_just_split_index.append(
                 to_split_index
             )
@@ -262,6 +620,167 @@ def split_on_borders(
     return df_split
 
 
+def split_on_borders_vectorized(
+    task_info: pd.DataFrame,
+    borders_all: np.ndarray,
+    metrics: List[str],
+) -> pd.DataFrame:
+    """Split tasks running on the inner borders, vectorized.
+    
+    Same result as `split_on_borders`, computed in one shot
+    instead of one border at a time:
+    
+    * the inner borders a task runs across are found
+      with `searchsorted` against the sorted borders
+    * each task is exploded into one row per substage it runs in,
+      split at the border on the left
+      and 1 ns after the border on the right
+    * each metric is prorated by the duration of the split task
+      over the duration of the whole task
+    
+    Times are int64 ns, see `to_time_ns`.
+    
+    Parameters
+    ----------
+    task_info : pd.DataFrame
+        Dataframe containing task information.
+        The id task column is expected to be primary key.
+    borders_all : np.ndarray
+        Borders as int64 ns, including external borders
+        of first stage start and last stage end.
+    metrics : list of str
+        List of metric strings to split.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe where task rows of tasks on inner borders have been split,
+        see `split_on_borders`, without the column of the borders used.
+    
+    """
+    if len(metrics) == 0:
+        raise ValueError("Provided empty metrics")
+    
+    borders_inner = to_time_ns(borders_all)[1:-1]
+    
+    date_start = to_time_ns(task_info[COL_TASK_DATE_START])
+    date_end = to_time_ns(task_info[COL_TASK_DATE_END])
+    
+    # Task on the border iff start <= border < end
+    index_border_first = np.searchsorted(borders_inner, date_start, side="left")
+    index_border_last = np.searchsorted(borders_inner, date_end, side="left")
+    
+    splits = np.maximum(index_border_last - index_border_first, 0)
+    
+    if len(borders_inner) == 0 or not splits.any():
+        df_split = task_info.copy().reset_index(drop=True)
+        
+        df_split[COL_TASK_DATE_START] = date_start
+        df_split[COL_TASK_DATE_END] = date_end
+        
+        df_split.loc[:, COL_TASK_SPLIT] = False
+        
+        return df_split
+    
+    pieces = splits + 1
+    
+    index_task = np.repeat(np.arange(len(task_info)), pieces)
+    index_piece = (
+        np.arange(pieces.sum())
+        - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    )
+    
+    _splits = splits[index_task]
+    _index_border = index_border_first[index_task] + index_piece
+    _date_start = date_start[index_task]
+    _date_end = date_end[index_task]
+    
+    piece_date_start = np.where(
+        index_piece == 0,
+        _date_start,
+        borders_inner.take(_index_border - 1, mode="clip") + 1,
+    )
+    piece_date_end = np.where(
+        index_piece == _splits,
+        _date_end,
+        borders_inner.take(_index_border, mode="clip"),
+    )
+    
+    # Tasks not split keep their metrics untouched,
+    # split tasks have duration > 0
+    piece_ratio = np.where(
+        _splits > 0,
+        (
+            (piece_date_end - piece_date_start).astype(np.float64)
+            / np.maximum(_date_end - _date_start, 1).astype(np.float64)
+        ),
+        1.0,
+    )
+    
+    piece_metrics = {
+        _metric: (
+            task_info[_metric].values.astype(np.float64)[index_task]
+            * piece_ratio
+        )
+        for _metric in metrics
+    }
+    
+    # Discard split resulting in all metrics < threshold
+    piece_keep = _splits == 0
+    
+    for _values in piece_metrics.values():
+        piece_keep |= _values > float(THRESHOLD_METRICS_DISCARD)
+    
+    df_split = (
+        task_info
+        .take(index_task[piece_keep])
+        .reset_index(drop=True)
+    )
+    
+    df_split[COL_TASK_DATE_START] = piece_date_start[piece_keep]
+    df_split[COL_TASK_DATE_END] = piece_date_end[piece_keep]
+    
+    for _metric, _values in piece_metrics.items():
+        df_split.loc[:, _metric] = _values[piece_keep]
+    
+    df_split.loc[:, COL_TASK_SPLIT] = _splits[piece_keep] > 0
+    
+    return df_split
+
+
+def discard_split_tasks(
+    task_info_split: pd.DataFrame,
+    metrics: List[str],
+) -> pd.DataFrame:
+    """Discard split tasks resulting in all metrics below the threshold.
+    
+    Tasks split across the borders on more metrics than the given ones
+    are discarded the same as if they had been split on the given ones only.
+    
+    Parameters
+    ----------
+    task_info_split : pd.DataFrame
+        Dataframe containing task information already split
+        across the borders, see `split_on_borders`.
+    metrics : list of str
+        List of metric strings to check against the threshold.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe without the split tasks to discard.
+    
+    """
+    to_keep = ~task_info_split[COL_TASK_SPLIT].astype(bool)
+    
+    for _metric in metrics:
+        to_keep |= (
+            task_info_split[_metric] > float(THRESHOLD_METRICS_DISCARD)
+        )
+    
+    return task_info_split[to_keep].copy().reset_index(drop=True)
+
+
 def split_row_in_two(
     to_split_row_generic,
 ) -> (pd.Series, pd.Series):
@@ -360,7 +879,7 @@ def split_single_border(
 
 def determine_borders_of_stages_asoftasks(
     task_info: pd.DataFrame,
-) -> List[datetime64]:
+) -> np.ndarray:
     """Determine borders of stages as of tasks starting and ending.
     
     Determines
@@ -372,6 +891,9 @@ def determine_borders_of_stages_asoftasks(
     * stage `Submission Time` <= first task `Launch Time`
     * stage `Completion Time` >= last task `Finish Time`
     
+    Stage start and end are computed in a single grouped min and max,
+    and added to the task information as columns of int64 ns.
+    
     Parameters
     ----------
     task_info : pd.DataFrame
@@ -379,87 +901,556 @@ def determine_borders_of_stages_asoftasks(
 
     Returns
     -------
-    list
-        List of borders, including external borders
+    np.ndarray
+        Borders as int64 ns, sorted, including external borders
         of stage start and stage end.
     
     """
-    for id_stage in task_info[COL_ID_STAGE].unique():
-        logging.debug(f"Stage {id_stage}")
-        
-        _index_stage = task_info[COL_ID_STAGE] == id_stage
-        
-        # Subtracting 1 ns because we consider task belonging to interval
-        # iff > stage start
-        stage_asoftasks_date_start = (
-            task_info.loc[_index_stage][COL_TASK_DATE_START].agg("min")
-            - pd.Timedelta(1, unit="ns")
+    grouped = pd.DataFrame(
+        {
+            COL_TASK_DATE_START: to_time_ns(task_info[COL_TASK_DATE_START]),
+            COL_TASK_DATE_END: to_time_ns(task_info[COL_TASK_DATE_END]),
+        },
+        index=task_info.index,
+    ).groupby(task_info[COL_ID_STAGE])
+    
+    # Subtracting 1 ns because we consider task belonging to interval
+    # iff > stage start
+    stage_asoftasks_date_start = (
+        grouped[COL_TASK_DATE_START].min()
+        - 1
+    )
+    
+    # Subtracting 0 ns because we consider task belonging to interval
+    # iff <= stage end
+    stage_asoftasks_date_end = (
+        grouped[COL_TASK_DATE_END].max()
+    )
+    
+    task_info[COL_STAGE_ASOFTASKS_DATE_START] = (
+        task_info[COL_ID_STAGE].map(stage_asoftasks_date_start)
+    )
+    
+    task_info[COL_STAGE_ASOFTASKS_DATE_END] = (
+        task_info[COL_ID_STAGE].map(stage_asoftasks_date_end)
+    )
+    
+    borders_all = np.unique(
+        np.concatenate(
+            [
+                stage_asoftasks_date_start.values,
+                stage_asoftasks_date_end.values,
+            ]
         )
-        
-        # Subtracting 0 ns because we consider task belonging to interval
-        # iff <= stage end
-        stage_asoftasks_date_end = (
-            task_info.loc[_index_stage][COL_TASK_DATE_END].agg("max")
+    )
+    
+    logging.debug(f"Borders {borders_all}")
+    
+    return borders_all
+
+
+def determine_borders_of_buckets(
+    task_info: pd.DataFrame,
+    width: int,
+    buckets_max: int = None,
+    width_min: int = None,
+) -> np.ndarray:
+    """Determine borders of time buckets of fixed width.
+    
+    Buckets start 1 ns before the first task start,
+    as the borders of stages, and cover the last task end.
+    
+    Buckets are widened to the smallest multiple of the width
+    that is at least `width_min` wide, and at most `buckets_max` many,
+    so that they stay of the same width.
+    
+    Parameters
+    ----------
+    task_info : pd.DataFrame
+        DataFrame of task information.
+    width : int
+        Width of the time buckets in ns,
+        0 to bound the number of buckets, see `RESOLUTION_AUTO_BUCKETS_MAX`.
+    buckets_max : int, optional
+        Maximum number of buckets.
+    width_min : int, optional
+        Minimum width of the buckets in ns.
+
+    Returns
+    -------
+    np.ndarray
+        Borders as int64 ns, sorted, including external borders.
+    
+    """
+    date_start = to_time_ns(task_info[COL_TASK_DATE_START]).min() - 1
+    date_end = to_time_ns(task_info[COL_TASK_DATE_END]).max()
+    
+    width_auto = width == 0
+    
+    if width_auto:
+        width = RESOLUTION_AUTO_WIDTH_UNIT * max(
+            1,
+            -(
+                -(date_end - date_start)
+                // (RESOLUTION_AUTO_BUCKETS_MAX * RESOLUTION_AUTO_WIDTH_UNIT)
+            ),
         )
+    
+    buckets = max(1, -(-(date_end - date_start) // width))
+    
+    # Widening to a multiple of the width keeps the buckets even
+    multiple = max(
+        1,
+        1 if width_min is None else -(-width_min // width),
+        1 if buckets_max is None else -(-buckets // buckets_max),
+    )
+    
+    if multiple > 1:
+        if not width_auto:
+            logging.warning(
+                f"Widening {buckets} time buckets of {width} ns"
+                f" to {multiple * width} ns"
+                f", within the maximum number and minimum width of substages"
+            )
         
-        logging.debug(
-            f"Start {stage_asoftasks_date_start}"
-            f", end {stage_asoftasks_date_end}"
+        width *= multiple
+        buckets = max(1, -(-(date_end - date_start) // width))
+    
+    borders_all = (
+        date_start
+        + width * np.arange(buckets + 1, dtype=np.int64)
+    )
+    
+    logging.debug(f"Borders of {buckets} buckets of {width} ns")
+    
+    return borders_all
+
+
+def coarsen_borders(
+    borders_all: np.ndarray,
+    substages_max: int = None,
+    width_min: int = None,
+) -> np.ndarray:
+    """Coarsen the borders by merging adjacent substages.
+    
+    Inner borders are dropped so that substages are
+    at least `width_min` wide, and at most `substages_max` many.
+    Borders are kept greedily from the first one,
+    the last substage is merged into the previous one if too narrow.
+    
+    Tasks split and aggregated on the coarsened borders have
+    the same metric totals: a merged substage sums the metrics
+    of the substages it replaces, and its efficiency is their
+    average weighted by duration.
+    
+    Parameters
+    ----------
+    borders_all : np.ndarray
+        Borders as int64 ns, sorted, including external borders.
+    substages_max : int, optional
+        Maximum number of substages.
+    width_min : int, optional
+        Minimum width of the substages in ns.
+
+    Returns
+    -------
+    np.ndarray
+        Coarsened borders as int64 ns, with the same external borders.
+    
+    """
+    borders = to_time_ns(borders_all)
+    
+    width = 0 if width_min is None else width_min
+    
+    if (
+        substages_max is not None
+        and len(borders) - 1 > substages_max
+    ):
+        # Substages at least this wide are at most substages_max
+        width = max(
+            width,
+            -(-(borders[-1] - borders[0]) // substages_max),
         )
-        
-        task_info.loc[_index_stage, COL_STAGE_ASOFTASKS_DATE_START] = (
-            stage_asoftasks_date_start
+    
+    if width <= 0 or len(borders) <= 2:
+        return borders
+    
+    kept = [0]
+    
+    while True:
+        _next = np.searchsorted(
+            borders,
+            borders[kept[-1]] + width,
+            side="left",
         )
         
-        task_info.loc[_index_stage, COL_STAGE_ASOFTASKS_DATE_END] = (
-            stage_asoftasks_date_end
-        )
+        if _next >= len(borders) - 1:
+            break
+        
+        kept.append(_next)
+    
+    if (
+        borders[-1] - borders[kept[-1]] < width
+        and len(kept) > 1
+    ):
+        kept.pop()
+    
+    kept.append(len(borders) - 1)
     
-    borders_all = set(
-        list(task_info[COL_STAGE_ASOFTASKS_DATE_START].unique())
-        + list(task_info[COL_STAGE_ASOFTASKS_DATE_END].unique())
+    logging.debug(
+        f"Coarsened {len(borders) - 1} substages"
+        f" to {len(kept) - 1} substages at least {width} ns wide"
     )
     
-    borders_all = sorted(list(borders_all))
+    return borders[kept]
+
+
+def _sum_in_buckets(
+    date_start: np.ndarray,
+    date_end: np.ndarray,
+    values: np.ndarray,
+    borders: np.ndarray,
+) -> np.ndarray:
+    # Each task is spread uniformly on its duration,
+    # tasks without duration count in the bucket they end in.
+    # The cumulative sum up to each border is computed on the sorted
+    # starts and ends, relative to the first border for float precision
+    _date_start = (date_start - borders[0]).astype(np.float64)
+    _date_end = (date_end - borders[0]).astype(np.float64)
+    _borders = (borders - borders[0]).astype(np.float64)
     
-    logging.debug(f"Borders {borders_all}")
+    _duration = _date_end - _date_start
+    _instant = _duration <= 0
     
-    return borders_all
+    _rate = values[~_instant] / _duration[~_instant]
+    
+    cumulative = np.zeros(len(_borders))
+    
+    for _dates, _sign in (
+        (_date_start[~_instant], 1.0),
+        (_date_end[~_instant], -1.0),
+    ):
+        _order = np.argsort(_dates, kind="stable")
+        _dates_sorted = _dates[_order]
+        _rate_sorted = _rate[_order]
+        
+        _index = np.searchsorted(_dates_sorted, _borders, side="left")
+        
+        cumulative += _sign * (
+            _borders
+            * np.concatenate([[0.0], np.cumsum(_rate_sorted)])[_index]
+            - np.concatenate(
+                [[0.0], np.cumsum(_rate_sorted * _dates_sorted)]
+            )[_index]
+        )
+    
+    _order = np.argsort(_date_end[_instant], kind="stable")
+    
+    _index = np.searchsorted(
+        _date_end[_instant][_order],
+        _borders,
+        side="right",
+    )
+    
+    cumulative += np.concatenate(
+        [[0.0], np.cumsum(values[_instant][_order])]
+    )[_index]
+    
+    return np.diff(cumulative)
 
 
-def create_duration_stage(
-    lines_stages,
-    stage_ids,
-):
-    data_stage_single = []
+def aggregate_tasks_in_buckets(
+    df: pd.DataFrame,
+    borders_all: np.ndarray,
+    metrics: List[str],
+    cols_groupby: List[str] = (),
+) -> pd.DataFrame:
+    """Aggregate task metrics within time buckets of fixed width.
     
-    for stage_id in stage_ids:
-        stage = extract_event_stage(lines_stages, stage_id=stage_id)
+    Metrics are prorated by the overlap of each task with each bucket,
+    without splitting the tasks:
+    memory is linear in the number of tasks and buckets.
+    
+    The stages of a bucket are the stages running in the bucket,
+    from the first start to the last end of their tasks.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing task information, not split.
+    borders_all : np.ndarray
+        Borders of the buckets as int64 ns,
+        see `determine_borders_of_buckets`.
+    metrics : list of str
+        List of metric strings to aggregate (sum).
+    cols_groupby : list of str
+        Columns to group by to aggregate the metrics,
+        besides the bucket.
+
+    Returns
+    -------
+    pd.DataFrame
+        Aggregate information regarding tasks in buckets,
+        see `aggregate_tasks_in_substages_indexed`.
+    
+    """
+    cols_groupby = list(cols_groupby)
+    
+    borders = to_time_ns(borders_all)
+    buckets = len(borders) - 1
+    
+    date_start = to_time_ns(df[COL_TASK_DATE_START])
+    date_end = to_time_ns(df[COL_TASK_DATE_END])
+    
+    if len(cols_groupby) > 0:
+        group = df.groupby(cols_groupby, sort=True).ngroup().values
+    else:
+        group = np.zeros(len(df), dtype=np.int64)
+    
+    groups = int(group.max()) + 1 if len(df) > 0 else 0
+    
+    _order = np.argsort(group, kind="stable")
+    _bounds = np.searchsorted(group[_order], np.arange(groups + 1))
+    
+    sums = {
+        _metric: np.zeros((groups, buckets))
+        for _metric in metrics
+    }
+    
+    for _group in range(groups):
+        _index = _order[_bounds[_group]:_bounds[_group + 1]]
         
-        stage_duration = (
-            (
-                stage["Stage Info"]["Completion Time"]
-                - stage["Stage Info"]["Submission Time"]
+        for _metric in metrics:
+            sums[_metric][_group] = _sum_in_buckets(
+                date_start[_index],
+                date_end[_index],
+                df[_metric].values[_index].astype(np.float64),
+                borders,
             )
-            / 1e3
+    
+    # Buckets each stage runs in, by group
+    spans = (
+        pd.DataFrame(
+            {
+                "group": group,
+                COL_ID_STAGE: df[COL_ID_STAGE].values,
+                COL_TASK_DATE_START: date_start,
+                COL_TASK_DATE_END: date_end,
+            }
         )
-        
-        # TODOish Launch time of any task related to the stage
-        # can be very far from stage submission time
-        start_date = pd.to_datetime(
-            stage["Stage Info"]["Submission Time"] * 1e6
+        .groupby(["group", COL_ID_STAGE], sort=True)
+        .agg(
+            {
+                COL_TASK_DATE_START: "min",
+                COL_TASK_DATE_END: "max",
+            }
         )
-        end_date = pd.to_datetime(stage["Stage Info"]["Completion Time"] * 1e6)
-        
-        data_stage_single.append(
+        .reset_index()
+    )
+    
+    # Bucket i is the interval (borders[i], borders[i + 1]]
+    bucket_last = np.clip(
+        np.searchsorted(borders, spans[COL_TASK_DATE_END].values, side="left")
+        - 1,
+        0,
+        buckets - 1,
+    )
+    bucket_first = np.minimum(
+        np.clip(
+            np.searchsorted(
+                borders,
+                spans[COL_TASK_DATE_START].values,
+                side="right",
+            )
+            - 1,
+            0,
+            buckets - 1,
+        ),
+        bucket_last,
+    )
+    
+    _spanned = bucket_last - bucket_first + 1
+    _index_span = np.repeat(np.arange(len(spans)), _spanned)
+    
+    grouped = (
+        pd.DataFrame(
             {
-                COL_ID_STAGE: stage_id,
-                COL_STAGE_DATE_START: start_date,
-                COL_STAGE_DATE_END: end_date,
-                COL_STAGE_DURATION: stage_duration,
+                "group": spans["group"].values[_index_span],
+                COL_SUBSTAGE_INDEX: (
+                    bucket_first[_index_span]
+                    + np.arange(_spanned.sum())
+                    - np.repeat(np.cumsum(_spanned) - _spanned, _spanned)
+                ),
+                COL_ID_STAGE: spans[COL_ID_STAGE].values[_index_span],
             }
         )
+        .groupby(["group", COL_SUBSTAGE_INDEX], sort=True)
+        .agg(
+            {
+                COL_ID_STAGE: "unique",
+            }
+        )
+        .reset_index()
+    )
+    
+    _group = grouped["group"].values
+    substage_index = grouped[COL_SUBSTAGE_INDEX].values
+    
+    for _col in cols_groupby:
+        grouped.loc[:, _col] = (
+            df[_col].values[_order[_bounds[:-1]]][_group]
+        )
+    
+    for _metric in metrics:
+        grouped.loc[:, _metric] = sums[_metric][_group, substage_index]
+    
+    grouped.loc[:, COL_SUBSTAGE_DATE_START] = borders[substage_index]
+    grouped.loc[:, COL_SUBSTAGE_DATE_END] = borders[substage_index + 1]
+    
+    grouped.loc[:, COL_SUBSTAGE_DURATION] = (
+        borders[substage_index + 1]
+        - borders[substage_index]
+    )
     
-    _df_stage = pd.DataFrame(data_stage_single)
+    return grouped[
+        cols_groupby
+        + [
+            COL_SUBSTAGE_INDEX,
+            COL_ID_STAGE,
+        ]
+        + metrics
+        + [
+            COL_SUBSTAGE_DATE_START,
+            COL_SUBSTAGE_DATE_END,
+            COL_SUBSTAGE_DURATION,
+        ]
+    ]
+
+
+def create_task_concurrency(
+    task_info: pd.DataFrame,
+) -> pd.DataFrame:
+    """Create the number of tasks running over time.
+    
+    Task starts and ends are sorted as +1 and -1 events,
+    and their cumulative sum is the number of tasks running
+    from each event time until the next one.
+    
+    Parameters
+    ----------
+    task_info : pd.DataFrame
+        DataFrame of task information.
+
+    Returns
+    -------
+    pd.DataFrame
+        Step function of the tasks running, with columns:
+        
+        * date__concurrency: time of the step, as int64 ns
+        * tasks__concurrency: tasks running from the time of the step
+    
+    """
+    _tasks = len(task_info)
+    
+    dates = np.concatenate(
+        [
+            to_time_ns(task_info[COL_TASK_DATE_START]),
+            to_time_ns(task_info[COL_TASK_DATE_END]),
+        ]
+    )
+    
+    _order = np.argsort(dates, kind="stable")
+    dates = dates[_order]
+    
+    tasks_running = np.cumsum(
+        np.concatenate(
+            [
+                np.ones(_tasks, dtype=np.int64),
+                -np.ones(_tasks, dtype=np.int64),
+            ]
+        )[_order]
+    )
     
-    return _df_stage
+    # Tasks running after all the events at the same time
+    _step = np.append(dates[1:] != dates[:-1], True)
+    
+    return pd.DataFrame(
+        {
+            COL_CONCURRENCY_DATE: dates[_step],
+            COL_CONCURRENCY_TASKS: tasks_running[_step],
+        }
+    )
+
+
+def create_duration_stage(
+    stage_index: Dict[Tuple[int, int], dict],
+) -> pd.DataFrame:
+    """Create the duration of the completed stages.
+    
+    A stage retried after failing is completed more than once,
+    once per stage attempt: the latest attempt is kept.
+    
+    Parameters
+    ----------
+    stage_index : dict
+        Stage events, by stage id and stage attempt id,
+        see `index_event_stages`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Stage id, start date, end date and duration in seconds
+        of each completed stage.
+    
+    """
+    _stage_info = [
+        _stage["Stage Info"]
+        for _stage in stage_index.values()
+    ]
+    
+    _df_stage = (
+        pd.DataFrame(
+            {
+                COL_ID_STAGE: np.array(
+                    [_["Stage ID"] for _ in _stage_info],
+                    dtype=np.int64,
+                ),
+                "id_stage_attempt": np.array(
+                    [_.get("Stage Attempt ID", 0) for _ in _stage_info],
+                    dtype=np.int64,
+                ),
+                "time_submission": np.array(
+                    [_["Submission Time"] for _ in _stage_info],
+                    dtype=np.int64,
+                ),
+                "time_completion": np.array(
+                    [_["Completion Time"] for _ in _stage_info],
+                    dtype=np.int64,
+                ),
+            }
+        )
+        .sort_values([COL_ID_STAGE, "id_stage_attempt"])
+        .drop_duplicates(COL_ID_STAGE, keep="last")
+        .reset_index(drop=True)
+    )
+    
+    # TODOish Launch time of any task related to the stage
+    # can be very far from stage submission time
+    return pd.DataFrame(
+        {
+            COL_ID_STAGE: _df_stage[COL_ID_STAGE],
+            COL_STAGE_DATE_START: pd.to_datetime(
+                _df_stage["time_submission"] * 1e6
+            ),
+            COL_STAGE_DATE_END: pd.to_datetime(
+                _df_stage["time_completion"] * 1e6
+            ),
+            COL_STAGE_DURATION: (
+                (
+                    _df_stage["time_completion"]
+                    - _df_stage["time_submission"]
+                )
+                / 1e3
+            ),
+        }
+    )
@@ -1,4 +1,22 @@
 import os
+from pathlib import Path
 
 
 ROOT_TESTS = os.path.dirname(os.path.abspath(__file__))
+
+APP_LONG_DPU = 5
+APP_LONG_DPU_CPU = 8  # G.2X
+APP_LONG_FILE_PATH = (
+    Path(ROOT_TESTS)
+    / Path("test_e2e_spill_true")
+)
+
+APP_LONG_CLUSTER_CPU_NUMBER_TOTAL: int = (
+    (
+        # One of the DPU is the Master Node
+        (APP_LONG_DPU - 1)
+        * APP_LONG_DPU_CPU
+    )
+    # Driver
+    - 1
+)
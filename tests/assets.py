@@ -1,3 +1,4 @@
+import re
 from typing import List, Union
 
 import numpy as np
@@ -49,3 +50,38 @@ def assert_frame_equal_wo_order(
         expected,
         rtol=1e-2,
     )
+
+
+def render_hovertemplate(
+    trace,
+    index: int,
+) -> str:
+    """Render the hovertemplate of a trace point, as the browser would.
+    
+    Supports `%{customdata[i]}`, `%{text}`, `%{hovertext}` and `%{y}`
+    with a format.
+    """
+    def _render(_match):
+        _variable, _format = _match.group(1), _match.group(2)
+        
+        _customdata = re.fullmatch(r"customdata\[(\d+)\]", _variable)
+        
+        if _customdata is not None:
+            _value = trace.customdata[index][int(_customdata.group(1))]
+        else:
+            _value = getattr(trace, _variable)[index]
+        
+        if _format is None:
+            return str(_value)
+        
+        # d3-format rounds to integer
+        if _format.endswith("d"):
+            _value = int(round(float(_value)))
+        
+        return ("{:" + _format + "}").format(_value)
+    
+    return re.sub(
+        r"%\{([a-z\[\]0-9]+)(?::([^}]+))?\}",
+        _render,
+        trace.hovertemplate.replace("<extra></extra>", ""),
+    )
@@ -0,0 +1,21 @@
+import pytest
+
+from spark_sight.execute import extract_event_log
+from tests import APP_LONG_FILE_PATH
+
+
+@pytest.fixture(scope="session")
+def app_long_event_log():
+    """Task information and stages of the long application, parsed once."""
+    return extract_event_log(
+        APP_LONG_FILE_PATH,
+        workers=1,
+    )
+
+
+@pytest.fixture
+def app_long_task_info(
+    app_long_event_log,
+):
+    """Task information of the long application, copied for each test."""
+    return app_long_event_log[0].copy()
@@ -0,0 +1,140 @@
+import bz2
+import gzip
+import struct
+from pathlib import Path
+
+import pytest
+
+from spark_sight.log_parse.compression import (
+    CodecNotSupportedError,
+    detect_codec,
+    CODEC_GZIP,
+    CODEC_BZ2,
+    CODEC_LZ4,
+    CODEC_LZ4_FRAME,
+    CODEC_ZSTD,
+    CODEC_SNAPPY,
+)
+from spark_sight.log_parse.read import (
+    read_event_log_lines,
+    iter_event_log_lines,
+)
+from tests.log_parse import ROOT_TESTS_LOG_PARSE
+
+
+PATH_SPARK_EVENT_LOG = (
+    Path(ROOT_TESTS_LOG_PARSE)
+    / Path("spark_event_log__input.csv")
+)
+
+with open(PATH_SPARK_EVENT_LOG, "rb") as _file:
+    SPARK_EVENT_LOG = _file.read()
+
+
+def compress_lz4_block(
+    data: bytes,
+) -> bytes:
+    lz4_block = pytest.importorskip("lz4.block")
+
+    _compressed = lz4_block.compress(
+        data,
+        store_size=False,
+    )
+
+    return b"".join(
+        [
+            struct.pack("<8sBiii", b"LZ4Block", 0x20, len(_compressed), len(data), 0),
+            _compressed,
+            # End of stream
+            struct.pack("<8sBiii", b"LZ4Block", 0x10, 0, 0, 0),
+        ]
+    )
+
+
+def compress_snappy_xerial(
+    data: bytes,
+) -> bytes:
+    snappy = pytest.importorskip("snappy")
+
+    _chunks = [b"\x82SNAPPY\x00" + struct.pack(">ii", 1, 1)]
+
+    for _start in range(0, len(data), 1024):
+        _compressed = snappy.compress(data[_start:_start + 1024])
+        _chunks.append(struct.pack(">i", len(_compressed)) + _compressed)
+
+    return b"".join(_chunks)
+
+
+def compress_lz4_frame(
+    data: bytes,
+) -> bytes:
+    return pytest.importorskip("lz4.frame").compress(data)
+
+
+def compress_zstd(
+    data: bytes,
+) -> bytes:
+    return pytest.importorskip("zstandard").ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize(
+    "codec, file_name, compress",
+    [
+        (CODEC_GZIP, "app.gz", gzip.compress),
+        (CODEC_BZ2, "app.bz2", bz2.compress),
+        (CODEC_LZ4, "app.lz4", compress_lz4_block),
+        (CODEC_LZ4_FRAME, "app.lz4", compress_lz4_frame),
+        (CODEC_ZSTD, "app.zstd.inprogress", compress_zstd),
+        (CODEC_SNAPPY, "app.snappy", compress_snappy_xerial),
+    ],
+)
+def test_read_event_log_lines_compressed(
+    tmp_path,
+    codec,
+    file_name,
+    compress,
+):
+    _path = tmp_path / file_name
+    _path.write_bytes(compress(SPARK_EVENT_LOG))
+
+    assert detect_codec(_path) == codec
+
+    assert list(read_event_log_lines(_path)) == (
+        SPARK_EVENT_LOG.splitlines(keepends=True)
+    )
+
+    assert list(
+        iter_event_log_lines(
+            _path,
+            event_types=[],
+        )
+    ) == list(
+        iter_event_log_lines(
+            PATH_SPARK_EVENT_LOG,
+            event_types=[],
+        )
+    )
+
+
+def test_read_event_log_lines_compressed_concatenated(
+    tmp_path,
+):
+    _path = tmp_path / "app.gz"
+    _path.write_bytes(
+        gzip.compress(SPARK_EVENT_LOG[:1000])
+        + gzip.compress(SPARK_EVENT_LOG[1000:])
+    )
+
+    assert b"".join(read_event_log_lines(_path)) == SPARK_EVENT_LOG
+
+
+def test_detect_codec(
+    tmp_path,
+):
+    assert detect_codec(PATH_SPARK_EVENT_LOG) is None
+
+    _path = tmp_path / "app.lzf"
+    _path.write_bytes(b"ZV")
+
+    with pytest.raises(CodecNotSupportedError):
+        detect_codec(_path)
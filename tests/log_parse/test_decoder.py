@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from spark_sight.log_parse.decoder import (
+    check_json_decoder,
+    get_json_decoder,
+    import_json_decoder,
+    JSON_DECODERS,
+    JSON_DECODER_STDLIB,
+)
+
+
+LINE = b'{"Event":"SparkListenerStageCompleted","Stage Info":{"Stage ID":0}}'
+
+
+def test_get_json_decoder_stdlib():
+    (
+        json_decoder,
+        json_loads,
+    ) = get_json_decoder(JSON_DECODER_STDLIB)
+    
+    assert json_decoder == JSON_DECODER_STDLIB
+    assert json_loads is json.loads
+
+
+def test_get_json_decoder_auto():
+    (
+        json_decoder,
+        json_loads,
+    ) = get_json_decoder()
+    
+    assert json_decoder in JSON_DECODERS
+    assert json_loads(LINE) == json.loads(LINE)
+
+
+@pytest.mark.parametrize(
+    "json_decoder",
+    JSON_DECODERS,
+)
+def test_json_decoder_invalid_line(
+    json_decoder: str,
+):
+    json_loads = import_json_decoder(json_decoder)
+    
+    if json_loads is None:
+        pytest.skip(f"{json_decoder} not installed")
+    
+    assert json_loads(LINE) == json.loads(LINE)
+    
+    with pytest.raises(ValueError):
+        json_loads(LINE[:-5])
+
+
+def test_get_json_decoder_invalid():
+    with pytest.raises(ValueError):
+        get_json_decoder("yaml")
+
+
+def test_check_json_decoder():
+    check_json_decoder(None)
+    
+    for json_decoder in JSON_DECODERS:
+        check_json_decoder(json_decoder)
+    
+    with pytest.raises(ValueError):
+        check_json_decoder("yaml")
@@ -2,12 +2,21 @@ import json
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from pandas import Timestamp
 
 from spark_sight.log_parse.main import (
     extract_task_info,
     extract_event_stage, convert_line_to_metrics,
+    extract_task_fields,
+    extract_task_fields_raw,
+    extract_event_log_info,
+    index_event_stages,
+    TASK_EXTRACTION_FULL,
+    TASK_EXTRACTION_TARGETED,
+    TaskInfoBuilder,
 )
+from spark_sight.log_transform.main import convert_time_columns
 from tests.assets import assert_frame_equal_wo_order
 from tests.log_parse import ROOT_TESTS_LOG_PARSE
 
@@ -54,7 +63,7 @@ def test_extract_task_info_completed():
     )
 
     assert_frame_equal_wo_order(
-        result,
+        convert_time_columns(result, to_datetime=True),
         pd.read_csv(
             Path(ROOT_TESTS_LOG_PARSE)
             / Path("extract_task_info__incomplete__expected.csv")
@@ -104,10 +113,178 @@ def test_convert_line_to_metrics():
     
     assert result == {
         'id_task': 1, 'id_stage': 0, 'id_executor': 3,
-        'date_start': Timestamp('2022-03-30 12:59:16.108999936'),
-        'date_end': Timestamp('2022-03-30 12:59:30.470000128'),
+        'date_start': Timestamp('2022-03-30 12:59:16.109'),
+        'date_end': Timestamp('2022-03-30 12:59:30.470'),
+        'duration_cpu_usage': float('5981292588'),
+        'duration_cpu_overhead_serde': float('44113527'),
+        'duration_cpu_overhead_shuffle': float('259617517'),
+        'memory_spill_disk': 30,
+    }
+
+
+def test_extract_task_info_targeted():
+    lines_tasks = [
+        _
+        for _ in open(
+            Path(ROOT_TESTS_LOG_PARSE)
+            / Path("spark_event_log__input.csv"),
+            "rb",
+        ).readlines()
+        if json.loads(_)["Event"] == "SparkListenerTaskEnd"
+    ]
+    
+    result = extract_task_info(
+        lines_tasks=lines_tasks,
+        task_extraction=TASK_EXTRACTION_TARGETED,
+    )
+
+    assert_frame_equal_wo_order(
+        convert_time_columns(result, to_datetime=True),
+        pd.read_csv(
+            Path(ROOT_TESTS_LOG_PARSE)
+            / Path("extract_task_info__incomplete__expected.csv")
+        ),
+        cols_to_str="all",
+    )
+
+
+def test_extract_task_fields_raw():
+    task = {
+        "Event": "SparkListenerTaskEnd", "Stage ID": 2,
+        "Task End Reason": {"Reason": "Success"},
+        "Task Info": {
+            "Task ID": 7, "Launch Time": 1648645156109,
+            "Executor ID": "3", "Finish Time": 1648645170470,
+            "Accumulables": [
+                {"ID": 1, "Name": "Task ID", "Update": "\"Task ID\":9"},
+            ],
+        },
+        "Task Metrics": {
+            "Executor Deserialize CPU Time": 43113527,
+            "Executor CPU Time": 5981292588,
+            "Result Serialization Time": 1,
+            "Disk Bytes Spilled": 30,
+            "Shuffle Read Metrics": {"Fetch Wait Time": 0},
+            "Shuffle Write Metrics": {"Shuffle Write Time": 259617517},
+        },
+    }
+    
+    line = json.dumps(task, separators=(",", ":")).encode()
+    
+    assert extract_task_fields_raw(line) == extract_task_fields(task)
+    
+    # Not the expected shape, e.g. driver executor
+    assert extract_task_fields_raw(
+        line.replace(b'"Executor ID":"3"', b'"Executor ID":"driver"')
+    ) is None
+    assert extract_task_fields_raw(
+        line.replace(b'"Task Metrics"', b'"Metrics"')
+    ) is None
+
+
+def test_task_info_builder():
+    task_info_builder = TaskInfoBuilder()
+    
+    task_info_builder.append(
+        {
+            "Task ID": 1, "Stage ID": 0, "Executor ID": "3",
+            "Launch Time": 1648645156109, "Finish Time": 1648645170470,
+            "Executor CPU Time": 5981292588,
+            "Executor Deserialize CPU Time": 43113527,
+            "Result Serialization Time": 1,
+            "Fetch Wait Time": 0,
+            "Shuffle Write Time": 259617517,
+            "Disk Bytes Spilled": 30,
+        }
+    )
+    
+    assert len(task_info_builder) == 1
+    
+    result = task_info_builder.to_frame()
+    
+    assert result.dtypes.astype(str).to_dict() == {
+        'id_task': 'int64', 'id_stage': 'int64', 'id_executor': 'int64',
+        'date_start__task': 'int64',
+        'date_end__task': 'int64',
+        'duration_cpu_usage': 'float64',
+        'duration_cpu_overhead_serde': 'float64',
+        'duration_cpu_overhead_shuffle': 'float64',
+        'memory_spill_disk': 'float64',
+    }
+    
+    assert result.to_dict(orient="records")[0] == {
+        'id_task': 1, 'id_stage': 0, 'id_executor': 3,
+        'date_start__task': Timestamp('2022-03-30 12:59:16.109').value,
+        'date_end__task': Timestamp('2022-03-30 12:59:30.470').value,
         'duration_cpu_usage': float('5981292588'),
         'duration_cpu_overhead_serde': float('44113527'),
         'duration_cpu_overhead_shuffle': float('259617517'),
         'memory_spill_disk': 30,
     }
+
+
+@pytest.mark.parametrize(
+    "task_extraction",
+    [
+        TASK_EXTRACTION_TARGETED,
+        TASK_EXTRACTION_FULL,
+    ],
+)
+def test_extract_event_log_info(
+    task_extraction: str,
+):
+    (
+        result,
+        result_stages,
+    ) = extract_event_log_info(
+        open(
+            Path(ROOT_TESTS_LOG_PARSE)
+            / Path("spark_event_log__input.csv"),
+            "rb",
+        ).readlines(),
+        task_extraction=task_extraction,
+    )
+    
+    assert_frame_equal_wo_order(
+        convert_time_columns(result, to_datetime=True),
+        pd.read_csv(
+            Path(ROOT_TESTS_LOG_PARSE)
+            / Path("extract_task_info__incomplete__expected.csv")
+        ),
+        cols_to_str="all",
+    )
+    
+    assert result_stages[0] == {
+        "Event": "SparkListenerStageCompleted",
+        "Stage Info": {
+            "Stage ID": 0,
+            "Stage Attempt ID": 0,
+            "Submission Time": 1648645156071,
+            "Completion Time": 1648645177300
+        }
+    }
+
+
+def test_index_event_stages():
+    lines_stages = [
+        {
+            "Event": "SparkListenerStageCompleted",
+            "Stage Info": {
+                "Stage ID": _stage_id,
+                "Stage Attempt ID": _stage_attempt_id,
+                "Submission Time": 1648645156071,
+                "Completion Time": 1648645177300,
+            },
+        }
+        for _stage_id, _stage_attempt_id in (
+            (0, 0),
+            (1, 0),
+            (1, 1),
+        )
+    ]
+    
+    assert index_event_stages(lines_stages) == {
+        (0, 0): lines_stages[0],
+        (1, 0): lines_stages[1],
+        (1, 1): lines_stages[2],
+    }
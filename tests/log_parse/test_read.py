@@ -0,0 +1,329 @@
+import logging
+from pathlib import Path
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from spark_sight.execute import extract_event_log
+from spark_sight.log_parse.read import (
+    read_event_log_lines,
+    filter_event_log_lines,
+    extract_event_type,
+    split_event_log_ranges,
+    read_event_log_range,
+    iter_event_log_lines,
+    read_event_log_lines_mmap,
+    list_event_log_files,
+)
+from tests import APP_LONG_FILE_PATH
+from tests.log_parse import ROOT_TESTS_LOG_PARSE
+
+
+PATH_SPARK_EVENT_LOG = (
+    Path(ROOT_TESTS_LOG_PARSE)
+    / Path("spark_event_log__input.csv")
+)
+
+
+def test_read_event_log_lines(
+    caplog,
+):
+    caplog.set_level(logging.INFO)
+    
+    result = list(
+        read_event_log_lines(
+            PATH_SPARK_EVENT_LOG,
+            log_root="Reading",
+        )
+    )
+    
+    with open(PATH_SPARK_EVENT_LOG, "rb") as _file:
+        expected = _file.readlines()
+    
+    assert result == expected
+    
+    _messages = [
+        _record.getMessage()
+        for _record in caplog.records
+    ]
+    
+    assert [
+        _message.split(" (")[0]
+        for _message in _messages
+    ] == [
+        "Reading: 25%",
+        "Reading: 50%",
+        "Reading: 75%",
+    ]
+    assert all(
+        "lines/sec" in _message and "MB/s" in _message
+        for _message in _messages
+    )
+
+
+def test_filter_event_log_lines():
+    lines = [
+        b'{"Event":"SparkListenerTaskEnd","Stage ID":0}\n',
+        b'{"Event":"SparkListenerExecutorMetricsUpdate","Executor ID":"1"}\n',
+        b'{"Event":"SparkListenerStageCompleted","Stage Info":{}}\n',
+        b'{"Event": "SparkListenerJobStart"}\n',
+        b'{"Event":"SparkListenerTask',
+    ]
+    
+    result = list(
+        filter_event_log_lines(
+            lines,
+            event_types=[
+                "SparkListenerTaskEnd",
+                "SparkListenerStageCompleted",
+            ],
+        )
+    )
+    
+    # Lines not matching the expected prefix are left to the decoder
+    assert result == [
+        lines[0],
+        lines[2],
+        lines[3],
+        lines[4],
+    ]
+
+
+def test_extract_event_type():
+    assert extract_event_type(
+        b'{"Event":"SparkListenerTaskEnd","Stage ID":0}'
+    ) == b"SparkListenerTaskEnd"
+    
+    assert extract_event_type(
+        b'{"Stage ID":0,"Event":"SparkListenerTaskEnd"}'
+    ) is None
+
+
+@pytest.mark.parametrize(
+    "ranges",
+    [1, 2, 5, 1000],
+)
+def test_split_event_log_ranges(
+    ranges: int,
+):
+    result = split_event_log_ranges(
+        PATH_SPARK_EVENT_LOG,
+        ranges=ranges,
+    )
+    
+    with open(PATH_SPARK_EVENT_LOG, "rb") as _file:
+        expected = _file.readlines()
+    
+    assert 1 <= len(result) <= min(ranges, len(expected))
+    
+    assert [
+        _line
+        for _start, _end in result
+        for _line in read_event_log_range(
+            PATH_SPARK_EVENT_LOG,
+            start=_start,
+            end=_end,
+        )
+    ] == expected
+
+
+@pytest.mark.parametrize(
+    "use_mmap",
+    [True, False],
+)
+def test_iter_event_log_lines(
+    use_mmap: bool,
+):
+    event_types = ["SparkListenerStageCompleted"]
+    
+    with open(PATH_SPARK_EVENT_LOG, "rb") as _file:
+        expected = list(
+            filter_event_log_lines(
+                _file.readlines(),
+                event_types=event_types,
+            )
+        )
+    
+    assert len(expected) > 0
+    
+    result = [
+        _line
+        for _start, _end in split_event_log_ranges(
+            PATH_SPARK_EVENT_LOG,
+            ranges=3,
+        )
+        for _line in iter_event_log_lines(
+            PATH_SPARK_EVENT_LOG,
+            event_types=event_types,
+            start=_start,
+            end=_end,
+            use_mmap=use_mmap,
+        )
+    ]
+    
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "chunk_size",
+    [1, 7, 4096],
+)
+@pytest.mark.parametrize(
+    "newline_last",
+    [True, False],
+)
+def test_read_event_log_lines_mmap(
+    tmp_path,
+    monkeypatch,
+    chunk_size: int,
+    newline_last: bool,
+):
+    monkeypatch.setattr(
+        "spark_sight.log_parse.read.MMAP_CHUNK_SIZE",
+        chunk_size,
+    )
+    
+    lines = [
+        b'{"Event":"SparkListenerTaskEnd","Stage ID":1}\n',
+        b'{"Event":"SparkListenerTaskStart","Stage ID":1}\n',
+        b"\n",
+        b'{"Event":"SparkListenerStageCompleted"}\n',
+        b'{"Stage ID":2}\n',
+        b'{"Event":"SparkListenerTaskEnd","Stage ID":2}\n',
+    ]
+    
+    if not newline_last:
+        lines[-1] = lines[-1].rstrip(b"\n")
+    
+    path = tmp_path / "events"
+    path.write_bytes(b"".join(lines))
+    
+    assert list(
+        read_event_log_lines_mmap(path)
+    ) == list(
+        filter_event_log_lines(lines)
+    )
+
+
+def test_list_event_log_files(
+    tmp_path,
+):
+    for _name in [
+        "appstatus_app-1.inprogress",
+        "events_2_app-1.zstd",
+        "events_10_app-1.zstd",
+        "events_1_app-1.zstd",
+    ]:
+        (tmp_path / _name).write_bytes(b"")
+    
+    assert [
+        _path.name
+        for _path in list_event_log_files(tmp_path)
+    ] == [
+        "events_1_app-1.zstd",
+        "events_2_app-1.zstd",
+        "events_10_app-1.zstd",
+    ]
+    
+    (tmp_path / "events_1_app-1.zstd.compact").write_bytes(b"")
+    (tmp_path / "events_2_app-1.zstd.compact").write_bytes(b"")
+    
+    assert [
+        _path.name
+        for _path in list_event_log_files(tmp_path)
+    ] == [
+        "events_2_app-1.zstd.compact",
+        "events_10_app-1.zstd",
+    ]
+
+
+@pytest.mark.parametrize(
+    "use_mmap",
+    [
+        True,
+        False,
+    ]
+)
+def test_extract_event_log_parallel(
+    app_long_event_log,
+    use_mmap: bool,
+):
+    (
+        expected,
+        expected_stages,
+    ) = app_long_event_log
+    
+    (
+        result,
+        result_stages,
+    ) = extract_event_log(
+        APP_LONG_FILE_PATH,
+        workers=3,
+        range_size_min=1,
+        use_mmap=use_mmap,
+    )
+    
+    assert_frame_equal(
+        result,
+        expected,
+    )
+    
+    assert result_stages == expected_stages
+
+
+@pytest.mark.parametrize(
+    "compact",
+    [
+        False,
+        True,
+    ],
+)
+def test_extract_event_log_rolling(
+    app_long_event_log,
+    tmp_path,
+    compact: bool,
+):
+    (
+        expected,
+        expected_stages,
+    ) = app_long_event_log
+    
+    with open(APP_LONG_FILE_PATH, "rb") as _file:
+        lines = _file.readlines()
+    
+    _path_dir = tmp_path / "eventlog_v2_app-1"
+    _path_dir.mkdir()
+    (_path_dir / "appstatus_app-1").write_bytes(b"")
+    
+    # Out of lexicographic order past index 9
+    _borders = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, len(lines) // 2, len(lines)]
+    
+    for _index, (_start, _end) in enumerate(
+        zip(_borders[:-1], _borders[1:]),
+        start=1,
+    ):
+        (_path_dir / f"events_{_index}_app-1").write_bytes(
+            b"".join(lines[_start:_end])
+        )
+    
+    if compact:
+        # Compacted up to index 10, with the original file left behind
+        (_path_dir / "events_10_app-1.compact").write_bytes(
+            b"".join(lines[:_borders[-2]])
+        )
+        (_path_dir / "events_1_app-1").write_bytes(b"".join(lines))
+    
+    (
+        result,
+        result_stages,
+    ) = extract_event_log(
+        _path_dir,
+        workers=3,
+    )
+    
+    assert_frame_equal(
+        result,
+        expected,
+    )
+    
+    assert result_stages == expected_stages
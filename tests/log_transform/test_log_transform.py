@@ -6,16 +6,54 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pytest
 from pandas import CategoricalDtype
+from pandas.testing import assert_frame_equal
 
 from spark_sight.data_references import (
     COL_TASK_DATE_START,
     COL_TASK_DATE_END, COL_SUBSTAGE_DATE_INTERVAL,
+    COL_SUBSTAGE_INDEX,
+    COL_ID_STAGE,
+    COL_STAGE_DATE_START,
+    COL_STAGE_DATE_END,
+    COL_STAGE_DURATION,
+    COL_SUBSTAGE_DURATION,
+    COL_CONCURRENCY_DATE,
+    COL_CONCURRENCY_TASKS,
+    COL_ID_EXECUTOR,
+    COL_SUBSTAGE_DATE_START,
+    COL_SUBSTAGE_DATE_END,
 )
+from spark_sight.execute import (
+    create_df_fig_efficiency,
+    create_df_fig_spill,
+    split_tasks_on_borders,
+    METRICS_EFFICIENCY,
+    METRICS_SPILL,
+)
+from spark_sight.log_parse.main import TASK_METRICS
 from spark_sight.log_transform.main import \
     (
     determine_borders_of_stages_asoftasks, check_tasks_are_split_correctly,
+    assign_substage_index,
+    check_tasks_are_split_correctly_indexed,
+    from_time_ns,
+    create_duration_stage,
+    parse_resolution,
+    determine_borders_of_buckets,
+    aggregate_tasks_in_buckets,
+    create_task_concurrency,
+    coarsen_borders,
+    discard_split_tasks,
+    aggregate_tasks_in_substages,
+    aggregate_tasks_in_substages_indexed,
+    convert_time_columns,
+    split_on_borders_vectorized,
+    SPLIT_ENGINE_ITERATIVE,
+    SPLIT_ENGINE_VECTORIZED,
 )
+from tests import APP_LONG_CLUSTER_CPU_NUMBER_TOTAL
 from tests.log_transform import ROOT_TESTS_LOG_TRANSFORM
 
 
@@ -63,7 +101,7 @@ def test_determine_borders_of_stages_asoftasks():
         _input
     )
     
-    assert result == [
+    assert list(from_time_ns(result)) == [
         np.datetime64('2022-03-04T12:56:59.999999999'),
         np.datetime64('2022-03-04T12:58:00.000000000'),
         np.datetime64('2022-03-04T13:00:00.000000000'),
@@ -107,3 +145,537 @@ def test_check_tasks_are_split_correctly():
     check_tasks_are_split_correctly(
         _input
     )
+
+
+def test_check_tasks_are_split_correctly_indexed():
+    borders_all = list(
+        pd.to_datetime(
+            [
+                "2022-03-04 13:00:00",
+                "2022-03-04 13:01:00",
+                "2022-03-04 13:02:00",
+                "2022-03-04 13:03:00",
+            ]
+        ).values
+    )
+    
+    _input = pd.DataFrame(
+        {
+            COL_TASK_DATE_START: pd.to_datetime(
+                [
+                    "2022-03-04 13:00:00.000000001",
+                    "2022-03-04 13:01:00.000000001",
+                    "2022-03-04 13:01:30",
+                    "2022-03-04 13:02:00.000000001",
+                    "2022-03-04 13:03:00.000000001",
+                ]
+            ),
+            COL_TASK_DATE_END: pd.to_datetime(
+                [
+                    "2022-03-04 13:01:00",
+                    "2022-03-04 13:01:30",
+                    "2022-03-04 13:02:00",
+                    "2022-03-04 13:03:00",
+                    "2022-03-04 13:04:00",
+                ]
+            ),
+        }
+    )
+    
+    _input.loc[:, COL_SUBSTAGE_INDEX] = assign_substage_index(
+        _input,
+        borders_all,
+    )
+    
+    assert list(_input[COL_SUBSTAGE_INDEX]) == [0, 1, 1, 2, -1]
+    
+    check_tasks_are_split_correctly_indexed(
+        _input,
+        borders_all,
+    )
+    
+    # Task running across a border
+    _input.loc[1, COL_TASK_DATE_START] = borders_all[0]
+    
+    with pytest.raises(ValueError):
+        check_tasks_are_split_correctly_indexed(
+            _input,
+            borders_all,
+        )
+
+
+def test_create_duration_stage():
+    stage_index = {
+        (_stage_id, _stage_attempt_id): {
+            "Event": "SparkListenerStageCompleted",
+            "Stage Info": {
+                "Stage ID": _stage_id,
+                "Stage Attempt ID": _stage_attempt_id,
+                "Submission Time": _submission_time,
+                "Completion Time": _completion_time,
+            },
+        }
+        for (
+            _stage_id,
+            _stage_attempt_id,
+            _submission_time,
+            _completion_time,
+        ) in (
+            (1, 1, 1648645180000, 1648645190000),
+            (1, 0, 1648645160000, 1648645170000),
+            (0, 0, 1648645156071, 1648645177300),
+        )
+    }
+    
+    result = create_duration_stage(stage_index)
+    
+    # Latest attempt of retried stage
+    assert result.to_dict(orient="records") == [
+        {
+            COL_ID_STAGE: 0,
+            COL_STAGE_DATE_START: pd.to_datetime(1648645156071 * 1e6),
+            COL_STAGE_DATE_END: pd.to_datetime(1648645177300 * 1e6),
+            COL_STAGE_DURATION: 21.229,
+        },
+        {
+            COL_ID_STAGE: 1,
+            COL_STAGE_DATE_START: pd.to_datetime(1648645180000 * 1e6),
+            COL_STAGE_DATE_END: pd.to_datetime(1648645190000 * 1e6),
+            COL_STAGE_DURATION: 10.0,
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    "resolution,expected",
+    [
+        ("stages", None),
+        ("auto", 0),
+        ("1s", 10**9),
+        ("500ms", 5 * 10**8),
+        ("0s", ValueError),
+        ("every second", ValueError),
+    ],
+)
+def test_parse_resolution(
+    resolution,
+    expected,
+):
+    if expected is ValueError:
+        with pytest.raises(ValueError):
+            parse_resolution(resolution)
+    
+    else:
+        assert parse_resolution(resolution) == expected
+
+
+def test_aggregate_tasks_in_buckets():
+    _second = 10**9
+    
+    _input = pd.DataFrame(
+        {
+            COL_ID_STAGE: [0, 1, 1],
+            "id_executor": [1, 1, 2],
+            COL_TASK_DATE_START: [1, 1 * _second, 2 * _second],
+            COL_TASK_DATE_END: [3 * _second, 2 * _second, 2 * _second],
+            "duration_cpu_usage": [300.0, 100.0, 10.0],
+        }
+    )
+    
+    borders_all = determine_borders_of_buckets(
+        _input,
+        width=_second,
+    )
+    
+    assert list(borders_all) == [0, _second, 2 * _second, 3 * _second]
+    
+    result = aggregate_tasks_in_buckets(
+        _input,
+        borders_all,
+        metrics=["duration_cpu_usage"],
+    )
+    
+    assert list(result[COL_SUBSTAGE_INDEX]) == [0, 1, 2]
+    assert (
+        result[COL_ID_STAGE].map(list).tolist()
+        == [[0], [0, 1], [0]]
+    )
+    assert np.allclose(
+        result["duration_cpu_usage"],
+        # Task without duration counts in the bucket it ends in
+        [100.0, 100.0 + 100.0 + 10.0, 100.0],
+    )
+    assert list(result[COL_SUBSTAGE_DURATION]) == [_second] * 3
+    
+    result = aggregate_tasks_in_buckets(
+        _input,
+        borders_all,
+        metrics=["duration_cpu_usage"],
+        cols_groupby=["id_executor"],
+    )
+    
+    assert list(result["id_executor"]) == [1, 1, 1, 2]
+    assert list(result[COL_SUBSTAGE_INDEX]) == [0, 1, 2, 1]
+    assert np.allclose(
+        result["duration_cpu_usage"],
+        [100.0, 200.0, 100.0, 10.0],
+    )
+
+
+@pytest.mark.parametrize(
+    "width,buckets_max,width_min,expected",
+    [
+        (10, None, None, [-1, 9, 19, 29, 39]),
+        (10, 4, None, [-1, 9, 19, 29, 39]),
+        # 4 buckets widened to 2 * 10 to be at most 3
+        (10, 3, None, [-1, 19, 39]),
+        # Widened to 2 * 10 to be at least 15 wide
+        (10, None, 15, [-1, 19, 39]),
+        (10, 1, None, [-1, 39]),
+    ],
+)
+def test_determine_borders_of_buckets(
+    width,
+    buckets_max,
+    width_min,
+    expected,
+):
+    _input = pd.DataFrame(
+        {
+            COL_TASK_DATE_START: [0, 10],
+            COL_TASK_DATE_END: [20, 35],
+        }
+    )
+    
+    result = determine_borders_of_buckets(
+        _input,
+        width=width,
+        buckets_max=buckets_max,
+        width_min=width_min,
+    )
+    
+    assert list(result) == expected
+
+
+def test_create_task_concurrency():
+    _input = pd.DataFrame(
+        {
+            COL_TASK_DATE_START: [0, 10, 10, 20, 40],
+            COL_TASK_DATE_END: [30, 20, 10, 30, 50],
+        }
+    )
+    
+    result = create_task_concurrency(_input)
+    
+    # Tasks ending and starting at the same time do not overlap
+    assert result.to_dict(orient="list") == {
+        COL_CONCURRENCY_DATE: [0, 10, 20, 30, 40, 50],
+        COL_CONCURRENCY_TASKS: [1, 2, 2, 0, 1, 0],
+    }
+
+
+def test_create_task_concurrency_straggler():
+    _second = 10**9
+    
+    # 100 tasks of 1 s, and a straggler of 100 s
+    _input = pd.DataFrame(
+        {
+            COL_TASK_DATE_START: [0] * 101,
+            COL_TASK_DATE_END: [_second] * 100 + [100 * _second],
+        }
+    )
+    
+    result = create_task_concurrency(_input)
+    
+    # The straggler runs alone on idle cores
+    assert result.to_dict(orient="list") == {
+        COL_CONCURRENCY_DATE: [0, _second, 100 * _second],
+        COL_CONCURRENCY_TASKS: [101, 1, 0],
+    }
+
+
+@pytest.mark.parametrize(
+    "substages_max,width_min,expected",
+    [
+        (None, None, [0, 1, 2, 10, 11, 28, 30]),
+        (10, None, [0, 1, 2, 10, 11, 28, 30]),
+        # At least 10 wide, last substage merged into the previous one
+        (None, 10, [0, 10, 30]),
+        (None, 25, [0, 30]),
+        # At least 30 // 4 + 1 = 8 wide
+        (4, None, [0, 10, 30]),
+        (1, None, [0, 30]),
+    ],
+)
+def test_coarsen_borders(
+    substages_max,
+    width_min,
+    expected,
+):
+    result = coarsen_borders(
+        np.array([0, 1, 2, 10, 11, 28, 30], dtype=np.int64),
+        substages_max=substages_max,
+        width_min=width_min,
+    )
+    
+    assert list(result) == expected
+
+
+def test_split_engine_vectorized(
+    app_long_task_info,
+):
+    borders_of_stages_asoftasks = determine_borders_of_stages_asoftasks(
+        app_long_task_info,
+    )
+    
+    task_info_split = {
+        _split_engine: split_tasks_on_borders(
+            app_long_task_info,
+            borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+            split_engine=_split_engine,
+        )
+        for _split_engine in (
+            SPLIT_ENGINE_ITERATIVE,
+            SPLIT_ENGINE_VECTORIZED,
+        )
+    }
+    
+    for _create_df_fig, _kwargs in (
+        (create_df_fig_efficiency, dict(cpus_available=30)),
+        (create_df_fig_spill, dict()),
+    ):
+        (
+            expected,
+            result,
+        ) = (
+            _create_df_fig(
+                task_info_split[_split_engine],
+                borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+                **_kwargs,
+            )
+            for _split_engine in (
+                SPLIT_ENGINE_ITERATIVE,
+                SPLIT_ENGINE_VECTORIZED,
+            )
+        )
+        
+        assert_frame_equal(
+            result.drop(columns=COL_ID_STAGE),
+            expected.drop(columns=COL_ID_STAGE),
+            check_dtype=False,
+            rtol=1e-6,
+        )
+        
+        assert (
+            result[COL_ID_STAGE].map(sorted).tolist()
+            == expected[COL_ID_STAGE].map(sorted).tolist()
+        )
+
+
+@pytest.mark.parametrize(
+    "metrics",
+    [
+        METRICS_EFFICIENCY,
+        METRICS_SPILL,
+    ],
+)
+def test_split_tasks_on_borders_once(
+    app_long_task_info,
+    metrics,
+):
+    borders_of_stages_asoftasks = determine_borders_of_stages_asoftasks(
+        app_long_task_info,
+    )
+    
+    (
+        expected,
+        result,
+    ) = (
+        discard_split_tasks(
+            split_tasks_on_borders(
+                app_long_task_info,
+                borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+                metrics=_metrics,
+            ),
+            metrics=metrics,
+        )
+        .sort_values(["id_task", "date_start__task"])
+        .reset_index(drop=True)
+        # Other metrics are split only when splitting all of them
+        .drop(
+            columns=[
+                _metric
+                for _metric in TASK_METRICS
+                if _metric not in metrics
+            ]
+        )
+        for _metrics in (
+            metrics,
+            None,
+        )
+    )
+    
+    assert_frame_equal(
+        result,
+        expected,
+    )
+
+
+@pytest.mark.parametrize(
+    "metrics,cols_groupby",
+    [
+        (METRICS_EFFICIENCY, []),
+        (METRICS_SPILL, [COL_ID_EXECUTOR]),
+    ],
+)
+def test_aggregate_tasks_in_substages_indexed(
+    app_long_task_info,
+    metrics,
+    cols_groupby,
+):
+    borders_of_stages_asoftasks = determine_borders_of_stages_asoftasks(
+        app_long_task_info,
+    )
+    
+    task_info_split = discard_split_tasks(
+        split_tasks_on_borders(
+            app_long_task_info,
+            borders_of_stages_asoftasks=borders_of_stages_asoftasks,
+        ),
+        metrics=metrics,
+    )
+    
+    # Aggregating on datetimes, as the interval aggregation
+    expected = aggregate_tasks_in_substages(
+        convert_time_columns(task_info_split, to_datetime=True),
+        borders_all=list(from_time_ns(borders_of_stages_asoftasks)),
+        metrics=metrics,
+        cols_groupby=cols_groupby + [COL_SUBSTAGE_DATE_INTERVAL],
+    )
+    
+    result = aggregate_tasks_in_substages_indexed(
+        task_info_split.copy(),
+        borders_all=borders_of_stages_asoftasks,
+        metrics=metrics,
+        cols_groupby=cols_groupby,
+    )
+    
+    for _col in (
+        COL_SUBSTAGE_DATE_START,
+        COL_SUBSTAGE_DATE_END,
+    ):
+        result[_col] = from_time_ns(result[_col])
+    
+    assert_frame_equal(
+        result.drop(columns=[COL_SUBSTAGE_INDEX, COL_ID_STAGE]),
+        expected.drop(columns=[COL_SUBSTAGE_DATE_INTERVAL, COL_ID_STAGE]),
+        check_dtype=False,
+    )
+    
+    assert (
+        result[COL_ID_STAGE].map(list).tolist()
+        == expected[COL_ID_STAGE].map(list).tolist()
+    )
+
+
+@pytest.mark.parametrize(
+    "substages_max",
+    [
+        1,
+        5,
+    ],
+)
+def test_coarsen_borders_efficiency(
+    app_long_task_info,
+    substages_max: int,
+):
+    borders_all = determine_borders_of_stages_asoftasks(
+        app_long_task_info,
+    )
+    
+    borders_coarse = coarsen_borders(
+        borders_all,
+        substages_max=substages_max,
+    )
+    
+    assert len(borders_coarse) - 1 <= substages_max
+    
+    (
+        expected,
+        result,
+    ) = (
+        create_df_fig_efficiency(
+            split_tasks_on_borders(
+                app_long_task_info,
+                borders_of_stages_asoftasks=_borders,
+            ),
+            cpus_available=APP_LONG_CLUSTER_CPU_NUMBER_TOTAL,
+            borders_of_stages_asoftasks=_borders,
+        )
+        for _borders in (
+            borders_all,
+            borders_coarse,
+        )
+    )
+    
+    # Efficiency of merged substages is weighted by duration
+    for _metric in METRICS_EFFICIENCY:
+        _col = f"efficiency__{_metric}"
+        
+        assert np.isclose(
+            (result[_col] * result[COL_SUBSTAGE_DURATION]).sum(),
+            (expected[_col] * expected[COL_SUBSTAGE_DURATION]).sum(),
+            rtol=1e-9,
+        )
+
+
+@pytest.mark.parametrize(
+    "metrics,cols_groupby",
+    [
+        (METRICS_EFFICIENCY, []),
+        (METRICS_SPILL, [COL_ID_EXECUTOR]),
+    ],
+)
+def test_aggregate_tasks_in_buckets_as_split(
+    app_long_task_info,
+    metrics,
+    cols_groupby,
+):
+    borders_all = determine_borders_of_buckets(
+        app_long_task_info,
+        width=10**9,
+    )
+    
+    # Same as splitting the tasks on the borders of the buckets
+    expected = aggregate_tasks_in_substages_indexed(
+        split_on_borders_vectorized(
+            app_long_task_info,
+            borders_all=borders_all,
+            metrics=metrics,
+        ),
+        borders_all=borders_all,
+        metrics=metrics,
+        cols_groupby=cols_groupby,
+    )
+    
+    result = aggregate_tasks_in_buckets(
+        app_long_task_info,
+        borders_all=borders_all,
+        metrics=metrics,
+        cols_groupby=cols_groupby,
+    )
+    
+    merged = result.merge(
+        expected,
+        on=cols_groupby + [COL_SUBSTAGE_INDEX],
+        how="left",
+        suffixes=("", "__expected"),
+    ).fillna(0)
+    
+    for _metric in metrics:
+        assert np.allclose(
+            merged[_metric],
+            merged[f"{_metric}__expected"],
+            rtol=1e-6,
+            atol=1,
+        )
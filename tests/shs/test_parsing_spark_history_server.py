@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.subplots import make_subplots
+
+from spark_sight.create_charts.parsing_spark_history_server import (
+    assign_y_to_stages,
+    create_customdata_date_range,
+    create_hovertext_stages,
+    create_trace_timeline,
+    create_chart_efficiency,
+    create_chart_spill,
+    GANTT_BARS_DISTANCE,
+)
+from spark_sight.data_references import (
+    COL_ID_EXECUTOR,
+    COL_ID_STAGE,
+    COL_SUBSTAGE_DATE_START,
+    COL_SUBSTAGE_DATE_END,
+    COL_SUBSTAGE_DURATION,
+)
+from tests.assets import render_hovertemplate
+
+
+@pytest.mark.parametrize(
+    "lanes_max,expected",
+    [
+        # Stage 3 takes the lane of stage 0, ended before its start
+        (None, {"0": 0, "1": 1, "2": 2, "3": 0, "4": 0}),
+        # Stage 2 takes the lane ending first, of stage 0
+        (2, {"0": 0, "1": 1, "2": 0, "3": 0, "4": 0}),
+        (1, {"0": 0, "1": 0, "2": 0, "3": 0, "4": 0}),
+    ],
+)
+def test_assign_y_to_stages(
+    lanes_max,
+    expected,
+):
+    df_stages = pd.DataFrame(
+        {
+            COL_ID_STAGE: [4, 3, 2, 1, 0],
+            COL_SUBSTAGE_DATE_START: pd.to_datetime([50, 30, 20, 10, 0], unit="s"),
+            COL_SUBSTAGE_DATE_END: pd.to_datetime([60, 40, 30, 40, 25], unit="s"),
+        }
+    )
+    
+    result = assign_y_to_stages(
+        df_stages,
+        lanes_max=lanes_max,
+    )
+    
+    assert result == {
+        _stage: GANTT_BARS_DISTANCE * _lane
+        for _stage, _lane in expected.items()
+    }
+
+
+@pytest.mark.parametrize(
+    "duration,expected",
+    [
+        (0.04, [0, 0, 0.0]),
+        (59.96, [0, 1, 0.0]),
+        (5400.0, [1, 30, 0.0]),
+        (90061.25, [25, 1, 1.2]),
+    ],
+)
+def test_create_customdata_date_range(
+    duration,
+    expected,
+):
+    _start = pd.Series(pd.to_datetime([3661], unit="s"))
+    
+    result = create_customdata_date_range(
+        _start,
+        _start + pd.Timedelta(seconds=duration),
+        pd.Series([duration]),
+    )
+    
+    assert [_[0] for _ in result[:3]] == [1, 1, 1]
+    assert [_[0] for _ in result[6:]] == pytest.approx(expected)
+
+
+def test_create_hovertext_stages():
+    result = create_hovertext_stages(
+        pd.Series([[3], [0, 1]]),
+    )
+    
+    assert list(result) == [
+        "Stage: <b>3</b>",
+        "Stages: <b>0, 1</b>",
+    ]
+
+
+def test_create_trace_timeline():
+    df = pd.DataFrame(
+        {
+            # Substages start 1 ns before the tasks
+            COL_SUBSTAGE_DATE_START: pd.to_datetime(
+                [1648645156098999999, 1648645177298999999],
+            ),
+            COL_SUBSTAGE_DATE_END: pd.to_datetime(
+                [1648645177299000000, 1648645177300000000],
+            ),
+            "y": [0.0, 0.5],
+            "y_labels": ["0", "1"],
+            "memory_spill_disk": [10.0, 20.0],
+        }
+    )
+    
+    result = create_trace_timeline(
+        df,
+        col_y="y",
+        col_text="y_labels",
+        col_color="memory_spill_disk",
+    )
+    
+    # Dates rounded to ms
+    assert list(result.base) == list(
+        np.array(
+            ["2022-03-30T12:59:16.099", "2022-03-30T12:59:37.299"],
+            dtype="datetime64[ms]",
+        )
+    )
+    assert list(result.x) == [21200.0, 1.0]
+    assert result.orientation == "h"
+    assert list(result.marker.color) == [10.0, 20.0]
+    assert result.marker.coloraxis == "coloraxis"
+
+
+def test_create_chart_efficiency_webgl():
+    df = pd.DataFrame(
+        {
+            COL_SUBSTAGE_DATE_START: pd.to_datetime([0, 10, 30], unit="s"),
+            COL_SUBSTAGE_DATE_END: pd.to_datetime([10, 20, 40], unit="s"),
+            COL_SUBSTAGE_DURATION: [10.0, 10.0, 10.0],
+            COL_ID_STAGE: [[0], [0, 1], [2]],
+            "efficiency__duration_cpu_usage": [0.5, 0.25, 1.0],
+            "efficiency__duration_cpu_overhead_serde": [0.25, 0.25, 0.0],
+        }
+    )
+    
+    fig = make_subplots(rows=1)
+    
+    create_chart_efficiency(
+        df,
+        fig,
+        cpus_available=4,
+        webgl=True,
+    )
+    
+    # Steps of the substages, at zero before and after the gap
+    assert list(fig.data[0].x) == list(
+        pd.to_datetime([0, 0, 10, 10, 20, 20, 30, 30, 40, 40], unit="s")
+    )
+    assert list(fig.data[0].y) == [0, 0.5, 0.5, 0.25, 0.25, 0, 0, 1.0, 1.0, 0]
+    assert list(fig.data[1].y) == [0, 0.75, 0.75, 0.5, 0.5, 0, 0, 1.0, 1.0, 0]
+    assert [_.fill for _ in fig.data] == ["tozeroy", "tonexty"]
+    
+    # Hover shows the metric, not the stacked value
+    assert list(fig.data[1].customdata[3]) == [
+        0, 0, 10, 0, 0, 20, 0, 0, 10.0, 0.25,
+    ]
+    assert fig.data[1].hovertext[3] == "Stages: <b>0, 1</b>"
+    assert (
+        render_hovertemplate(fig.data[1], 3)
+        == "00:00:10 to 00:00:20 (0h 00m 10.0s)"
+        "<br><b>25.0%</b> (Serialization, deserialization)"
+        "<br>Stages: <b>0, 1</b>"
+    )
+
+
+def test_create_chart_spill_heatmap():
+    df = pd.DataFrame(
+        {
+            COL_ID_EXECUTOR: [2.0, 7.0],
+            COL_SUBSTAGE_DATE_START: pd.to_datetime([0, 10], unit="s"),
+            COL_SUBSTAGE_DATE_END: pd.to_datetime([10, 20], unit="s"),
+            COL_ID_STAGE: [[0], [1]],
+            "memory_spill_disk": [10.0, 20.0],
+        }
+    )
+    
+    fig = make_subplots(rows=1)
+    
+    create_chart_spill(
+        df,
+        fig,
+        col_y=COL_ID_EXECUTOR,
+        row=1,
+        col_color="memory_spill_disk",
+        app_info={
+            COL_ID_EXECUTOR: [1, 2, 7],
+            COL_SUBSTAGE_DATE_START: pd.Timestamp(0),
+            COL_SUBSTAGE_DATE_END: pd.Timestamp(20, unit="s"),
+        },
+        webgl=True,
+    )
+    
+    # Executors without spill in between have their own empty rows
+    assert list(fig.data[0].y) == [1, 2, 3, 4, 5, 6, 7]
+    assert np.isnan(fig.data[0].z[2:6]).all()
+    assert fig.data[0].z[1][0] == 10.0
+    assert fig.data[0].z[6][1] == 20.0
@@ -2,6 +2,7 @@ from ast import literal_eval
 from pathlib import Path
 
 import pandas as pd
+import pytest
 
 from spark_sight.data_references import (
     COL_TASK_DATE_START,
@@ -12,6 +13,9 @@ from spark_sight.data_references import (
 from spark_sight.log_transform.main import (
     determine_borders_of_stages_asoftasks,
     split_on_borders,
+    split_on_borders_vectorized,
+    convert_time_columns,
+    from_time_ns,
 )
 from tests.assets import assert_frame_equal_wo_order
 from tests.shs import ROOT_TESTS_SHS
@@ -21,7 +25,7 @@ def _assert_equal_to_expected(
     result,
     expected_file_name: str,
 ):
-    result = result.copy()
+    result = convert_time_columns(result, to_datetime=True)
     
     expected = pd.read_csv(
         expected_file_name,
@@ -34,6 +38,10 @@ def _assert_equal_to_expected(
         converters={COL_SPLIT_BORDERS_LIST: literal_eval},
     )
     
+    # The vectorized split does not list the borders used
+    if COL_SPLIT_BORDERS_LIST not in result.columns:
+        expected = expected.drop(columns=COL_SPLIT_BORDERS_LIST)
+    
     for _df in (
         result,
         expected,
@@ -51,7 +59,16 @@ def _assert_equal_to_expected(
     )
 
 
-def test_split_on_borders__split_single_no():
+@pytest.mark.parametrize(
+    "_split_on_borders",
+    [
+        split_on_borders,
+        split_on_borders_vectorized,
+    ],
+)
+def test_split_on_borders__split_single_no(
+    _split_on_borders,
+):
     _input = pd.read_csv(
         Path(ROOT_TESTS_SHS)
         / Path("split_on_borders__split_single_no.csv"),
@@ -65,9 +82,10 @@ def test_split_on_borders__split_single_no():
         _input,
     )
     
-    result = split_on_borders(
-        _input,
-        borders_all,
+    # Splitting on datetimes, as the iterative split
+    result = _split_on_borders(
+        convert_time_columns(_input, to_datetime=True),
+        list(from_time_ns(borders_all)),
         metrics=["duration_cpu_usage"],
     )
     
@@ -80,7 +98,16 @@ def test_split_on_borders__split_single_no():
     )
     
 
-def test_split_on_borders__split_multiple():
+@pytest.mark.parametrize(
+    "_split_on_borders",
+    [
+        split_on_borders,
+        split_on_borders_vectorized,
+    ],
+)
+def test_split_on_borders__split_multiple(
+    _split_on_borders,
+):
     _input = pd.read_csv(
         Path(ROOT_TESTS_SHS) / Path("split_on_borders__split_multiple.csv"),
         parse_dates=[
@@ -93,9 +120,10 @@ def test_split_on_borders__split_multiple():
         _input,
     )
     
-    result = split_on_borders(
-        _input,
-        borders_all,
+    # Splitting on datetimes, as the iterative split
+    result = _split_on_borders(
+        convert_time_columns(_input, to_datetime=True),
+        list(from_time_ns(borders_all)),
         metrics=["duration_cpu_usage"],
     )
 
@@ -0,0 +1,137 @@
+import base64
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from spark_sight.create_charts.typed_arrays import (
+    encode_typed_array,
+    encode_typed_arrays,
+)
+
+
+def _decode(encoded: dict) -> np.ndarray:
+    decoded = np.frombuffer(
+        base64.b64decode(encoded["bdata"]),
+        dtype=f"<{encoded['dtype']}",
+    )
+    
+    if "shape" in encoded:
+        decoded = decoded.reshape(
+            [int(_) for _ in encoded["shape"].split(",")]
+        )
+    
+    return decoded
+
+
+@pytest.mark.parametrize(
+    "values,dtype_expected,expected",
+    [
+        (
+            pd.to_datetime([1648645156099000001, 1648645177300000000]).values,
+            "i8",
+            [1648645156099, 1648645177300],
+        ),
+        (
+            np.array([datetime(2022, 3, 30, 12, 59, 16, 99000)], dtype=object),
+            "i8",
+            [1648645156099],
+        ),
+        (
+            [0.5, 21200.0],
+            "f4",
+            [0.5, 21200.0],
+        ),
+        (
+            [1, 2, 3],
+            "i4",
+            [1, 2, 3],
+        ),
+        (
+            [2**40],
+            "f8",
+            [2**40],
+        ),
+    ],
+)
+def test_encode_typed_array(
+    values,
+    dtype_expected,
+    expected,
+):
+    result = encode_typed_array(values)
+    
+    assert result["dtype"] == dtype_expected
+    assert list(_decode(result)) == expected
+
+
+def test_encode_typed_array_float64():
+    # Above 2^24, not exact as float32
+    result = encode_typed_array(
+        [2.0**24 + 1],
+        dtype_float="f8",
+    )
+    
+    assert result["dtype"] == "f8"
+    assert list(_decode(result)) == [2.0**24 + 1]
+
+
+def test_encode_typed_array_2d():
+    result = encode_typed_array(
+        np.array([[12, 59, 16, 21.2], [13, 0, 7, 12.9]]),
+    )
+    
+    assert result["shape"] == "2, 4"
+    assert _decode(result).tolist() == [
+        [12, 59, 16, np.float32(21.2)],
+        [13, 0, 7, np.float32(12.9)],
+    ]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        "green",
+        ["0", "1"],
+        [],
+        np.array([["a", 1]], dtype=object),
+    ],
+)
+def test_encode_typed_array_skipped(
+    values,
+):
+    assert encode_typed_array(values) is None
+
+
+def test_encode_typed_arrays():
+    fig = go.Figure(
+        go.Bar(
+            base=np.array(["2022-03-30T12:59:16.099"], dtype="datetime64[ms]"),
+            x=[21200.0],
+            y=[1.0],
+            text=["1.5 GB"],
+            marker_color=[1590212564.0],
+            customdata=[[12, 59, 16, 21.2]],
+            hovertext=["0, 1"],
+        )
+    )
+    
+    result = encode_typed_arrays(fig)["data"][0]
+    
+    assert list(_decode(result["base"])) == [1648645156099]
+    assert list(_decode(result["marker"]["color"])) == [np.float32(1590212564.0)]
+    
+    # Times as float64
+    assert result["x"]["dtype"] == "f8"
+    assert list(_decode(result["x"])) == [21200.0]
+    
+    assert result["customdata"]["dtype"] == "f4"
+    assert _decode(result["customdata"]).tolist() == [
+        [12, 59, 16, np.float32(21.2)],
+    ]
+    
+    # Not numeric
+    assert list(result["text"]) == ["1.5 GB"]
+    assert list(result["hovertext"]) == ["0, 1"]
@@ -4,32 +4,30 @@ from datetime import datetime
 from json import JSONDecodeError
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from spark_sight.execute import _main
+from spark_sight.execute import (
+    _main,
+    main,
+    export_figure,
+    PLOTLYJS_CDN,
+    PLOTLYJS_DIRECTORY,
+    PLOTLYJS_INLINE,
+    RENDER_SVG,
+    RENDER_WEBGL,
+)
+from spark_sight.log_transform.main import SUBSTAGES_MAX
 from spark_sight.util import configure_pandas
-from tests import ROOT_TESTS
-
-
-APP_LONG_APPLICATION_NAME = "test_e2e.txt"
-APP_LONG_DPU = 5
-APP_LONG_DPU_CPU = 8  # G.2X
-APP_LONG_FILE_PATH = (
-    Path(ROOT_TESTS)
-    / Path("test_e2e_spill_true")
+from tests import (
+    ROOT_TESTS,
+    APP_LONG_FILE_PATH,
 )
+from tests.assets import render_hovertemplate
 
 
-APP_LONG_CLUSTER_CPU_NUMBER_TOTAL: int = (
-    (
-        # One of the DPU is the Master Node
-        (APP_LONG_DPU - 1)
-        * APP_LONG_DPU_CPU
-    )
-    # Driver
-    - 1
-)
+APP_LONG_APPLICATION_NAME = "test_e2e.txt"
 
 APP_LONG_FILE = open(
     APP_LONG_FILE_PATH,
@@ -90,10 +88,21 @@ def test_e2e(
     INDEX_DATA_CHART_EFFICIENCY_SER = 1
     INDEX_DATA_CHART_EFFICIENCY_SHUFFLE = 2
     INDEX_DATA_CHART_SPILL = 3
+    # Added last
+    INDEX_DATA_CHART_CONCURRENCY = -1
+    
+    assert (
+        fig.data[INDEX_DATA_CHART_CONCURRENCY].line.shape
+        == "hv"
+    )
+    assert (
+        fig.data[INDEX_DATA_CHART_CONCURRENCY].y[-1]
+        == 0
+    )
 
     assert (
-        fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK].hovertext[9]
-        == '13:00:07 to 13:00:20 (13 sec)<br><b>66.6%</b> (Actual task work)<br>Stage: <b>21</b>'
+        render_hovertemplate(fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK], 9)
+        == '13:00:07 to 13:00:20 (0h 00m 12.9s)<br><b>66.6%</b> (Actual task work)<br>Stage: <b>21</b>'
     )
     
     assert (
@@ -102,15 +111,15 @@ def test_e2e(
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK].y[15]
-        == 0.8616790426854759
+        == 0.8616790429906318
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK].marker.color
         == 'green'
     )
     assert (
-        fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK].hovertext[15]
-        == '13:00:56 to 13:01:09 (13 sec)<br><b>86.2%</b> (Actual task work)<br>Stages: <b>36, 37</b>'
+        render_hovertemplate(fig.data[INDEX_DATA_CHART_EFFICIENCY_WORK], 15)
+        == '13:00:56 to 13:01:09 (0h 00m 13.0s)<br><b>86.2%</b> (Actual task work)<br>Stages: <b>36, 37</b>'
     )
     
     assert (
@@ -119,15 +128,15 @@ def test_e2e(
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_SER].y[15]
-        == 0.0004172841605397031
+        == 0.0004172841607628685
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_SER].marker.color
         == 'violet'
     )
     assert (
-        fig.data[INDEX_DATA_CHART_EFFICIENCY_SER].hovertext[15]
-        == '13:00:56 to 13:01:09 (13 sec)<br><b>0.0%</b> (Serialization, deserialization)<br>Stages: <b>36, 37</b>'
+        render_hovertemplate(fig.data[INDEX_DATA_CHART_EFFICIENCY_SER], 15)
+        == '13:00:56 to 13:01:09 (0h 00m 13.0s)<br><b>0.0%</b> (Serialization, deserialization)<br>Stages: <b>36, 37</b>'
     )
     
     assert (
@@ -136,15 +145,15 @@ def test_e2e(
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_SHUFFLE].y[15]
-        == 0.026342815821321402
+        == 0.026342815832318768
     )
     assert (
         fig.data[INDEX_DATA_CHART_EFFICIENCY_SHUFFLE].marker.color
         == 'red'
     )
     assert (
-        fig.data[INDEX_DATA_CHART_EFFICIENCY_SHUFFLE].hovertext[15]
-        == '13:00:56 to 13:01:09 (13 sec)<br><b>2.6%</b> (Shuffle read and write)<br>Stages: <b>36, 37</b>'
+        render_hovertemplate(fig.data[INDEX_DATA_CHART_EFFICIENCY_SHUFFLE], 15)
+        == '13:00:56 to 13:01:09 (0h 00m 13.0s)<br><b>2.6%</b> (Shuffle read and write)<br>Stages: <b>36, 37</b>'
     )
     
     if spill_bool:
@@ -165,12 +174,12 @@ def test_e2e(
             == 900212564.0
         )
         assert (
-            fig.data[INDEX_DATA_CHART_SPILL].hovertext[3]
-            == '12:59:16 to 12:59:37 (21 sec)<br>Executor ID: <b>3</b><br>Total spilled: <b>858.5 MB</b><br>Stage: <b>1</b>'
+            render_hovertemplate(fig.data[INDEX_DATA_CHART_SPILL], 3)
+            == '12:59:16 to 12:59:37 (0h 00m 21.2s)<br>Executor ID: <b>3</b><br>Total spilled: <b>858.5 MB</b><br>Stage: <b>1</b>'
         )
         assert (
-            fig.data[INDEX_DATA_CHART_SPILL].hovertext[2]
-            == '13:00:30 to 13:00:43 (12 sec)<br>Executor ID: <b>2</b><br>Total spilled: <b>3.6 GB</b><br>Stage: <b>26</b>'
+            render_hovertemplate(fig.data[INDEX_DATA_CHART_SPILL], 2)
+            == '13:00:30 to 13:00:43 (0h 00m 12.5s)<br>Executor ID: <b>2</b><br>Total spilled: <b>3.6 GB</b><br>Stage: <b>26</b>'
         )
         
     else:
@@ -180,3 +189,236 @@ def test_e2e(
         )
     
     print("\nNOTHING FAILED" * 100)
+
+
+@pytest.mark.parametrize(
+    "plotlyjs,plotlyjs_file_expected",
+    [
+        (PLOTLYJS_DIRECTORY, True),
+        (PLOTLYJS_INLINE, False),
+        (PLOTLYJS_CDN, False),
+    ],
+)
+def test_export_figure_html(
+    tmp_path,
+    plotlyjs: str,
+    plotlyjs_file_expected: bool,
+):
+    path_output = tmp_path / "reports" / "app.html"
+    
+    main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+        output=str(path_output),
+        plotlyjs=plotlyjs,
+    )
+    
+    assert path_output.exists()
+    assert (
+        (tmp_path / "reports" / "plotly.min.js").exists()
+        == plotlyjs_file_expected
+    )
+
+
+def test_export_figure_json(
+    tmp_path,
+):
+    path_output = tmp_path / "app.json"
+    
+    main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+        output=str(path_output),
+    )
+    
+    with open(path_output) as f:
+        figure = json.load(f)
+    
+    assert len(figure["data"]) > 0
+    assert list(tmp_path.iterdir()) == [path_output]
+    
+    with pytest.raises(ValueError):
+        export_figure(
+            None,
+            str(tmp_path / "app.png"),
+        )
+
+
+def test_export_figure_binary_arrays(
+    tmp_path,
+):
+    fig = _main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+    )
+    
+    _sizes = {}
+    
+    for _binary_arrays in (
+        False,
+        True,
+    ):
+        for _format in (
+            "json",
+            "html",
+        ):
+            _path_output = tmp_path / f"app_{_binary_arrays}.{_format}"
+            
+            export_figure(
+                fig,
+                str(_path_output),
+                binary_arrays=_binary_arrays,
+            )
+            
+            _sizes[_binary_arrays, _format] = _path_output.stat().st_size
+    
+    assert _sizes[True, "json"] < _sizes[False, "json"]
+    assert _sizes[True, "html"] < _sizes[False, "html"]
+    
+    with open(tmp_path / "app_True.json") as f:
+        figure = json.load(f)
+    
+    assert figure["data"][0]["x"]["dtype"] == "i8"
+    assert figure["data"][0]["y"]["dtype"] == "f4"
+    assert figure["data"][0]["width"]["dtype"] == "f8"
+    assert figure["data"][0]["customdata"]["shape"] == (
+        f"{len(fig.data[0].x)}, {fig.data[0].customdata.shape[1]}"
+    )
+    
+    with open(tmp_path / "app_True.html") as f:
+        assert "decodeTypedArrays" in f.read()
+
+
+def test_e2e_render_webgl():
+    (
+        fig_svg,
+        fig_webgl,
+    ) = (
+        _main(
+            path_spark_event_log=Path(ROOT_TESTS) / Path("test_e2e_spill_true"),
+            cpus=32,
+            render=_render,
+        )
+        for _render in (
+            RENDER_SVG,
+            RENDER_WEBGL,
+        )
+    )
+    
+    assert [_.type for _ in fig_webgl.data[:4]] == [
+        "scattergl",
+        "scattergl",
+        "scattergl",
+        "heatmap",
+    ]
+    
+    # Stacked areas reach the top of the stacked bars
+    _top_svg = sum(
+        np.asarray(fig_svg.data[_].y)
+        for _ in range(3)
+    )
+    _top_webgl = np.asarray(fig_webgl.data[2].y)
+    
+    assert np.isclose(_top_webgl.max(), _top_svg.max())
+    assert _top_webgl[0] == 0
+    assert _top_webgl[-1] == 0
+    
+    assert (
+        np.nansum(fig_webgl.data[3].z)
+        == np.sum(fig_svg.data[3].marker.color)
+    )
+    assert fig_webgl.data[3].coloraxis == "coloraxis"
+    
+    assert fig_svg.data[-1].type == "scatter"
+    assert fig_webgl.data[-1].type == "scattergl"
+    
+    # Same exact step function
+    assert list(fig_svg.data[-1].y) == list(fig_webgl.data[-1].y)
+
+
+@pytest.mark.parametrize(
+    "resolution",
+    [
+        "1s",
+        "10s",
+        "auto",
+    ],
+)
+def test_e2e_resolution(
+    resolution: str,
+):
+    fig = _main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+        resolution=resolution,
+    )
+    
+    assert fig is not None
+
+
+def test_e2e_resolution_width_kept():
+    fig = _main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+        resolution="100ms",
+    )
+    
+    # More buckets of fixed width than substages by default, not widened
+    assert len(fig.data[0].width) > SUBSTAGES_MAX
+    assert set(fig.data[0].width) == {100}
+
+
+def test_e2e_resolution_substages_max():
+    fig = _main(
+        path_spark_event_log=APP_LONG_FILE_PATH,
+        cpus=32,
+        resolution="1s",
+        substages_max=10,
+    )
+    
+    # Buckets widened instead of merged unevenly
+    _widths = fig.data[0].width
+    
+    assert len(_widths) <= 10
+    assert len(set(_widths)) == 1
+    assert _widths[0] % 1000 == 0
+
+
+def test_main_invalid_content(
+    tmp_path,
+    caplog,
+):
+    _path = tmp_path / "app"
+    _path.write_text('{"Event":"SparkListenerTaskEnd"\n')
+    
+    assert _main(
+        path_spark_event_log=str(_path),
+        cpus=32,
+    ) is None
+    
+    assert "does not appear to be a valid Spark event log" in caplog.text
+
+
+def test_main_codec_not_supported(
+    tmp_path,
+    caplog,
+):
+    _path = tmp_path / "app.lzf"
+    _path.write_bytes(b"ZV")
+    
+    assert _main(
+        path_spark_event_log=str(_path),
+        cpus=32,
+    ) is None
+    
+    assert "Compression codec lzf is not supported" in caplog.text
+    assert "does not appear to be a valid Spark event log" not in caplog.text
+
+
+def test_main_json_decoder_invalid():
+    with pytest.raises(ValueError):
+        _main(
+            path_spark_event_log=APP_LONG_FILE_PATH,
+            cpus=32,
+            json_decoder="yaml",
+        )